@@ -0,0 +1,71 @@
+"""
+Benchmarks for the SQL behind both web dashboards: the standalone Flask app
+(web_dashboard/app.py) and the bot-integrated WebDashboard cog.
+"""
+import pytest
+
+
+@pytest.fixture(scope="module")
+def app_module():
+    from web_dashboard import app
+    return app
+
+
+@pytest.fixture(scope="module")
+def dashboard_cog():
+    from cogs.web_dashboard import WebDashboard
+    # Skip __init__: the query methods don't touch the bot and we don't want
+    # the background sync task started.
+    return WebDashboard.__new__(WebDashboard)
+
+
+# Standalone dashboard (web_dashboard/app.py)
+
+def bench_app_get_user_stats(benchmark, bench_db, app_module, heavy_trader):
+    benchmark(app_module.get_user_stats, heavy_trader)
+
+
+def bench_app_get_user_stats_full_history(benchmark, bench_db, app_module, heavy_trader):
+    benchmark(app_module.get_user_stats, heavy_trader, True)
+
+
+def bench_app_get_all_users_with_activity(benchmark, bench_db, app_module):
+    benchmark(app_module.get_all_users_with_activity)
+
+
+def bench_app_get_all_users_with_activity_paginated(benchmark, bench_db, app_module):
+    benchmark(app_module.get_all_users_with_activity_paginated, 3, 25)
+
+
+def bench_app_search_users_with_pagination(benchmark, bench_db, app_module):
+    benchmark(app_module.search_users_with_pagination, "user12", 1, 25)
+
+
+def bench_app_get_homepage_stats(benchmark, bench_db, app_module):
+    benchmark(app_module.get_homepage_stats)
+
+
+def bench_app_get_recent_reviews(benchmark, bench_db, app_module):
+    benchmark(app_module.get_recent_reviews, 6)
+
+
+# Bot-integrated dashboard (cogs/web_dashboard.py)
+
+def bench_cog_get_user_stats(benchmark, bench_db, dashboard_cog, heavy_trader):
+    benchmark(dashboard_cog.get_user_stats, heavy_trader)
+
+
+def bench_cog_get_all_users_with_activity(benchmark, bench_db, dashboard_cog):
+    benchmark(dashboard_cog.get_all_users_with_activity)
+
+
+def bench_cog_get_homepage_stats(benchmark, bench_db, dashboard_cog):
+    benchmark(dashboard_cog.get_homepage_stats)
+
+
+def bench_cog_get_recent_reviews(benchmark, bench_db, dashboard_cog):
+    benchmark(dashboard_cog.get_recent_reviews, 6)
+
+
+def bench_cog_search_users_in_database(benchmark, bench_db, dashboard_cog):
+    benchmark(dashboard_cog.search_users_in_database, "user12")
@@ -0,0 +1,212 @@
+"""
+Benchmarks for every public query function in utils/db.py. The connection
+helpers (connect, connect_users, attach_history, ...) are covered by the
+queries that use them.
+"""
+import time
+
+from utils import db
+
+
+def bench_init_db(benchmark, bench_db):
+    benchmark(db.init_db)
+
+
+def bench_add_review(benchmark, bench_db, fresh_ids, heavy_trader, sample_thread):
+    benchmark(lambda: db.add_review(next(fresh_ids), heavy_trader, sample_thread, 9, "Benchmark review"))
+
+
+def bench_add_review_duplicate(benchmark, bench_db, fresh_ids, heavy_trader, sample_thread):
+    giver = next(fresh_ids)
+    db.add_review(giver, heavy_trader, sample_thread, 9)
+    benchmark(db.add_review, giver, heavy_trader, sample_thread, 9)
+
+
+def bench_get_user_reviews_heavy(benchmark, bench_db, heavy_trader):
+    benchmark(db.get_user_reviews, heavy_trader)
+
+
+def bench_get_user_reviews_full_history(benchmark, bench_db, heavy_trader):
+    benchmark(db.get_user_reviews, heavy_trader, True)
+
+
+def bench_get_user_reviews_casual(benchmark, bench_db, casual_user):
+    benchmark(db.get_user_reviews, casual_user)
+
+
+def bench_get_top_rated_users(benchmark, bench_db):
+    benchmark(db.get_top_rated_users, 10)
+
+
+def bench_has_user_reviewed(benchmark, bench_db, heavy_trader, casual_user, sample_thread):
+    benchmark(db.has_user_reviewed, casual_user, heavy_trader, sample_thread)
+
+
+def bench_upsert_user_insert(benchmark, bench_db, fresh_ids):
+    benchmark(lambda: db.upsert_user(next(fresh_ids), "bench_user", "Bench User"))
+
+
+def bench_upsert_user_update(benchmark, bench_db, heavy_trader):
+    benchmark(db.upsert_user, heavy_trader, "user0", "User 0", roles='[]')
+
+
+def bench_mark_user_left(benchmark, bench_db, casual_user):
+    benchmark(db.mark_user_left, casual_user)
+
+
+def bench_get_all_users(benchmark, bench_db):
+    benchmark(db.get_all_users)
+
+
+def bench_get_user(benchmark, bench_db, heavy_trader):
+    benchmark(db.get_user, heavy_trader)
+
+
+def bench_get_users_missing_profile(benchmark, bench_db):
+    benchmark(db.get_users_missing_profile, 50)
+
+
+def bench_update_user_profile(benchmark, bench_db, casual_user):
+    benchmark(db.update_user_profile, casual_user, None, 0, 64, '[]')
+
+
+def bench_upsert_thread(benchmark, bench_db, fresh_ids, heavy_trader):
+    benchmark(lambda: db.upsert_thread(next(fresh_ids), 1, 1, "Bench thread", heavy_trader, "https://discord.com"))
+
+
+def bench_upsert_threads(benchmark, bench_db, fresh_ids, heavy_trader):
+    benchmark(lambda: db.upsert_threads([
+        (next(fresh_ids), 1, 1, "Bench thread", heavy_trader, "https://discord.com") for _ in range(25)
+    ]))
+
+
+def bench_get_thread_info(benchmark, bench_db, sample_thread):
+    benchmark(db.get_thread_info, sample_thread)
+
+
+def bench_schedule_thread_auto_close(benchmark, bench_db, sample_thread):
+    benchmark(db.schedule_thread_auto_close, sample_thread, time.time() + 86400)
+
+
+def bench_cancel_thread_auto_close(benchmark, bench_db, sample_thread):
+    benchmark(db.cancel_thread_auto_close, sample_thread)
+
+
+def bench_get_threads_to_auto_close(benchmark, bench_db):
+    benchmark(db.get_threads_to_auto_close)
+
+
+def bench_get_active_thread_ids(benchmark, bench_db):
+    benchmark(db.get_active_thread_ids)
+
+
+def bench_count_threads_by_state(benchmark, bench_db):
+    benchmark(db.count_threads_by_state)
+
+
+def bench_set_thread_state(benchmark, bench_db, sample_thread):
+    benchmark(db.set_thread_state, sample_thread, "reviewed")
+
+
+def bench_get_thread_review_count(benchmark, bench_db, sample_thread):
+    benchmark(db.get_thread_review_count, sample_thread)
+
+
+def bench_add_tos_gate(benchmark, bench_db, fresh_ids, heavy_trader):
+    now = time.time()
+    benchmark(lambda: db.add_tos_gate(next(fresh_ids), 1, heavy_trader, None, now, now + 30))
+
+
+def bench_get_tos_gates(benchmark, bench_db):
+    benchmark(db.get_tos_gates)
+
+
+def bench_delete_tos_gates(benchmark, bench_db, fresh_ids):
+    benchmark(lambda: db.delete_tos_gates([next(fresh_ids)]))
+
+
+def bench_get_review_panel(benchmark, bench_db, sample_thread):
+    benchmark(db.get_review_panel, sample_thread)
+
+
+def bench_set_review_panel(benchmark, bench_db, sample_thread, fresh_ids):
+    benchmark(lambda: db.set_review_panel(sample_thread, next(fresh_ids)))
+
+
+def bench_get_log_message(benchmark, bench_db, sample_thread):
+    benchmark(db.get_log_message, f"thread:{sample_thread}")
+
+
+def bench_set_log_message(benchmark, bench_db, fresh_ids):
+    benchmark(lambda: db.set_log_message(f"thread:{next(fresh_ids)}", 1, 1))
+
+
+def bench_get_log_events(benchmark, bench_db, sample_thread):
+    benchmark(db.get_log_events, f"thread:{sample_thread}")
+
+
+def bench_add_log_events(benchmark, bench_db, sample_thread):
+    benchmark(db.add_log_events, [(f"thread:{sample_thread}", "Review Events", "Bench event")] * 10)
+
+
+def bench_append_events(benchmark, bench_db, sample_thread):
+    rows = [("review_submitted", sample_thread, 1, '{"rating": 8}', 1.0)] * 100
+    benchmark(db.append_events, rows)
+
+
+def bench_get_events(benchmark, bench_db, sample_thread):
+    benchmark(db.get_events, thread_id=sample_thread, limit=50)
+
+
+def bench_add_outbox_messages(benchmark, bench_db):
+    benchmark(db.add_outbox_messages, [(1, 1, None, '{"title": "Bench"}', 1.0)] * 10)
+
+
+def bench_get_due_outbox_messages(benchmark, bench_db):
+    benchmark(db.get_due_outbox_messages, 2.0, 50)
+
+
+def bench_get_outbox_depth(benchmark, bench_db):
+    benchmark(db.get_outbox_depth)
+
+
+def bench_retry_outbox_message(benchmark, bench_db):
+    db.add_outbox_messages([(1, -1, "Bench", None, 0.0)])
+    message_id = db.get_due_outbox_messages(0.0, 1)[0].id
+    benchmark(db.retry_outbox_message, message_id, 1.0)
+
+
+def bench_delete_outbox_messages(benchmark, bench_db, fresh_ids):
+    benchmark(lambda: db.delete_outbox_messages([next(fresh_ids)]))
+
+
+def bench_is_first_review_in_thread(benchmark, bench_db, sample_thread):
+    benchmark(db.is_first_review_in_thread, sample_thread)
+
+
+def bench_count_reviews_by_others(benchmark, bench_db, heavy_trader, sample_thread):
+    benchmark(db.count_reviews_by_others, sample_thread, heavy_trader)
+
+
+def bench_rebuild_user_stats(benchmark, bench_db):
+    benchmark(db.rebuild_user_stats)
+
+
+def bench_get_profile_stats(benchmark, bench_db, heavy_trader):
+    benchmark(db.get_profile_stats, heavy_trader)
+
+
+def bench_list_user_activity(benchmark, bench_db):
+    benchmark(db.list_user_activity, None, 25, 50)
+
+
+def bench_count_users(benchmark, bench_db):
+    benchmark(db.count_users, "user12")
+
+
+def bench_get_site_stats(benchmark, bench_db):
+    benchmark(db.get_site_stats)
+
+
+def bench_get_recent_reviews(benchmark, bench_db):
+    benchmark(db.get_recent_reviews, 6)
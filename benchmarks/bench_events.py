@@ -0,0 +1,75 @@
+"""
+The audit event queue (utils/events.py): the cost of recording an event,
+plus a check that no event goes missing when the queue overflows while a
+write is running.
+"""
+import asyncio
+import json
+import threading
+
+import pytest
+
+from utils import events, storage
+
+
+class BlockingEvents:
+    """Storage stand-in whose append_events waits until released; writes in `fail` raise."""
+
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.rows = []
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def append_events(self, rows):
+        self.calls += 1
+        self.started.set()
+        self.release.wait(5)
+        if self.calls in self.fail:
+            raise RuntimeError("storage unavailable")
+        self.rows.extend(rows)
+
+
+@pytest.fixture
+def event_storage():
+    fake = BlockingEvents()
+    previous = storage.set_storage(fake)
+    yield fake
+    storage.set_storage(previous)
+
+
+def bench_event_log_record(benchmark):
+    event_log = events.EventLog()
+    benchmark(event_log.record, 'review_submitted', 1, 2, rating=9, receiver_id=3)
+
+
+@pytest.mark.parametrize("first_write", ["succeeds", "fails"])
+def bench_event_log_overflow_during_write(monkeypatch, event_storage, first_write):
+    """Written plus dropped events add up to everything recorded."""
+    monkeypatch.setattr(events, 'MAX_PENDING', 5)
+    monkeypatch.setattr(events, 'MAX_BATCH', 5)
+    if first_write == "fails":
+        event_storage.fail = {1}
+    event_log = events.EventLog()
+
+    async def run():
+        for i in range(5):
+            event_log.record('test', n=i)
+        flush = asyncio.create_task(event_log.flush())
+        while not event_storage.started.is_set():
+            await asyncio.sleep(0.001)
+        # The queue overflows while the first batch is being written
+        for i in range(5, 15):
+            event_log.record('test', n=i)
+        event_storage.release.set()
+        await flush
+        await event_log.flush()
+
+    asyncio.run(run())
+    written = [json.loads(row[3])['n'] for row in event_storage.rows]
+    assert not event_log._pending
+    assert len(written) == len(set(written)) == event_log.written
+    assert event_log.written + event_log.dropped == 15
+    # Only the oldest events are dropped; the newest always reach storage
+    assert set(range(10, 15)) <= set(written)
@@ -0,0 +1,116 @@
+"""
+The storage protocol (utils/storage.py) on the SQLite engine versus the
+in-memory engine, over the same generated data, plus a parity check that
+both engines return the same results.
+"""
+import shutil
+
+import pytest
+
+from utils import db, storage
+from utils.memory_storage import MemoryStorage
+
+
+def bench_store_add_review(benchmark, bench_store, fresh_ids, heavy_trader, sample_thread):
+    benchmark(lambda: bench_store.add_review(next(fresh_ids), heavy_trader, sample_thread, 9, "Benchmark review"))
+
+
+def bench_store_get_user_reviews(benchmark, bench_store, heavy_trader):
+    benchmark(bench_store.get_user_reviews, heavy_trader)
+
+
+def bench_store_get_top_rated_users(benchmark, bench_store):
+    benchmark(bench_store.get_top_rated_users, 10)
+
+
+def bench_store_has_user_reviewed(benchmark, bench_store, heavy_trader, casual_user, sample_thread):
+    benchmark(bench_store.has_user_reviewed, casual_user, heavy_trader, sample_thread)
+
+
+def bench_store_count_reviews_by_others(benchmark, bench_store, heavy_trader, sample_thread):
+    benchmark(bench_store.count_reviews_by_others, sample_thread, heavy_trader)
+
+
+def bench_store_upsert_user(benchmark, bench_store, heavy_trader):
+    benchmark(bench_store.upsert_user, heavy_trader, "user0", "User 0", roles='[]')
+
+
+def bench_store_get_all_users(benchmark, bench_store):
+    benchmark(bench_store.get_all_users)
+
+
+def bench_store_upsert_thread(benchmark, bench_store, fresh_ids, heavy_trader):
+    benchmark(lambda: bench_store.upsert_thread(next(fresh_ids), 1, 1, "Bench thread", heavy_trader, "https://discord.com"))
+
+
+def bench_store_get_threads_to_auto_close(benchmark, bench_store):
+    benchmark(bench_store.get_threads_to_auto_close)
+
+
+def bench_store_get_profile_stats(benchmark, bench_store, heavy_trader):
+    benchmark(bench_store.get_profile_stats, heavy_trader)
+
+
+def bench_store_list_user_activity_page(benchmark, bench_store):
+    benchmark(bench_store.list_user_activity, None, 25, 50)
+
+
+def bench_store_search_user_activity(benchmark, bench_store):
+    benchmark(bench_store.list_user_activity, "user12", 25, 0)
+
+
+def bench_store_count_users(benchmark, bench_store):
+    benchmark(bench_store.count_users, "user12")
+
+
+def bench_store_get_site_stats(benchmark, bench_store):
+    benchmark(bench_store.get_site_stats)
+
+
+def bench_store_get_recent_reviews(benchmark, bench_store):
+    benchmark(bench_store.get_recent_reviews, 6)
+
+
+PARITY_READS = [
+    ("get_user_reviews", lambda s, ids: s.get_user_reviews(ids['heavy'])),
+    ("get_user_reviews_full", lambda s, ids: s.get_user_reviews(ids['heavy'], True)),
+    ("get_top_rated_users", lambda s, ids: s.get_top_rated_users(10)),
+    ("has_user_reviewed", lambda s, ids: s.has_user_reviewed(ids['casual'], ids['heavy'], ids['thread'])),
+    ("count_reviews_by_others", lambda s, ids: s.count_reviews_by_others(ids['thread'], ids['heavy'])),
+    ("get_recent_reviews", lambda s, ids: s.get_recent_reviews(6)),
+    ("get_all_users", lambda s, ids: s.get_all_users()),
+    ("get_user", lambda s, ids: s.get_user(ids['heavy'])),
+    ("get_thread_info", lambda s, ids: s.get_thread_info(ids['thread'])),
+    ("get_thread_review_count", lambda s, ids: s.get_thread_review_count(ids['thread'])),
+    ("get_threads_to_auto_close", lambda s, ids: s.get_threads_to_auto_close()),
+    ("get_active_thread_ids", lambda s, ids: sorted(s.get_active_thread_ids())),
+    ("count_threads_by_state", lambda s, ids: s.count_threads_by_state()),
+    ("get_tos_gates", lambda s, ids: s.get_tos_gates()),
+    ("get_profile_stats", lambda s, ids: s.get_profile_stats(ids['heavy'])),
+    ("list_user_activity_page", lambda s, ids: s.list_user_activity(None, 25, 50)),
+    ("list_user_activity_search", lambda s, ids: s.list_user_activity("user12", 25, 0)),
+    ("count_users", lambda s, ids: s.count_users("user12")),
+    ("get_site_stats", lambda s, ids: s.get_site_stats()),
+]
+
+
+@pytest.fixture(scope="module")
+def parity_engines(bench_source, tmp_path_factory):
+    """Untouched copies of the generated data behind both engines (the benchmarks above write to theirs)."""
+    path = str(tmp_path_factory.mktemp("bench-parity") / "rep.db")
+    shutil.copyfile(bench_source, path)
+    previous_path = db.DB_PATH
+    db.DB_PATH = path
+    yield storage.SQLiteStorage(), MemoryStorage.from_sqlite(bench_source)
+    db.DB_PATH = previous_path
+
+
+@pytest.mark.parametrize("name, read", PARITY_READS, ids=[name for name, _ in PARITY_READS])
+def bench_store_parity(parity_engines, heavy_trader, casual_user, sample_thread, name, read):
+    """Both engines return the same result for the same read."""
+    sqlite_engine, memory_engine = parity_engines
+    ids = {'heavy': heavy_trader, 'casual': casual_user, 'thread': sample_thread}
+    expected = read(sqlite_engine, ids)
+    if name == "get_site_stats":
+        expected = pytest.approx(expected)    # averages are summed in a different order
+    assert read(memory_engine, ids) == expected
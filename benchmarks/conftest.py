@@ -0,0 +1,137 @@
+"""
+Shared fixtures for the data-layer benchmarks.
+
+A synthetic database is generated once per session and then served through
+two backends: a shared-cache in-memory database (pure query cost) and an
+on-disk copy (adds page cache and fsync cost). `db.DB_PATH` is pointed at the
+active backend before every benchmark, so the real `utils/db.py` and
+dashboard functions run unmodified.
+
+`bench_store` serves the same data through each storage engine
+(utils/storage.py) so SQLite can be compared with the in-memory engine.
+"""
+import itertools
+import shutil
+import sqlite3
+
+import pytest
+
+from benchmarks import generate_data
+from utils import db, instrumentation, storage
+from utils.memory_storage import MemoryStorage
+
+BACKENDS = ("memory", "disk")
+ENGINES = ("sqlite", "memory")
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("rep-bench", "rep.db benchmarks")
+    group.addoption("--bench-scale", default="small", choices=sorted(generate_data.SCALES),
+                    help="Synthetic data scale preset (default: small)")
+    group.addoption("--bench-seed", type=int, default=generate_data.DEFAULT_SEED,
+                    help="Seed for the synthetic data generator")
+    group.addoption("--bench-db", default=None,
+                    help="Use an existing generated database instead of generating one")
+    group.addoption("--bench-backend", default="both", choices=BACKENDS + ("both",),
+                    help="Which backend(s) to benchmark")
+    group.addoption("--bench-instrumented", action="store_true",
+                    help="Keep query instrumentation enabled while benchmarking")
+
+
+@pytest.fixture(scope="session")
+def bench_source(request, tmp_path_factory) -> str:
+    """Path to the generated source database (never written to)."""
+    existing = request.config.getoption("--bench-db")
+    if existing:
+        return existing
+    scale = request.config.getoption("--bench-scale")
+    seed = request.config.getoption("--bench-seed")
+    path = str(tmp_path_factory.mktemp("bench-data") / f"rep-{scale}-{seed}.db")
+    generate_data.generate(path, seed=seed, **generate_data.SCALES[scale])
+    return path
+
+
+@pytest.fixture(scope="session", params=BACKENDS)
+def bench_database(request, bench_source, tmp_path_factory):
+    """A private copy of the source database on the requested backend."""
+    backend = request.param
+    selected = request.config.getoption("--bench-backend")
+    if selected not in ("both", backend):
+        pytest.skip(f"--bench-backend={selected}")
+
+    instrumentation.configure(enabled=request.config.getoption("--bench-instrumented"))
+
+    if backend == "memory":
+        path = "file:rep-bench?mode=memory&cache=shared"
+        # The shared in-memory database lives as long as one connection is open
+        keeper = sqlite3.connect(path, uri=True)
+        source = sqlite3.connect(bench_source)
+        source.backup(keeper)
+        source.close()
+        yield path
+        keeper.close()
+    else:
+        path = str(tmp_path_factory.mktemp("bench-disk") / "rep.db")
+        shutil.copyfile(bench_source, path)
+        yield path
+
+
+@pytest.fixture
+def bench_db(bench_database):
+    """Point utils.db (and the dashboards' storage engine) at the active benchmark database."""
+    previous_path = db.DB_PATH
+    db.DB_PATH = bench_database
+    previous_storage = storage.set_storage(storage.SQLiteStorage())
+    yield bench_database
+    db.DB_PATH = previous_path
+    storage.set_storage(previous_storage)
+
+
+@pytest.fixture(scope="session")
+def sqlite_engine_path(bench_source, tmp_path_factory) -> str:
+    """On-disk copy of the source database for the SQLite storage engine."""
+    path = str(tmp_path_factory.mktemp("bench-engine") / "rep.db")
+    shutil.copyfile(bench_source, path)
+    return path
+
+
+@pytest.fixture(scope="session")
+def memory_engine(bench_source) -> MemoryStorage:
+    return MemoryStorage.from_sqlite(bench_source)
+
+
+@pytest.fixture(params=ENGINES)
+def bench_store(request, sqlite_engine_path, memory_engine):
+    """The generated data behind each storage engine."""
+    instrumentation.configure(enabled=request.config.getoption("--bench-instrumented"))
+    if request.param == "memory":
+        yield memory_engine
+        return
+    previous_path = db.DB_PATH
+    db.DB_PATH = sqlite_engine_path
+    yield storage.SQLiteStorage()
+    db.DB_PATH = previous_path
+
+
+@pytest.fixture(scope="session")
+def fresh_ids():
+    """Endless supply of IDs that don't collide with generated rows."""
+    return itertools.count(900000000000000000)
+
+
+@pytest.fixture(scope="session")
+def heavy_trader() -> int:
+    """A user ID with a large review history (first heavy trader)."""
+    return generate_data.user_id(0)
+
+
+@pytest.fixture(scope="session")
+def casual_user(request) -> int:
+    """A user ID from the long tail of light traders."""
+    scale = generate_data.SCALES[request.config.getoption("--bench-scale")]
+    return generate_data.user_id(scale['users'] - 1)
+
+
+@pytest.fixture(scope="session")
+def sample_thread() -> int:
+    return generate_data.thread_id(0)
@@ -0,0 +1,226 @@
+"""
+Deterministic synthetic data generator for rep.db.
+
+Builds a database with the production schema (via `db.init_db`) filled with
+fake users, threads and reviews. The same seed and scale always produce the
+same database, so benchmark runs are comparable across machines and commits.
+
+A small fraction of users are "heavy traders" who own a large share of the
+threads (and therefore receive a large share of the reviews), mirroring the
+skew seen on real marketplace servers.
+
+Usage:
+    python -m benchmarks.generate_data --out data/bench.db --scale large
+    python -m benchmarks.generate_data --out data/bench.db --users 5000 --reviews 40000
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Iterator, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils import db
+from utils.records import Thread, User
+
+SCALES = {
+    'tiny': {'users': 500, 'threads': 1_000, 'reviews': 5_000},
+    'small': {'users': 10_000, 'threads': 20_000, 'reviews': 100_000},
+    'large': {'users': 100_000, 'threads': 200_000, 'reviews': 1_000_000},
+}
+
+DEFAULT_SEED = 4021
+HEAVY_TRADER_FRACTION = 0.02   # share of users who are heavy traders
+HEAVY_TRADER_SHARE = 0.5       # share of threads owned by heavy traders
+IN_SERVER_RATE = 0.9
+BATCH_SIZE = 50_000
+
+# Generated timestamps fall in the two years before this date
+EPOCH_END = datetime(2025, 1, 1)
+SPAN_SECONDS = 2 * 365 * 24 * 3600
+
+GUILD_ID = 100000000000000000
+FORUM_IDS = (200000000000000001, 200000000000000002, 200000000000000003)
+USER_ID_BASE = 300000000000000000
+THREAD_ID_BASE = 400000000000000000
+
+ROLE_NAMES = ("Trader", "Verified", "Moderator", "Booster", "Veteran")
+ROLE_COLORS = ("#e74c3c", "#3498db", "#2ecc71", "#f1c40f", "#9b59b6")
+
+
+def user_id(index: int) -> int:
+    return USER_ID_BASE + index
+
+
+def thread_id(index: int) -> int:
+    return THREAD_ID_BASE + index
+
+
+def _timestamp(rng: random.Random) -> str:
+    return (EPOCH_END - timedelta(seconds=rng.randrange(SPAN_SECONDS))).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _batched(rows: Iterator[tuple], size: int = BATCH_SIZE) -> Iterator[list]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class OwnerPicker:
+    """Picks user indexes with the heavy-trader skew applied."""
+
+    def __init__(self, rng: random.Random, users: int):
+        self.rng = rng
+        self.users = users
+        self.heavy = max(1, int(users * HEAVY_TRADER_FRACTION))
+
+    def pick(self) -> int:
+        if self.rng.random() < HEAVY_TRADER_SHARE:
+            return self.rng.randrange(self.heavy)
+        return self.rng.randrange(self.heavy, self.users) if self.users > self.heavy else 0
+
+
+def _user_rows(rng: random.Random, users: int) -> Iterator[tuple]:
+    for i in range(users):
+        in_server = rng.random() < IN_SERVER_RATE
+        roles = None
+        if rng.random() < 0.6:
+            picked = rng.sample(range(len(ROLE_NAMES)), rng.randint(1, 3))
+            roles = json.dumps([
+                {"id": 500 + r, "name": ROLE_NAMES[r], "color": ROLE_COLORS[r], "position": r,
+                 "hoisted": False, "mentionable": False}
+                for r in picked
+            ])
+        public_flags = rng.choice((None, None, None, 64, 128, 256, 4194304))
+        badges = json.dumps([{"name": "HypeSquad", "emoji": "⚡", "color": "#F47FFF"}]) if public_flags else None
+        yield (
+            user_id(i), f"user{i}", f"User {i}",
+            f"https://cdn.discordapp.com/avatars/{user_id(i)}/{i:032x}.png" if rng.random() < 0.8 else None,
+            None, None, public_flags,
+            _timestamp(rng),
+            None if in_server else _timestamp(rng),
+            in_server, roles, badges
+        )
+
+
+def _thread_rows(rng: random.Random, threads: int, picker: OwnerPicker, owners: list) -> Iterator[tuple]:
+    for i in range(threads):
+        owner = picker.pick()
+        owners.append(owner)
+        forum = rng.choice(FORUM_IDS)
+        archived = rng.random() < 0.7
+        created_at = _timestamp(rng)
+        # review_count starts at 0; the reviews_thread_state trigger counts
+        # the reviews inserted afterwards (and moves open threads to reviewed)
+        yield (
+            thread_id(i), forum, GUILD_ID, f"WTS item #{i}", user_id(owner),
+            created_at, archived, archived and rng.random() < 0.9,
+            f"https://discord.com/channels/{GUILD_ID}/{thread_id(i)}",
+            None, False,
+            Thread.CLOSED if archived else Thread.OPEN, 0, created_at, created_at, None,
+            created_at if archived else None
+        )
+
+
+def _review_rows(rng: random.Random, reviews: int, users: int, owners: list) -> Iterator[tuple]:
+    threads = len(owners)
+    for _ in range(reviews):
+        t = rng.randrange(threads)
+        receiver = owners[t]
+        giver = rng.randrange(users)
+        if giver == receiver:
+            giver = (giver + 1) % users
+        rating = min(10, max(1, int(rng.gauss(8, 2))))
+        notes = f"Smooth trade #{rng.randrange(10_000)}" if rng.random() < 0.4 else None
+        yield (user_id(giver), user_id(receiver), thread_id(t), rating, notes, _timestamp(rng))
+
+
+def generate(path: str, users: int, threads: int, reviews: int, seed: int = DEFAULT_SEED,
+             progress: Optional[Callable[[str], None]] = print) -> dict:
+    """
+    Create (or overwrite) the database at `path` with synthetic data.
+    Returns the row counts actually written.
+    """
+    if users < 2 or threads < 1:
+        raise ValueError("Need at least 2 users and 1 thread")
+    report = progress or (lambda _msg: None)
+    path = db.resolve_db_path(path)
+    uri = path.startswith('file:')
+    if not uri and os.path.exists(path):
+        os.remove(path)
+
+    previous_path = db.DB_PATH
+    db.DB_PATH = path
+    try:
+        db.init_db()
+    finally:
+        db.DB_PATH = previous_path
+
+    rng = random.Random(seed)
+    picker = OwnerPicker(rng, users)
+    owners: list = []
+    started = time.perf_counter()
+
+    # Bulk loading isn't worth instrumenting, so use a plain connection
+    conn = sqlite3.connect(path, uri=uri)
+    c = conn.cursor()
+    try:
+        for batch in _batched(_user_rows(rng, users)):
+            c.executemany(f"INSERT INTO users ({User.COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", batch)
+        conn.commit()
+        report(f"[BENCH-DATA] {users} users")
+
+        for batch in _batched(_thread_rows(rng, threads, picker, owners)):
+            placeholders = ", ".join("?" * len(Thread.COLUMNS.split(",")))
+            c.executemany(f"INSERT INTO threads ({Thread.COLUMNS}) VALUES ({placeholders})", batch)
+        conn.commit()
+        report(f"[BENCH-DATA] {threads} threads")
+
+        for batch in _batched(_review_rows(rng, reviews, users, owners)):
+            c.executemany(
+                "INSERT OR IGNORE INTO reviews (giver_id, receiver_id, thread_id, rating, notes, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)", batch
+            )
+            conn.commit()
+        c.execute("SELECT COUNT(*) FROM reviews")
+        written_reviews = c.fetchone()[0]
+        report(f"[BENCH-DATA] {written_reviews} reviews ({reviews - written_reviews} duplicate pairs skipped)")
+
+        c.execute("ANALYZE")
+        conn.commit()
+    finally:
+        conn.close()
+
+    report(f"[BENCH-DATA] Generated {path} in {time.perf_counter() - started:.1f}s")
+    return {'users': users, 'threads': threads, 'reviews': written_reviews}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Generate a synthetic rep.db for benchmarking.")
+    parser.add_argument("--out", default="data/bench.db", help="Database file to create (overwritten)")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small", help="Preset row counts")
+    parser.add_argument("--users", type=int, help="Override the number of users")
+    parser.add_argument("--threads", type=int, help="Override the number of threads")
+    parser.add_argument("--reviews", type=int, help="Override the number of reviews")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Random seed")
+    args = parser.parse_args()
+
+    counts = dict(SCALES[args.scale])
+    for key in counts:
+        if getattr(args, key) is not None:
+            counts[key] = getattr(args, key)
+    generate(args.out, seed=args.seed, **counts)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
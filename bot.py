@@ -4,12 +4,19 @@ from discord.ext import commands
 from dotenv import load_dotenv
 import os
 import asyncio
-from utils.db import init_db
+import logging
+from utils import metrics
+from utils.log import setup_logging
+from utils.loop_watchdog import loop_watchdog
+from utils.storage import get_storage
+from utils.legacy_migration import has_legacy_rep, load_migration_settings, migrate_legacy_rep
 from cogs.rep import RepTOSView, ReviewButtonView
 
 # Load environment variables from .env
 load_dotenv()
 
+log = logging.getLogger("bot")
+
 # Configure bot intents
 intents = discord.Intents.default()
 intents.message_content = True
@@ -18,22 +25,26 @@ intents.members = True
 intents.messages = True
 
 # Initialize bot
-bot = commands.Bot(command_prefix="!", intents=intents)
+bot = commands.Bot(command_prefix="!", intents=intents, http_trace=metrics.discord_http_trace())
+metrics.instrument_discord_http(bot)
 
 @bot.event
 async def on_ready():
     """
-    Called when the bot is ready. Initializes the database,
-    registers persistent views, and prints startup confirmation.
+    Called when the bot is ready. Migrates legacy rep,
+    registers persistent views, and logs startup confirmation.
     """
-    print(f"✅ Logged in as {bot.user}")
-    init_db()
+    log.info("Logged in as %s", bot.user)
+
+    # Fold any leftover +/- rep history into the reviews table (resumable)
+    if has_legacy_rep():
+        await asyncio.to_thread(migrate_legacy_rep, **load_migration_settings())
 
     # Register persistent views for button survival
     bot.add_view(ReviewButtonView())
     bot.add_view(RepTOSView())
 
-    print("✅ Ready. Use !sync to globally sync slash commands.")
+    log.info("Ready. Use !sync to globally sync slash commands.")
 
 @bot.command(name="sync")
 async def sync_commands(ctx: commands.Context):
@@ -45,26 +56,36 @@ async def sync_commands(ctx: commands.Context):
         # bot.tree.clear_commands()
 
         synced = await bot.tree.sync()
-        print(f"✅ Globally synced {len(synced)} slash commands.")
+        log.info("Globally synced %d slash commands", len(synced))
         await ctx.send(f"✅ Globally synced {len(synced)} slash commands. (May take up to 1 hour to appear)")
-    except Exception as e:
-        print(f"[ERROR] Failed to sync globally: {e}")
+    except Exception:
+        log.exception("Failed to sync globally")
         await ctx.send("❌ Failed to sync commands.")
 
 async def main():
     """
     Main entrypoint for loading cogs and starting the bot.
     """
+    # Formatting and log I/O run on a listener thread, off the event loop
+    setup_logging("bot")
+
+    # Cogs read stored state (active threads, pending TOS gates) when they load
+    get_storage().init()
+    # Measure event loop lag and capture the stack of anything that blocks it
+    loop_watchdog.start()
+
     async with bot:
         await bot.load_extension("cogs.logging")
         await bot.load_extension("cogs.rep")
+        await bot.load_extension("cogs.replica")
+        await bot.load_extension("cogs.maintenance")
         
         # Only load web dashboard if not disabled
         if not os.getenv("DISABLE_WEB_DASHBOARD"):
-            print("🌐 Loading web dashboard integration...")
+            log.info("Loading web dashboard integration")
             await bot.load_extension("cogs.web_dashboard")
         else:
-            print("🚫 Web dashboard disabled - running Discord bot only")
+            log.info("Web dashboard disabled - running Discord bot only")
             
         await bot.start(os.getenv("DISCORD_TOKEN"))
 
@@ -1,33 +1,460 @@
 import discord
 from discord.ext import commands
+import asyncio
+import json
+import logging
+import os
 import yaml
 import time
-from typing import Optional, Dict, List
+from collections import deque
+from typing import Deque, Optional, Dict, List, Tuple, Union
+from datetime import datetime, timezone
+from utils import metrics
+from utils.events import event_log
+from utils.records import Event
+from utils.storage import get_storage
 
 CONFIG_PATH = 'data/config.yaml'
 
+log = logging.getLogger(__name__)
+
+LogHandle = Union[discord.Message, discord.PartialMessage]
+
 def load_config():
     with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
         return yaml.safe_load(f)
 
+
+# Stable storage keys for log embeds (Python's hash() of a str changes per process)
+def thread_log_key(thread_id: int) -> str:
+    return f"thread:{thread_id}"
+
+def custom_log_key(identifier: str) -> str:
+    return f"custom:{identifier}"
+
+
+# Audit embeds are a projection of the events table: each event type renders
+# from its payload alone, so the dashboard timeline shows the same history
+SETTINGS_SECTIONS = {
+    'auto_close': ("⚙️ Auto-Close Settings Modified", "updated auto-close settings"),
+    'tos': ("📋 TOS Settings Modified", "updated TOS messages"),
+    'server': ("🌐 Server Settings Modified", "updated server information"),
+    'bot_status': ("🤖 Bot Status Settings Modified", "updated bot status settings"),
+}
+
+def _thread_link(p: dict) -> str:
+    return f"[{p.get('thread_name')}]({p.get('jump_url')})"
+
+def _render_review_submitted(e: Event, p: dict) -> discord.Embed:
+    embed = discord.Embed(
+        title="✅ Review Submitted",
+        description=(
+            f"<@{e.actor_id}> gave a **{p.get('rating')}/10** rating "
+            f"to <@{p.get('receiver_id')}> in [this thread]({p.get('jump_url')})"
+        ),
+        color=discord.Color.green()
+    )
+    notes = p.get('notes')
+    if notes:
+        embed.add_field(name="Review Notes", value=notes[:100] + "..." if len(notes) > 100 else notes, inline=False)
+    return embed
+
+def _render_auto_close_scheduled(e: Event, p: dict) -> discord.Embed:
+    embed = discord.Embed(
+        title="⏰ Auto-Close Scheduled",
+        description=f"Thread {_thread_link(p)} scheduled to auto-close <t:{p.get('closes_at')}:R>",
+        color=discord.Color.orange()
+    )
+    embed.add_field(name="Thread Owner", value=f"<@{p.get('owner_id')}>", inline=True)
+    embed.add_field(name="Trigger", value="First review received", inline=True)
+    embed.add_field(name="Timer", value=f"{p.get('hours')} hours", inline=True)
+    return embed
+
+def _render_auto_close_cancelled(e: Event, p: dict) -> discord.Embed:
+    embed = discord.Embed(
+        title="🔓 Auto-Close Cancelled",
+        description=f"<@{e.actor_id}> cancelled auto-close for {_thread_link(p)}",
+        color=discord.Color.green()
+    )
+    embed.add_field(name="Thread Owner", value=f"<@{p.get('owner_id')}>", inline=True)
+    embed.add_field(name="Reason", value="Multiple items in listing", inline=True)
+    return embed
+
+def _render_thread_auto_closed(e: Event, p: dict) -> discord.Embed:
+    embed = discord.Embed(
+        title="🤖 Thread Auto-Closed",
+        description=f"Thread {_thread_link(p)} was automatically closed",
+        color=discord.Color.red()
+    )
+    embed.add_field(name="Thread Owner", value=f"<@{p.get('owner_id')}>", inline=True)
+    embed.add_field(name="Reason", value="24-hour timer expired", inline=True)
+    embed.add_field(name="Action", value="Archived & Locked", inline=True)
+    return embed
+
+def _render_thread_force_closed(e: Event, p: dict) -> discord.Embed:
+    embed = discord.Embed(
+        title="🔒 Admin Force Close",
+        description=f"<@{e.actor_id}> force-closed thread {_thread_link(p)}",
+        color=discord.Color.red()
+    )
+    embed.add_field(name="Thread Owner", value=f"<@{p.get('owner_id')}>", inline=True)
+    embed.add_field(name="Action", value="Force closed by admin", inline=True)
+    return embed
+
+def _render_settings_changed(e: Event, p: dict) -> discord.Embed:
+    title, summary = SETTINGS_SECTIONS.get(p.get('section'), ("⚙️ Settings Modified", "updated settings"))
+    embed = discord.Embed(title=title, description=f"<@{e.actor_id}> {summary}", color=discord.Color.blue())
+    # Values are [old, new] pairs, or just the new value
+    for name, value in (p.get('changes') or {}).items():
+        if isinstance(value, list) and len(value) == 2:
+            value = f"{value[0]} → {value[1]}"
+        embed.add_field(name=name, value=str(value), inline=True)
+    return embed
+
+def _render_auto_close_toggled(e: Event, p: dict) -> discord.Embed:
+    enabled = p.get('enabled')
+    embed = discord.Embed(
+        title="🔧 Auto-Close Setting Changed",
+        description=f"<@{e.actor_id}> **{'enabled' if enabled else 'disabled'}** the auto-close feature",
+        color=discord.Color.green() if enabled else discord.Color.red()
+    )
+    embed.add_field(name="Previous Status", value="✅ Enabled" if p.get('previous') else "❌ Disabled", inline=True)
+    embed.add_field(name="New Status", value="✅ Enabled" if enabled else "❌ Disabled", inline=True)
+    return embed
+
+def _render_auto_close_hours_changed(e: Event, p: dict) -> discord.Embed:
+    return discord.Embed(
+        title="⏰ Auto-Close Timer Changed",
+        description=f"<@{e.actor_id}> changed auto-close timer from **{p.get('previous')}h** to **{p.get('hours')}h**",
+        color=discord.Color.blue()
+    )
+
+def _render_settings_opened(e: Event, p: dict) -> discord.Embed:
+    return discord.Embed(
+        title="⚙️ Settings Panel Accessed",
+        description=f"<@{e.actor_id}> opened the settings dashboard",
+        color=discord.Color.blue()
+    )
+
+EVENT_RENDERERS = {
+    'review_submitted': _render_review_submitted,
+    'auto_close_scheduled': _render_auto_close_scheduled,
+    'auto_close_cancelled': _render_auto_close_cancelled,
+    'thread_auto_closed': _render_thread_auto_closed,
+    'thread_force_closed': _render_thread_force_closed,
+    'settings_changed': _render_settings_changed,
+    'auto_close_toggled': _render_auto_close_toggled,
+    'auto_close_hours_changed': _render_auto_close_hours_changed,
+    'settings_opened': _render_settings_opened,
+}
+
+def render_event(event: Event) -> discord.Embed:
+    """The log channel embed for an audit event."""
+    renderer = EVENT_RENDERERS.get(event.type)
+    if renderer:
+        embed = renderer(event, event.payload)
+    else:
+        embed = discord.Embed(title=event.type.replace('_', ' ').title(), color=discord.Color.light_grey())
+        if event.actor_id:
+            embed.description = f"<@{event.actor_id}>"
+    embed.timestamp = datetime.fromtimestamp(event.created_at, tz=timezone.utc)
+    return embed
+
+
+class Outbox:
+    """
+    Durable queue for messages nobody waits on: audit embeds and
+    notifications. `enqueue()` only buffers the message and wakes the
+    dispatcher task, which writes the buffer to the outbox table in one batch
+    (off the event loop) before each pass. It then sends queued messages in
+    priority order, paces each channel, and retries failed sends with
+    exponential backoff. Stored messages survive restarts and are picked up
+    again on the next start.
+    """
+    HIGH = 0      # notifications users are waiting for
+    NORMAL = 1    # audit embeds
+    LOW = 2
+
+    CHANNEL_INTERVAL = 1.0   # seconds between sends to one channel
+    RETRY_BASE = 2.0         # first retry delay; doubles per failed attempt
+    RETRY_MAX = 300.0
+    MAX_ATTEMPTS = 8
+    IDLE_POLL = 30.0
+    BATCH = 50
+
+    def __init__(self):
+        self.bot: Optional[commands.Bot] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+        self._channel_ready: Dict[int, float] = {}   # channel_id -> monotonic time of next allowed send
+        self._pending: List[tuple] = []               # enqueued rows not yet written to storage
+        self.stats = {'queued': 0, 'sent': 0, 'retried': 0, 'dropped': 0}
+
+    def enqueue(self, channel_id: Optional[int], content: Optional[str] = None,
+                embed: Optional[discord.Embed] = None, priority: int = NORMAL):
+        """Queue a message for channel_id."""
+        if not channel_id or not (content or embed):
+            return
+        self._pending.append((channel_id, priority, content or None,
+                              json.dumps(embed.to_dict()) if embed else None, time.time()))
+        self.stats['queued'] += 1
+        self._wake.set()
+
+    def start(self, bot: commands.Bot):
+        self.bot = bot
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop dispatching and write buffered messages; queued messages stay in storage."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._write_pending()
+
+    async def _write_pending(self):
+        """Move buffered messages into the outbox table."""
+        if not self._pending:
+            return
+        # Take the rows first: if the dispatcher is cancelled mid-write the
+        # thread still finishes the insert, and the rows must not be written twice
+        rows, self._pending = self._pending, []
+        try:
+            await asyncio.to_thread(get_storage().add_outbox_messages, rows)
+        except Exception:
+            # Keep them buffered; the next pass tries again
+            self._pending[:0] = rows
+            log.exception("Failed to store %d outbox messages", len(rows))
+
+    async def _run(self):
+        await self.bot.wait_until_ready()
+        while True:
+            self._wake.clear()
+            try:
+                delay = await self._dispatch()
+            except Exception:
+                log.exception("Outbox dispatch failed")
+                delay = self.IDLE_POLL
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _dispatch(self) -> float:
+        """Send what is due; returns how long to wait before the next pass."""
+        await self._write_pending()
+        storage = get_storage()
+        now = time.time()
+        due = await asyncio.to_thread(storage.get_due_outbox_messages, now, self.BATCH)
+        if not due:
+            _, next_attempt = await asyncio.to_thread(storage.get_outbox_depth)
+            if next_attempt is None:
+                return self.IDLE_POLL
+            return min(self.IDLE_POLL, max(0.1, next_attempt - now))
+
+        done, wait = [], None
+        for message in due:
+            # One send per channel per pass; a paced channel doesn't hold up the others
+            ready_in = self._channel_ready.get(message.channel_id, 0.0) - time.monotonic()
+            if ready_in > 0:
+                wait = ready_in if wait is None else min(wait, ready_in)
+                continue
+            self._channel_ready[message.channel_id] = time.monotonic() + self.CHANNEL_INTERVAL
+            if await self._send(message):
+                done.append(message.id)
+        if done:
+            await asyncio.to_thread(storage.delete_outbox_messages, done)
+        return wait if wait is not None else 0.0
+
+    async def _send(self, message) -> bool:
+        """Send one message. True when it should leave the outbox (sent or dropped)."""
+        try:
+            channel = self.bot.get_channel(message.channel_id) or await self.bot.fetch_channel(message.channel_id)
+            embed = discord.Embed.from_dict(message.embed) if message.embed else None
+            await channel.send(content=message.content, embed=embed)
+            self.stats['sent'] += 1
+            return True
+        except (discord.NotFound, discord.Forbidden) as e:
+            # The channel is gone or closed to us; retrying won't help
+            log.warning("Dropping outbox message %s for channel %s: %s", message.id, message.channel_id, e)
+            self.stats['dropped'] += 1
+            return True
+        except Exception as e:
+            attempts = message.attempts + 1
+            if attempts >= self.MAX_ATTEMPTS:
+                log.error("Giving up on outbox message %s after %d attempts: %s", message.id, attempts, e)
+                self.stats['dropped'] += 1
+                return True
+            delay = min(self.RETRY_BASE * 2 ** message.attempts, self.RETRY_MAX)
+            if isinstance(e, discord.HTTPException) and e.status == 429:
+                # Rate limited even after discord.py's own retries: back the whole channel off
+                self._channel_ready[message.channel_id] = time.monotonic() + delay
+            await asyncio.to_thread(get_storage().retry_outbox_message, message.id, time.time() + delay)
+            self.stats['retried'] += 1
+            log.warning("Send to channel %s failed (%s); retrying in %.0fs", message.channel_id, e, delay)
+            return False
+
+    def snapshot(self) -> dict:
+        depth, next_attempt = get_storage().get_outbox_depth()
+        return {
+            **self.stats,
+            'depth': depth + len(self._pending),
+            'next_attempt_in': round(max(0.0, next_attempt - time.time()), 1) if next_attempt else None,
+        }
+
+
+outbox = Outbox()
+metrics.cache_entries.track(lambda: get_storage().get_outbox_depth()[0] + len(outbox._pending), cache='outbox')
+
+
 class LoggingSystem(commands.Cog):
+    # Updates to the same log message within this many seconds share one edit
+    EDIT_WINDOW = 1.5
+    # Events shown per embed field. When a field is full its events move to a
+    # continuation message; 10 clipped lines stay under the 1024-char limit.
+    EVENTS_SHOWN = 10
+    EVENT_MAX_CHARS = 95
+
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self._log_messages: Dict[int, discord.Message] = {}
-        self._log_events: Dict[int, Dict[str, List[str]]] = {}
-        print("📋 Logging system loaded")
+        # Log messages and their event lists are persisted (log_messages and
+        # log_events tables) and loaded here the first time a key is used
+        self._log_messages: Dict[str, LogHandle] = {}
+        self._log_events: Dict[str, Dict[str, Deque[str]]] = {}
+        self._earlier_events: Dict[str, Dict[str, int]] = {}   # events already moved to continuations
+        self._continuations: Dict[str, List[Tuple[str, List[str]]]] = {}
+        self._release_after_flush: set = set()
+        # (log_key, field, event) lines not yet written; each edit flush writes them in one batch
+        self._unwritten_log_events: List[Tuple[str, str, str]] = []
+        self._log_write_lock = asyncio.Lock()
+        # The embed each log message currently shows. Updates edit from this
+        # copy instead of fetching the message back first.
+        self._log_embeds: Dict[str, discord.Embed] = {}
+        self._pending_edits: Dict[str, asyncio.Task] = {}
+        self._edits_in_flight: set = set()   # edit tasks past their window, sending now
+        self.edit_stats = {'updates': 0, 'edits': 0}
+        self._log_channel_id: Optional[int] = None
+        self._config_mtime: Optional[float] = None
+        log.info("Logging system loaded")
+
+    async def cog_load(self):
+        event_log.start()
+        outbox.start(self.bot)
+        metrics.cache_entries.track(lambda: len(self._log_embeds), cache='log_embeds')
+        metrics.cache_entries.track(lambda: len(self._pending_edits), cache='log_pending_edits')
+
+    async def cog_unload(self):
+        """Send any buffered log edits and write queued events before the cog goes away"""
+        await self.flush_log_edits()
+        await event_log.stop()
+        await outbox.stop()
+
+    @commands.Cog.listener()
+    async def on_thread_update(self, before: discord.Thread, after: discord.Thread):
+        # Closed threads rarely log again; drop them from memory (storage keeps them)
+        if after.archived and not before.archived and thread_log_key(after.id) in self._log_messages:
+            self.release(thread_log_key(after.id))
+
+    def release(self, key: str):
+        """Forget a log's in-memory state once its buffered edit has been sent."""
+        if key in self._pending_edits:
+            self._release_after_flush.add(key)
+            return
+        self._release_after_flush.discard(key)
+        for cache in (self._log_messages, self._log_embeds, self._log_events,
+                      self._earlier_events, self._continuations):
+            cache.pop(key, None)
+
+    def _new_events(self) -> Deque[str]:
+        return deque(maxlen=self.EVENTS_SHOWN)
+
+    def _clip(self, event: str) -> str:
+        return event if len(event) <= self.EVENT_MAX_CHARS else event[:self.EVENT_MAX_CHARS - 1] + "…"
+
+    def _render_events(self, key: str, field: str) -> str:
+        lines = list(self._log_events[key][field])
+        earlier = self._earlier_events.get(key, {}).get(field, 0)
+        if earlier:
+            lines.insert(0, f"*… {earlier} earlier event{'s' if earlier != 1 else ''} in continuation messages*")
+        return "\n".join(lines)
+
+    def _configured_log_channel_id(self) -> Optional[int]:
+        # Re-read config.yaml only when it has changed (e.g. after /log)
+        try:
+            mtime = os.stat(CONFIG_PATH).st_mtime
+        except OSError:
+            mtime = None
+        if mtime != self._config_mtime:
+            self._log_channel_id = (load_config() or {}).get("log_channel") if mtime is not None else None
+            self._config_mtime = mtime
+        return self._log_channel_id
 
     async def get_log_channel(self) -> Optional[discord.TextChannel]:
-        config = load_config()
-        log_ch_id = config.get("log_channel")
+        log_ch_id = self._configured_log_channel_id()
         if not log_ch_id:
             return None
         log_ch = self.bot.get_channel(log_ch_id)
         if not log_ch:
-            print(f"[WARN] log_channel {log_ch_id} not found")
+            log.warning("log_channel %s not found", log_ch_id)
             return None
         return log_ch
 
+    @staticmethod
+    def _load_log(key: str) -> Tuple[Optional[Tuple[int, int]], List[Tuple[str, str]]]:
+        storage = get_storage()
+        row = storage.get_log_message(key)
+        return row, storage.get_log_events(key) if row else []
+
+    async def _handle(self, key: str) -> Optional[LogHandle]:
+        """The log message for key, loaded from storage on first use."""
+        msg = self._log_messages.get(key)
+        if msg is None:
+            row, stored_events = await asyncio.to_thread(self._load_log, key)
+            if key in self._log_messages:
+                # Another task loaded or created it while we waited
+                return self._log_messages[key]
+            if row is None:
+                return None
+            channel_id, message_id = row
+            channel = self.bot.get_channel(channel_id) or self.bot.get_partial_messageable(channel_id)
+            msg = self._log_messages[key] = channel.get_partial_message(message_id)
+            history: Dict[str, List[str]] = {}
+            for field, event in stored_events:
+                history.setdefault(field, []).append(event)
+            # Fields roll over every EVENTS_SHOWN events, so the embed shows
+            # the events since the last full batch
+            events, earlier = {}, {}
+            for field, lines in history.items():
+                shown = len(lines) % self.EVENTS_SHOWN or self.EVENTS_SHOWN
+                events[field] = deque((self._clip(e) for e in lines[-shown:]), maxlen=self.EVENTS_SHOWN)
+                earlier[field] = len(lines) - shown
+            self._log_events[key] = events
+            self._earlier_events[key] = earlier
+        return msg
+
+    async def _remember(self, key: str, msg: discord.Message, embed: discord.Embed):
+        self._log_messages[key] = msg
+        self._log_embeds[key] = embed
+        await asyncio.to_thread(get_storage().set_log_message, key, msg.channel.id, msg.id)
+
+    async def _write_log_events(self):
+        """Write the queued event lines in one batch."""
+        async with self._log_write_lock:
+            if not self._unwritten_log_events:
+                return
+            rows, self._unwritten_log_events = self._unwritten_log_events, []
+            try:
+                await asyncio.to_thread(get_storage().add_log_events, rows)
+            except Exception:
+                # Keep them queued; the next flush tries again
+                self._unwritten_log_events[:0] = rows
+                log.exception("Failed to store %d log events", len(rows))
+
     async def create_thread_log(
         self,
         thread: discord.Thread,
@@ -40,11 +467,10 @@ class LoggingSystem(commands.Cog):
         if not log_ch:
             return None
 
-        if thread.id in self._log_messages:
-            try:
-                return await log_ch.fetch_message(self._log_messages[thread.id].id)
-            except (discord.NotFound, discord.Forbidden):
-                pass
+        key = thread_log_key(thread.id)
+        existing = await self._handle(key)
+        if existing:
+            return existing
 
         embed = discord.Embed(
             title=title or f"📋 [Thread: {thread.name}]({thread.jump_url})",
@@ -61,34 +487,31 @@ class LoggingSystem(commands.Cog):
             embed.add_field(name="Events", value="*No events yet*", inline=False)
 
         msg = await log_ch.send(embed=embed)
-        self._log_messages[thread.id] = msg
-        self._log_events[thread.id] = {field: [] for field in (fields.keys() if fields else ["Events"])}
+        self._log_events[key] = {field: self._new_events() for field in (fields.keys() if fields else ["Events"])}
+        await self._remember(key, msg, embed)
         return msg
 
-    async def update_thread_log(
+    async def _current_embed(self, key: str) -> Optional[discord.Embed]:
+        """The embed a log message shows, read back from Discord only if we have no copy."""
+        embed = self._log_embeds.get(key)
+        if embed is None:
+            msg = self._log_messages[key]
+            try:
+                msg = await msg.channel.fetch_message(msg.id)
+            except (discord.NotFound, discord.Forbidden):
+                return None
+            self._log_messages[key] = msg
+            embed = self._log_embeds[key] = msg.embeds[0]
+        return embed
+
+    def _apply_updates(
         self,
-        thread: discord.Thread,
-        field_updates: Optional[Dict[str, str]] = None,
-        event_additions: Optional[Dict[str, str]] = None,
-        embed_updates: Optional[Dict[str, any]] = None
+        key: str,
+        embed: discord.Embed,
+        field_updates: Optional[Dict[str, str]],
+        event_additions: Optional[Dict[str, str]],
+        embed_updates: Optional[Dict[str, any]]
     ):
-        if thread.id not in self._log_messages:
-            await self.create_thread_log(thread)
-        
-        msg = self._log_messages.get(thread.id)
-        if not msg:
-            return
-
-        log_ch = await self.get_log_channel()
-        if not log_ch:
-            return
-
-        try:
-            msg = await log_ch.fetch_message(msg.id)
-        except (discord.NotFound, discord.Forbidden):
-            return
-
-        embed = msg.embeds[0]
         embed.timestamp = discord.utils.utcnow()
 
         if embed_updates:
@@ -109,18 +532,122 @@ class LoggingSystem(commands.Cog):
                     embed.add_field(name=field_name, value=field_value, inline=False)
 
         if event_additions:
-            events_dict = self._log_events.setdefault(thread.id, {})
+            events_dict = self._log_events.setdefault(key, {})
             for field_name, event in event_additions.items():
-                events_list = events_dict.setdefault(field_name, [])
+                events_list = events_dict.get(field_name)
+                if events_list is None:
+                    events_list = events_dict[field_name] = self._new_events()
                 timestamp_event = f"{event} at <t:{int(time.time())}:T>"
-                events_list.append(timestamp_event)
+                self._unwritten_log_events.append((key, field_name, timestamp_event))
+
+                if len(events_list) == self.EVENTS_SHOWN:
+                    # Full: move this batch to a continuation message
+                    self._continuations.setdefault(key, []).append((field_name, list(events_list)))
+                    earlier = self._earlier_events.setdefault(key, {})
+                    earlier[field_name] = earlier.get(field_name, 0) + len(events_list)
+                    events_list.clear()
+                events_list.append(self._clip(timestamp_event))
                 
                 for i, field in enumerate(embed.fields):
                     if field.name == field_name:
-                        embed.set_field_at(i, name=field_name, value="\n".join(events_list), inline=False)
+                        embed.set_field_at(i, name=field_name, value=self._render_events(key, field_name), inline=False)
                         break
 
-        await msg.edit(embed=embed)
+    async def _edit_log(self, key: str, embed: discord.Embed):
+        """
+        Edit a log message in place from our copy of its embed (one REST call).
+        If it was deleted from the log channel, post the embed again.
+        """
+        msg = self._log_messages[key]
+        try:
+            await msg.channel.get_partial_message(msg.id).edit(embed=embed)
+        except discord.NotFound:
+            log_ch = await self.get_log_channel()
+            if not log_ch:
+                return
+            await self._remember(key, await log_ch.send(embed=embed), embed)
+        except discord.Forbidden:
+            pass
+
+    def _schedule_edit(self, key: str):
+        self.edit_stats['updates'] += 1
+        if key not in self._pending_edits:
+            self._pending_edits[key] = asyncio.create_task(self._edit_later(key))
+
+    async def _edit_later(self, key: str):
+        task = asyncio.current_task()
+        try:
+            await asyncio.sleep(self.EDIT_WINDOW)
+        finally:
+            # Updates from here on schedule a new edit
+            if self._pending_edits.get(key) is task:
+                del self._pending_edits[key]
+        self._edits_in_flight.add(task)
+        try:
+            await self._flush_edit(key)
+        finally:
+            self._edits_in_flight.discard(task)
+
+    async def _send_continuations(self, key: str):
+        msg = self._log_messages[key]
+        log_ch = await self.get_log_channel()
+        for field_name, events in self._continuations.pop(key, []):
+            if not log_ch:
+                return
+            embed = discord.Embed(
+                description=f"Earlier events for [this log]({msg.jump_url})",
+                color=discord.Color.dark_grey()
+            )
+            embed.add_field(name=f"{field_name} (continued)", value="\n".join(events), inline=False)
+            await log_ch.send(embed=embed)
+
+    async def _flush_edit(self, key: str):
+        await self._write_log_events()
+        embed = self._log_embeds.get(key)
+        if embed is None or key not in self._log_messages:
+            return
+        self.edit_stats['edits'] += 1
+        try:
+            await self._send_continuations(key)
+            await self._edit_log(key, embed)
+        except Exception:
+            log.exception("Log edit failed", extra={'log_key': key})
+        if key in self._release_after_flush:
+            self.release(key)
+
+    async def flush_log_edits(self):
+        """Send every buffered log edit now."""
+        pending, self._pending_edits = self._pending_edits, {}
+        # These are still waiting out their window; they send nothing if cancelled
+        for task in pending.values():
+            task.cancel()
+        # Let edits that are already being sent finish instead of cutting them off
+        if self._edits_in_flight:
+            await asyncio.gather(*self._edits_in_flight, return_exceptions=True)
+        for key in pending:
+            await self._flush_edit(key)
+        await self._write_log_events()
+
+    async def update_thread_log(
+        self,
+        thread: discord.Thread,
+        field_updates: Optional[Dict[str, str]] = None,
+        event_additions: Optional[Dict[str, str]] = None,
+        embed_updates: Optional[Dict[str, any]] = None
+    ):
+        key = thread_log_key(thread.id)
+        if not await self._handle(key):
+            await self.create_thread_log(thread)
+        
+        if key not in self._log_messages:
+            return
+
+        embed = await self._current_embed(key)
+        if embed is None:
+            return
+
+        self._apply_updates(key, embed, field_updates, event_additions, embed_updates)
+        self._schedule_edit(key)
 
     async def log_simple_message(
         self,
@@ -128,18 +655,11 @@ class LoggingSystem(commands.Cog):
         embed: Optional[discord.Embed] = None,
         channel_id: Optional[int] = None
     ):
-        if channel_id:
-            log_ch = self.bot.get_channel(channel_id)
-        else:
-            log_ch = await self.get_log_channel()
-        
-        if not log_ch:
-            return
+        outbox.enqueue(channel_id or self._configured_log_channel_id(), content=content, embed=embed)
 
-        if embed:
-            await log_ch.send(content=content, embed=embed)
-        else:
-            await log_ch.send(content)
+    def post_event(self, event: Event, priority: int = Outbox.NORMAL):
+        """Queue an audit event's embed for the log channel."""
+        outbox.enqueue(self._configured_log_channel_id(), embed=render_event(event), priority=priority)
 
     async def create_custom_log(
         self,
@@ -170,8 +690,9 @@ class LoggingSystem(commands.Cog):
                 embed.add_field(name=name, value=value, inline=False)
 
         msg = await log_ch.send(embed=embed)
-        self._log_messages[hash(identifier)] = msg
-        self._log_events[hash(identifier)] = {field: [] for field in (fields.keys() if fields else [])}
+        key = custom_log_key(identifier)
+        self._log_events[key] = {field: self._new_events() for field in (fields.keys() if fields else [])}
+        await self._remember(key, msg, embed)
         return msg
 
     async def update_custom_log(
@@ -181,59 +702,22 @@ class LoggingSystem(commands.Cog):
         event_additions: Optional[Dict[str, str]] = None,
         embed_updates: Optional[Dict[str, any]] = None
     ):
-        id_hash = hash(identifier)
-        if id_hash not in self._log_messages:
+        key = custom_log_key(identifier)
+        if not await self._handle(key):
             return
 
-        msg = self._log_messages[id_hash]
-        log_ch = await self.get_log_channel()
-        if not log_ch:
-            return
-
-        try:
-            msg = await log_ch.fetch_message(msg.id)
-        except (discord.NotFound, discord.Forbidden):
+        embed = await self._current_embed(key)
+        if embed is None:
             return
 
-        embed = msg.embeds[0]
-        embed.timestamp = discord.utils.utcnow()
-
-        if embed_updates:
-            if "title" in embed_updates:
-                embed.title = embed_updates["title"]
-            if "description" in embed_updates:
-                embed.description = embed_updates["description"]
-            if "color" in embed_updates:
-                embed.color = embed_updates["color"]
-
-        if field_updates:
-            for field_name, field_value in field_updates.items():
-                for i, field in enumerate(embed.fields):
-                    if field.name == field_name:
-                        embed.set_field_at(i, name=field_name, value=field_value, inline=False)
-                        break
-                else:
-                    embed.add_field(name=field_name, value=field_value, inline=False)
-
-        if event_additions:
-            events_dict = self._log_events.setdefault(id_hash, {})
-            for field_name, event in event_additions.items():
-                events_list = events_dict.setdefault(field_name, [])
-                timestamp_event = f"{event} at <t:{int(time.time())}:T>"
-                events_list.append(timestamp_event)
-                
-                for i, field in enumerate(embed.fields):
-                    if field.name == field_name:
-                        embed.set_field_at(i, name=field_name, value="\n".join(events_list), inline=False)
-                        break
-
-        await msg.edit(embed=embed)
+        self._apply_updates(key, embed, field_updates, event_additions, embed_updates)
+        self._schedule_edit(key)
 
-    def get_log_message(self, thread_id: int) -> Optional[discord.Message]:
-        return self._log_messages.get(thread_id)
+    async def get_log_message(self, thread_id: int) -> Optional[LogHandle]:
+        return await self._handle(thread_log_key(thread_id))
 
-    def get_custom_log_message(self, identifier: str) -> Optional[discord.Message]:
-        return self._log_messages.get(hash(identifier))
+    async def get_custom_log_message(self, identifier: str) -> Optional[LogHandle]:
+        return await self._handle(custom_log_key(identifier))
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(LoggingSystem(bot))
\ No newline at end of file
@@ -0,0 +1,99 @@
+import asyncio
+import logging
+from datetime import date
+from typing import Optional
+
+from discord.ext import commands, tasks
+
+from utils import archive, maintenance
+
+log = logging.getLogger(__name__)
+
+
+class Maintenance(commands.Cog):
+    """Schedules database backups, WAL checkpoints and quiet-hours archival/vacuuming (see utils/maintenance.py)"""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self._last_vacuum: Optional[date] = None
+        self._lock = asyncio.Lock()
+        log.info("Maintenance scheduler loaded")
+
+    async def cog_load(self):
+        """Start the maintenance jobs"""
+        settings = maintenance.get_settings()
+        if not settings['enabled']:
+            log.info("Maintenance disabled in config")
+            return
+        self.backup_task.change_interval(hours=settings['backup_interval_hours'])
+        self.checkpoint_task.change_interval(minutes=settings['checkpoint_interval_minutes'])
+        self.backup_task.start()
+        self.checkpoint_task.start()
+        self.quiet_hours_task.start()
+
+    async def cog_unload(self):
+        """Stop the maintenance jobs"""
+        self.backup_task.cancel()
+        self.checkpoint_task.cancel()
+        self.quiet_hours_task.cancel()
+
+    async def run_job(self, name: str, func, *args):
+        """Run a blocking maintenance job off the event loop, one job at a time"""
+        async with self._lock:
+            try:
+                result = await asyncio.to_thread(func, *args)
+            except Exception as e:
+                maintenance.record(name, error=str(e))
+                return None
+            if result is not None:
+                maintenance.record(name, result)
+            return result
+
+    @tasks.loop(hours=24)
+    async def backup_task(self):
+        """Take an online backup and rotate old ones"""
+        await self.run_job('backup', maintenance.backup_database)
+
+    @tasks.loop(minutes=5)
+    async def checkpoint_task(self):
+        """Checkpoint the WAL once it grows past the configured size"""
+        await self.run_job('wal_checkpoint', maintenance.checkpoint_wal)
+
+    @tasks.loop(minutes=15)
+    async def quiet_hours_task(self):
+        """Archive cold rows, then vacuum and optimize, once a day during quiet hours"""
+        today = date.today()
+        if self._last_vacuum == today or not maintenance.in_quiet_hours():
+            return
+        if archive.get_settings()['enabled']:
+            await self.run_job('archive', archive.archive_old_data)
+        if await self.run_job('vacuum', maintenance.vacuum_and_optimize) is not None:
+            self._last_vacuum = today
+
+    @backup_task.before_loop
+    @checkpoint_task.before_loop
+    @quiet_hours_task.before_loop
+    async def before_maintenance(self):
+        await self.bot.wait_until_ready()
+
+    @commands.command(name="maintenance")
+    @commands.has_permissions(administrator=True)
+    async def maintenance_status(self, ctx: commands.Context):
+        """Show the latest result of each maintenance job"""
+        stats = maintenance.snapshot_stats()
+        if not stats:
+            await ctx.send("🧹 No maintenance jobs have run yet.")
+            return
+        lines = []
+        for job, entry in sorted(stats.items()):
+            last = entry['last_result'] or {}
+            lines.append(
+                f"**{job}**: {entry['runs']} runs, {entry['failures']} failures, "
+                f"last {last.get('duration_ms', 0):.0f}ms, "
+                f"{entry['total_bytes_reclaimed'] / 1024 / 1024:.1f} MB reclaimed total"
+            )
+        await ctx.send("🧹 Maintenance status\n" + "\n".join(lines))
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(Maintenance(bot))
@@ -4,39 +4,492 @@ from discord import app_commands
 import yaml
 import random
 import asyncio
-import sqlite3
+import heapq
+import logging
 import time
 import re
 from datetime import datetime, timedelta
-from utils import db
+from cogs.logging import Outbox, outbox
+from utils import metrics
+from utils.access import is_admin_id
+from utils.events import event_log
+from utils.storage import get_storage
+from utils.instrumentation import LatencyHistogram, begin_scope
+from utils.log import bind
+from utils.profiling import profiler
+from utils.records import Thread, TOSGate
 
 CONFIG_PATH = 'data/config.yaml'
 
-# Tracks threads waiting on TOS acceptance
-# new — maps thread.id → timestamp when TOS prompt was sent
-pending_tos_timestamps: dict[int, float] = {}
+log = logging.getLogger(__name__)
+
+class EventRouter:
+    """
+    Drops gateway events the Rep cog doesn't care about before any config or
+    DB access. Both sets are rebuilt as frozensets when they change, which is
+    rare next to the number of events checked against them.
+    """
+
+    def __init__(self):
+        self.forum_ids: frozenset[int] = frozenset()
+        self.active_thread_ids: frozenset[int] = frozenset()
+        self.counters: dict[str, dict[str, int]] = {}
+
+    def load_forums(self, config: dict):
+        self.forum_ids = frozenset(int(f) for f in config.get("forums", []) if str(f).isdigit())
+
+    def load_active_threads(self, thread_ids):
+        self.active_thread_ids = frozenset(thread_ids)
+
+    def track_thread(self, thread_id: int):
+        if thread_id not in self.active_thread_ids:
+            self.active_thread_ids = self.active_thread_ids | {thread_id}
+
+    def untrack_thread(self, thread_id: int):
+        if thread_id in self.active_thread_ids:
+            self.active_thread_ids = self.active_thread_ids - {thread_id}
+
+    def route(self, event: str, channel_id, tracked: frozenset[int]) -> bool:
+        """Count the event as routed or dropped and say whether to handle it."""
+        routed = channel_id in tracked
+        counts = self.counters.get(event)
+        if counts is None:
+            counts = self.counters[event] = {'routed': 0, 'dropped': 0}
+        counts['routed' if routed else 'dropped'] += 1
+        return routed
+
+    def snapshot(self) -> dict:
+        return {
+            'tracked_forums': len(self.forum_ids),
+            'active_threads': len(self.active_thread_ids),
+            'events': {event: dict(counts) for event, counts in self.counters.items()},
+        }
+
+
+# Shared by the cog's listeners and the views that close threads
+event_router = EventRouter()
+
+
+class TOSDeleteBuffer:
+    """
+    Collects messages posted while a thread waits on TOS acceptance and
+    deletes them per thread in one bulk delete call after a short window.
+    Messages too old for bulk delete are removed one at a time.
+    """
+    BULK_DELETE_LIMIT = 100
+    BULK_DELETE_MAX_AGE = timedelta(days=14) - timedelta(minutes=5)
+
+    def __init__(self, window: float = 1.0):
+        self.window = window
+        self._pending: dict[int, list[int]] = {}
+        self._flushes: dict[int, asyncio.Task] = {}
+        self.stats = {'messages': 0, 'bulk_calls': 0, 'single_calls': 0}
+
+    def add(self, message: discord.Message):
+        channel = message.channel
+        self._pending.setdefault(channel.id, []).append(message.id)
+        self.stats['messages'] += 1
+        if channel.id not in self._flushes:
+            self._flushes[channel.id] = asyncio.create_task(self._flush_later(channel))
+
+    async def _flush_later(self, channel: discord.Thread):
+        try:
+            await asyncio.sleep(self.window)
+        finally:
+            self._flushes.pop(channel.id, None)
+        await self.flush(channel, self._pending.pop(channel.id, []))
+
+    async def flush(self, channel: discord.Thread, message_ids: list[int]):
+        cutoff = discord.utils.utcnow() - self.BULK_DELETE_MAX_AGE
+        recent = [m for m in message_ids if discord.utils.snowflake_time(m) > cutoff]
+        single = [m for m in message_ids if discord.utils.snowflake_time(m) <= cutoff]
+
+        for i in range(0, len(recent), self.BULK_DELETE_LIMIT):
+            chunk = recent[i:i + self.BULK_DELETE_LIMIT]
+            if len(chunk) == 1:
+                single.extend(chunk)
+                continue
+            try:
+                await channel.delete_messages([discord.Object(id=m) for m in chunk])
+                self.stats['bulk_calls'] += 1
+            except discord.Forbidden:
+                return
+            except discord.HTTPException as e:
+                # One bad ID fails the whole bulk call; retry the chunk singly
+                log.warning("Bulk delete failed in thread %s, deleting individually: %s", channel.id, e)
+                single.extend(chunk)
+
+        for message_id in single:
+            try:
+                await channel.get_partial_message(message_id).delete()
+                self.stats['single_calls'] += 1
+            except discord.NotFound:
+                pass
+            except discord.Forbidden:
+                return
+
+
+tos_delete_buffer = TOSDeleteBuffer()
+
+
+class TOSGateEngine:
+    """
+    Threads waiting on TOS acceptance. Gates are stored in the tos_gates
+    table and timed out by one task that sleeps until the earliest deadline
+    in a heap, so pending threads cost a heap entry each rather than a
+    timeout task per view. On startup every stored gate is loaded in one
+    read: overdue ones are expired and the rest resume their countdown.
+    """
+
+    def __init__(self):
+        self.gates: dict[int, TOSGate] = {}
+        self._deadlines: list[tuple[float, int]] = []
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self.bot: commands.Bot | None = None
+
+    def start(self, bot: commands.Bot):
+        self.bot = bot
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def open(self, thread: discord.Thread, message_id: int, expires_at: float) -> TOSGate:
+        """Gate a thread until its owner answers the prompt or expires_at passes."""
+        gate = TOSGate(thread.id, thread.parent_id, thread.owner_id, message_id, time.time(), expires_at)
+        get_storage().add_tos_gate(**gate.to_dict())
+        self._schedule(gate)
+        return gate
+
+    def _schedule(self, gate: TOSGate):
+        self.gates[gate.thread_id] = gate
+        if not self._deadlines or gate.expires_at < self._deadlines[0][0]:
+            self._wakeup.set()
+        heapq.heappush(self._deadlines, (gate.expires_at, gate.thread_id))
+
+    def is_gated(self, message: discord.Message) -> bool:
+        gate = self.gates.get(message.channel.id)
+        return gate is not None and message.created_at.timestamp() > gate.prompted_at
+
+    def resolve(self, thread_id: int) -> TOSGate | None:
+        """Claim a pending gate. Returns None if it was already answered or expired."""
+        gate = self.gates.pop(thread_id, None)
+        if gate:
+            get_storage().delete_tos_gates([thread_id])
+        return gate
+
+    async def reconcile(self):
+        gates = get_storage().get_tos_gates()
+        now = time.time()
+        expired = [g for g in gates if g.expires_at <= now]
+        if expired:
+            get_storage().delete_tos_gates([g.thread_id for g in expired])
+        for gate in gates:
+            if gate.expires_at > now:
+                self._schedule(gate)
+        log.info("Resumed %d pending TOS gate(s), expiring %d", len(gates) - len(expired), len(expired))
+        for gate in expired:
+            await self.expire(gate)
+
+    async def _run(self):
+        await self.bot.wait_until_ready()
+        try:
+            await self.reconcile()
+        except Exception:
+            log.exception("TOS gate reconcile failed")
+
+        while True:
+            self._wakeup.clear()
+            # Skip heap entries for gates that were answered in the meantime
+            while self._deadlines:
+                expires_at, thread_id = self._deadlines[0]
+                gate = self.gates.get(thread_id)
+                if gate is not None and gate.expires_at == expires_at:
+                    break
+                heapq.heappop(self._deadlines)
+
+            if not self._deadlines:
+                await self._wakeup.wait()
+                continue
+            delay = self._deadlines[0][0] - time.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            _, thread_id = heapq.heappop(self._deadlines)
+            gate = self.resolve(thread_id)
+            if gate:
+                await self.expire(gate)
+
+    async def expire(self, gate: TOSGate):
+        """Close a thread whose owner never answered the TOS prompt."""
+        log.info("TOS prompt timed out; auto-closing thread", extra={'thread_id': gate.thread_id})
+        try:
+            thread = self.bot.get_channel(gate.thread_id) or await self.bot.fetch_channel(gate.thread_id)
+        except (discord.NotFound, discord.Forbidden):
+            # Deleted while we were waiting, or no longer visible to the bot
+            get_storage().set_thread_state(gate.thread_id, Thread.CLOSED)
+            event_router.untrack_thread(gate.thread_id)
+            return
+        except Exception:
+            log.exception("Auto-close on timeout failed", extra={'thread_id': gate.thread_id})
+            return
+
+        event_log.record("tos_timed_out", thread.id, gate.op_id)
+        metrics.tos_outcomes.inc(outcome='timed_out')
+        try:
+            # ─── Update the Thread Log to show ❌ Timed Out ───
+            logging_cog = self.bot.get_cog("LoggingSystem")
+            if logging_cog:
+                await logging_cog.update_thread_log(
+                    thread,
+                    field_updates={
+                        "TOS Status": f"⌛ Timed out at <t:{int(time.time())}:T>",
+                        "Thread Status": f"❌ Closed (timeout)"
+                    }
+                )
+
+            # Take the buttons off the expired prompt
+            if gate.message_id:
+                try:
+                    await thread.get_partial_message(gate.message_id).edit(view=None)
+                except discord.NotFound:
+                    pass
+
+            # Notify in-thread
+            await thread.send(
+                "⏱️ No response to TOS in time. This post has been auto-closed."
+            )
+
+            # Archive & lock
+            await thread.edit(archived=True, locked=True)
+
+            # Update thread status in database
+            get_storage().upsert_thread(
+                thread_id=thread.id,
+                channel_id=thread.parent_id,
+                guild_id=thread.guild.id,
+                name=thread.name,
+                owner_id=thread.owner_id,
+                jump_url=thread.jump_url,
+                archived=True,
+                locked=True
+            )
+            event_router.untrack_thread(thread.id)
+            metrics.thread_closes.inc(path='tos_timeout')
+
+        except Exception:
+            log.exception("Auto-close on timeout failed", extra={'thread_id': gate.thread_id})
+
+
+# Shared by the cog, the persistent RepTOSView and on_message
+tos_gates = TOSGateEngine()
+
+
+class ThreadOnboarding:
+    """
+    Bounded queue between on_thread_create and the calls that set up a new
+    post (save, join, TOS prompt, log embed). A fixed pool of workers takes
+    posts in arrival order, so a flood of listings queues up instead of
+    racing for rate limits. Threads waiting in the queue are saved with one
+    DB write by whichever worker runs next, and calls are spaced per route.
+    Log embeds are created by a separate task so the log channel's slower
+    pace never delays a TOS prompt. Stopping lets the workers finish the
+    queue (up to `drain_timeout_seconds`) and saves every queued thread.
+    """
+    DEFAULT_SETTINGS = {
+        'workers': 4,
+        'queue_size': 500,
+        'ready_timeout_seconds': 5.0,   # Longest wait for the starter message
+        'drain_timeout_seconds': 10.0,  # Longest wait on stop for queued posts to get their prompt
+        'route_intervals': {            # Minimum seconds between calls on each route
+            'join': 0.05,
+            'tos_prompt': 0.05,
+            'thread_log': 1.0,          # All logs share one channel's rate limit
+        },
+    }
+
+    def __init__(self):
+        self.settings = dict(self.DEFAULT_SETTINGS)
+        self.bot: commands.Bot | None = None
+        self.queue: asyncio.Queue | None = None
+        self._logs: asyncio.Queue | None = None
+        self._unsaved: list[tuple] = []
+        self._next_slot: dict[str, float] = {}
+        self._tasks: list[asyncio.Task] = []
+        self.time_to_prompt = LatencyHistogram()
+        self.stats = {'queued': 0, 'onboarded': 0, 'failed': 0, 'max_queue_depth': 0}
+
+    def start(self, bot: commands.Bot, config: dict):
+        self._cancel_tasks()
+        overrides = config.get("onboarding") or {}
+        self.settings = {
+            **self.DEFAULT_SETTINGS, **overrides,
+            'route_intervals': {**self.DEFAULT_SETTINGS['route_intervals'], **(overrides.get('route_intervals') or {})},
+        }
+        self.bot = bot
+        self.queue = asyncio.Queue(maxsize=self.settings['queue_size'])
+        self._logs = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.settings['workers'])]
+        self._tasks.append(asyncio.create_task(self._log_worker()))
+
+    async def stop(self):
+        """Onboard what is queued (within the drain timeout), then stop the workers and save every thread."""
+        if self.queue is not None and self._tasks:
+            try:
+                await asyncio.wait_for(self.queue.join(), timeout=self.settings['drain_timeout_seconds'])
+            except asyncio.TimeoutError:
+                log.warning("Onboarding stopped before its queue drained (%d post(s) still waiting); "
+                            "unfinished posts are saved but may have no TOS prompt", self.queue.qsize())
+        tasks = self._cancel_tasks()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        try:
+            await asyncio.to_thread(self._save_pending)
+        except Exception:
+            log.exception("Saving queued threads failed", extra={'threads': len(self._unsaved)})
+
+    def _cancel_tasks(self) -> list[asyncio.Task]:
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        return tasks
+
+    async def submit(self, thread: discord.Thread):
+        """Queue a new post; waits while the queue is full."""
+        self._unsaved.append((thread.id, thread.parent_id, thread.guild.id, thread.name, thread.owner_id,
+                              thread.jump_url, thread.archived, thread.locked))
+        if not thread.archived:
+            event_router.track_thread(thread.id)
+        self.stats['queued'] += 1
+        await self.queue.put((thread, time.monotonic()))
+        self.stats['max_queue_depth'] = max(self.stats['max_queue_depth'], self.queue.qsize())
+
+    def _save_pending(self):
+        # Everything queued so far goes in one transaction, including the
+        # thread this worker is about to onboard
+        if self._unsaved:
+            batch, self._unsaved = self._unsaved, []
+            try:
+                get_storage().upsert_threads(batch)
+            except Exception:
+                self._unsaved[:0] = batch
+                raise
+
+    async def _pace(self, route: str):
+        interval = self.settings['route_intervals'].get(route, 0)
+        now = time.monotonic()
+        slot = max(now, self._next_slot.get(route, 0.0))
+        self._next_slot[route] = slot + interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    async def _wait_until_ready(self, thread: discord.Thread):
+        # The starter message arrives just after the thread; a prompt sent
+        # before it would land above the OP's post
+        deadline = time.monotonic() + self.settings['ready_timeout_seconds']
+        while thread.starter_message is None and time.monotonic() < deadline:
+            await asyncio.sleep(0.25)
+
+    async def _worker(self):
+        while True:
+            thread, queued_at = await self.queue.get()
+            try:
+                self._save_pending()
+                await self._onboard(thread, queued_at)
+                self.stats['onboarded'] += 1
+            except Exception:
+                self.stats['failed'] += 1
+                log.exception("Onboarding thread failed", extra={'thread_id': thread.id})
+            finally:
+                self.queue.task_done()
+
+    async def _onboard(self, thread: discord.Thread, queued_at: float):
+        config = load_config()
+
+        # Join so the bot can send
+        try:
+            await self._pace('join')
+            await thread.join()
+        except Exception:
+            pass
+
+        await self._wait_until_ready(thread)
+
+        # Prepare TOS prompt
+        timeout_secs = 30
+        ts = int(time.time()) + timeout_secs
+        countdown = f"<t:{ts}:R>"
+        tos_message_text = config["tos_message"].replace("{timeout}", countdown)
+
+        # Create embedded TOS message
+        embed = discord.Embed(
+            title="📋 Marketplace Terms of Service",
+            description=tos_message_text,
+            color=discord.Color.blue()
+        )
+
+        await self._pace('tos_prompt')
+        prompt = await thread.send(content=f"<@{thread.owner_id}>", embed=embed, view=RepTOSView())
+        tos_gates.open(thread, prompt.id, expires_at=ts)
+        self.time_to_prompt.observe((time.monotonic() - queued_at) * 1000)
+
+        self._logs.put_nowait(thread)
+
+    async def _log_worker(self):
+        while True:
+            thread = await self._logs.get()
+            try:
+                # Initialize log embed
+                logging_cog = self.bot.get_cog("LoggingSystem")
+                if logging_cog:
+                    await self._pace('thread_log')
+                    await logging_cog.create_thread_log(
+                        thread,
+                        fields={
+                            "TOS Status": "⏳ Pending",
+                            "Review Events": "*No events yet*",
+                            "Thread Status": "✅ Open"
+                        }
+                    )
+            except Exception:
+                log.exception("Creating thread log failed", extra={'thread_id': thread.id})
+
+    def snapshot(self) -> dict:
+        return {
+            **self.stats,
+            'queue_depth': self.queue.qsize() if self.queue else 0,
+            'queue_size': self.settings['queue_size'],
+            'log_backlog': self._logs.qsize() if self._logs else 0,
+            'time_to_prompt': self.time_to_prompt.to_dict(),
+        }
+
+
+thread_onboarding = ThreadOnboarding()
 
 def load_config():
     with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
         return yaml.safe_load(f)
 
 
+def log_event(client: discord.Client, event_type: str, thread_id: int = None,
+              actor_id: int = None, priority: int = Outbox.NORMAL, **payload):
+    """Record an audit event and queue its embed for the log channel."""
+    event = event_log.record(event_type, thread_id, actor_id, **payload)
+    logging_cog = client.get_cog("LoggingSystem")
+    if logging_cog:
+        logging_cog.post_event(event, priority)
+
+
 def is_admin(user: discord.Member) -> bool:
     """Check if a user is an admin (either by user ID or role ID)"""
-    config = load_config()
-    admin_ids = config.get("admin_ids", [])
-    admin_role_ids = config.get("admin_role_ids", [])
-    
-    # Check user ID
-    if user.id in admin_ids:
-        return True
-    
-    # Check role IDs
-    user_role_ids = [role.id for role in user.roles]
-    if any(role_id in admin_role_ids for role_id in user_role_ids):
-        return True
-    
-    return False
+    return is_admin_id(user.id, [role.id for role in user.roles], load_config())
 
 
 def load_funny_messages():
@@ -47,68 +500,107 @@ def load_funny_messages():
         return ["Damn, get your rep up!"]
 
 
-class RepTOSView(discord.ui.View):
-    def __init__(
-        self,
-        thread: discord.Thread,
-        op_id: int,
-        timeout: float = 30.0
-    ):
-        # timeout is in seconds
-        super().__init__(timeout=timeout)
-        self.thread = thread
-        self.op_id = op_id
+def bind_interaction(interaction: discord.Interaction, kind: str, name: str):
+    """
+    Tag everything logged while handling this interaction with who and where,
+    time the handler for the interaction latency metric, and profile it when
+    it is sampled.
+    """
+    fields = {'interaction_id': interaction.id, 'user_id': interaction.user.id}
+    if isinstance(interaction.channel, discord.Thread):
+        fields['thread_id'] = interaction.channel.id
+    bind(**fields)
+    metrics.interaction_seconds.time_task(kind=kind, name=name)
+    profiler.sample_task(kind, name)
+
+
+class InstrumentedView(discord.ui.View):
+    """View that counts the DB queries issued while handling each component interaction."""
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        begin_scope(f"view:{type(self).__name__}")
+        # Persistent views have fixed custom_ids (leave_review, close_post); others are random
+        name = interaction.data.get('custom_id') if self.is_persistent() else type(self).__name__
+        bind_interaction(interaction, 'component', name)
+        return True
+
+
+class InstrumentedModal(discord.ui.Modal):
+    """Modal that counts the DB queries issued while handling each submission."""
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        begin_scope(f"modal:{type(self).__name__}")
+        bind_interaction(interaction, 'modal', type(self).__name__)
+        return True
+
+
+class RepTOSView(InstrumentedView):
+    def __init__(self):
+        # persistent across restarts; the pending gate and its deadline live in tos_gates
+        super().__init__(timeout=None)
 
-    @discord.ui.button(label='✅ I Agree', style=discord.ButtonStyle.success)
+    async def _pending_gate(self, interaction: discord.Interaction, action: str) -> TOSGate | None:
+        gate = tos_gates.gates.get(interaction.channel.id)
+        if gate is None:
+            await interaction.response.send_message(
+                "This TOS prompt is no longer active.",
+                ephemeral=True
+            )
+            return None
+        if interaction.user.id != gate.op_id:
+            await interaction.response.send_message(
+                f"Only the thread owner can {action} the TOS.",
+                ephemeral=True
+            )
+            return None
+        return tos_gates.resolve(gate.thread_id)
+
+    @discord.ui.button(custom_id="tos_agree", label='✅ I Agree', style=discord.ButtonStyle.success)
     async def agree(
         self,
         interaction: discord.Interaction,
         button: discord.ui.Button
     ):
-        if interaction.user.id != self.op_id:
-            return await interaction.response.send_message(
-                "Only the thread owner can accept the TOS.",
-                ephemeral=True
-            )
-
-        # Stop the timeout and unblock the thread
-        self.stop()
-        pending_tos_timestamps.pop(self.thread.id, None)
+        thread: discord.Thread = interaction.channel
+        # Unblock the thread
+        gate = await self._pending_gate(interaction, "accept")
+        if gate is None:
+            return
+        get_storage().set_thread_state(thread.id, Thread.OPEN)
+        event_log.record("tos_accepted", thread.id, interaction.user.id)
+        metrics.tos_outcomes.inc(outcome='accepted')
 
         # ─── Update the Thread Log with ✅ Accepted ───
         logging_cog = interaction.client.get_cog("LoggingSystem")
         if logging_cog:
             await logging_cog.update_thread_log(
-                self.thread,
+                thread,
                 field_updates={"TOS Status": f"✅ Accepted at <t:{int(time.time())}:T>"}
             )
 
         # Remove the TOS prompt and proceed to the review UI
         await interaction.message.delete()
-        await post_review_ui(self.thread, self.op_id)
+        await post_review_ui(thread, gate.op_id)
 
-    @discord.ui.button(label='❌ I Do Not Agree', style=discord.ButtonStyle.danger)
+    @discord.ui.button(custom_id="tos_decline", label='❌ I Do Not Agree', style=discord.ButtonStyle.danger)
     async def decline(
         self,
         interaction: discord.Interaction,
         button: discord.ui.Button
     ):
-        if interaction.user.id != self.op_id:
-            return await interaction.response.send_message(
-                "Only the thread owner can decline the TOS.",
-                ephemeral=True
-            )
-
-        # Stop the timeout and unblock the thread
-        self.stop()
-        pending_tos_timestamps.pop(self.thread.id, None)
+        thread: discord.Thread = interaction.channel
+        # Unblock the thread
+        gate = await self._pending_gate(interaction, "decline")
+        if gate is None:
+            return
+        event_log.record("tos_declined", thread.id, interaction.user.id)
+        metrics.tos_outcomes.inc(outcome='declined')
 
-        
         # ─── Update the Thread Log with ❌ Declined ───
         logging_cog = interaction.client.get_cog("LoggingSystem")
         if logging_cog:
             await logging_cog.update_thread_log(
-                self.thread,
+                thread,
                 field_updates={"TOS Status": f"❌ Declined at <t:{int(time.time())}:T>"}
             )
 
@@ -120,62 +612,21 @@ class RepTOSView(discord.ui.View):
         )
 
         # Archive & lock the thread
-        await self.thread.edit(archived=True, locked=True)
+        await thread.edit(archived=True, locked=True)
         
         # Update thread status in database
-        db.upsert_thread(
-            thread_id=self.thread.id,
-            channel_id=self.thread.parent_id,
-            guild_id=self.thread.guild.id,
-            name=self.thread.name,
-            owner_id=self.thread.owner_id,
-            jump_url=self.thread.jump_url,
+        get_storage().upsert_thread(
+            thread_id=thread.id,
+            channel_id=thread.parent_id,
+            guild_id=thread.guild.id,
+            name=thread.name,
+            owner_id=thread.owner_id,
+            jump_url=thread.jump_url,
             archived=True,
             locked=True
         )
-
-    async def on_timeout(self):
-        # Called if neither button is pressed within timeout
-        self.stop()
-        pending_tos_timestamps.pop(self.thread.id, None)
-
-        try:
-            print(f"[TOS] Thread {self.thread.id} timed out. Auto-closing.")
-
-            # ─── Update the Thread Log to show ❌ Timed Out ───
-            bot = self.thread._state._get_client()
-            logging_cog = bot.get_cog("LoggingSystem")
-            if logging_cog:
-                await logging_cog.update_thread_log(
-                    self.thread,
-                    field_updates={
-                        "TOS Status": f"⌛ Timed out at <t:{int(time.time())}:T>",
-                        "Thread Status": f"❌ Closed (timeout)"
-                    }
-                )
-
-            # Notify in-thread
-            await self.thread.send(
-                "⏱️ No response to TOS in time. This post has been auto-closed."
-            )
-
-            # Archive & lock
-            await self.thread.edit(archived=True, locked=True)
-            
-            # Update thread status in database
-            db.upsert_thread(
-                thread_id=self.thread.id,
-                channel_id=self.thread.parent_id,
-                guild_id=self.thread.guild.id,
-                name=self.thread.name,
-                owner_id=self.thread.owner_id,
-                jump_url=self.thread.jump_url,
-                archived=True,
-                locked=True
-            )
-
-        except Exception as e:
-            print(f"[ERROR] Auto-close on timeout failed: {e}")
+        event_router.untrack_thread(thread.id)
+        metrics.thread_closes.inc(path='tos_declined')
 
 
 def generate_star_rating(avg_rating: float, total_reviews: int) -> str | None:
@@ -195,7 +646,7 @@ def generate_star_rating(avg_rating: float, total_reviews: int) -> str | None:
     
     return f"Rating: {stars} ({avg_rating:.1f}/10 from {total_reviews} review{'s' if total_reviews != 1 else ''})"
 
-class SettingsView(discord.ui.View):
+class SettingsView(InstrumentedView):
     def __init__(self, interaction: discord.Interaction):
         super().__init__(timeout=300)  # 5 minute timeout
         self.interaction = interaction
@@ -379,7 +830,7 @@ class SettingsView(discord.ui.View):
 
         return embed
 
-class AutoCloseSettingsModal(discord.ui.Modal):
+class AutoCloseSettingsModal(InstrumentedModal):
     def __init__(self):
         super().__init__(title="Auto-Close Settings")
         
@@ -461,22 +912,17 @@ class AutoCloseSettingsModal(discord.ui.Modal):
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
         # Log the changes
-        log_ch_id = config.get("log_channel")
-        if log_ch_id:
-            log_ch = interaction.client.get_channel(log_ch_id)
-            if log_ch:
-                log_embed = discord.Embed(
-                    title="⚙️ Auto-Close Settings Modified",
-                    description=f"{interaction.user.mention} updated auto-close settings",
-                    color=discord.Color.blue()
-                )
-                log_embed.add_field(name="Enabled", value=f"{old_enabled} → {enabled}", inline=True)
-                log_embed.add_field(name="Hours", value=f"{old_hours} → {hours}", inline=True)
-                log_embed.add_field(name="Admin Confirmation", value=f"{old_admin_confirmation} → {admin_confirmation}", inline=True)
-                log_embed.timestamp = datetime.now()
-                await log_ch.send(embed=log_embed)
+        log_event(
+            interaction.client, "settings_changed", actor_id=interaction.user.id,
+            section="auto_close",
+            changes={
+                "Enabled": [old_enabled, enabled],
+                "Hours": [old_hours, hours],
+                "Admin Confirmation": [old_admin_confirmation, admin_confirmation],
+            }
+        )
 
-class TOSSettingsModal(discord.ui.Modal):
+class TOSSettingsModal(InstrumentedModal):
     def __init__(self):
         super().__init__(title="TOS Settings")
         
@@ -521,19 +967,9 @@ class TOSSettingsModal(discord.ui.Modal):
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
         # Log the changes
-        log_ch_id = config.get("log_channel")
-        if log_ch_id:
-            log_ch = interaction.client.get_channel(log_ch_id)
-            if log_ch:
-                log_embed = discord.Embed(
-                    title="📋 TOS Settings Modified",
-                    description=f"{interaction.user.mention} updated TOS messages",
-                    color=discord.Color.blue()
-                )
-                log_embed.timestamp = datetime.now()
-                await log_ch.send(embed=log_embed)
+        log_event(interaction.client, "settings_changed", actor_id=interaction.user.id, section="tos")
 
-class ServerSettingsModal(discord.ui.Modal):
+class ServerSettingsModal(InstrumentedModal):
     def __init__(self):
         super().__init__(title="Server Settings")
         
@@ -580,19 +1016,9 @@ class ServerSettingsModal(discord.ui.Modal):
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
         # Log the changes
-        log_ch_id = config.get("log_channel")
-        if log_ch_id:
-            log_ch = interaction.client.get_channel(log_ch_id)
-            if log_ch:
-                log_embed = discord.Embed(
-                    title="🌐 Server Settings Modified",
-                    description=f"{interaction.user.mention} updated server information",
-                    color=discord.Color.blue()
-                )
-                log_embed.timestamp = datetime.now()
-                await log_ch.send(embed=log_embed)
+        log_event(interaction.client, "settings_changed", actor_id=interaction.user.id, section="server")
 
-class BotStatusSettingsModal(discord.ui.Modal):
+class BotStatusSettingsModal(InstrumentedModal):
     def __init__(self):
         super().__init__(title="Bot Status Settings")
         
@@ -699,23 +1125,13 @@ class BotStatusSettingsModal(discord.ui.Modal):
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
         # Log the changes
-        log_ch_id = config.get("log_channel")
-        if log_ch_id:
-            log_ch = interaction.client.get_channel(log_ch_id)
-            if log_ch:
-                log_embed = discord.Embed(
-                    title="🤖 Bot Status Settings Modified",
-                    description=f"{interaction.user.mention} updated bot status settings",
-                    color=discord.Color.blue()
-                )
-                log_embed.add_field(name="Enabled", value=str(enabled), inline=True)
-                log_embed.add_field(name="Activity", value=activity_type, inline=True)
-                log_embed.add_field(name="Message", value=message, inline=True)
-                log_embed.add_field(name="Status Type", value=status_type, inline=True)
-                log_embed.timestamp = datetime.now()
-                await log_ch.send(embed=log_embed)
+        log_event(
+            interaction.client, "settings_changed", actor_id=interaction.user.id,
+            section="bot_status",
+            changes={"Enabled": enabled, "Activity": activity_type, "Message": message, "Status Type": status_type}
+        )
                 
-        print(f"[BOT-STATUS] {interaction.user} updated bot status: {activity_type} {message} ({status_type})")
+        log.info("%s updated bot status: %s %s (%s)", interaction.user, activity_type, message, status_type)
 
     async def update_bot_status(self, bot, activity_type: str, message: str, status_type: str):
         """Update the bot's Discord status"""
@@ -749,12 +1165,12 @@ class BotStatusSettingsModal(discord.ui.Modal):
             
             # Update bot status
             await bot.change_presence(status=status, activity=activity)
-            print(f"[BOT-STATUS] Updated bot status: {activity_type} {message} ({status_type})")
+            log.info("Updated bot status: %s %s (%s)", activity_type, message, status_type)
             
-        except Exception as e:
-            print(f"[ERROR] Failed to update bot status: {e}")
+        except Exception:
+            log.exception("Failed to update bot status")
 
-class AutoCloseView(discord.ui.View):
+class AutoCloseView(InstrumentedView):
     def __init__(self, thread: discord.Thread = None):
         super().__init__(timeout=None)
         self.thread = thread
@@ -771,7 +1187,7 @@ class AutoCloseView(discord.ui.View):
             )
         
         # Cancel the auto-close in database
-        db.cancel_thread_auto_close(thread.id)
+        get_storage().cancel_thread_auto_close(thread.id)
         
         # Update the message to show it's been cancelled
         embed = discord.Embed(
@@ -783,24 +1199,14 @@ class AutoCloseView(discord.ui.View):
         await interaction.response.edit_message(embed=embed, view=None)
         
         # Log the cancellation
-        config = load_config()
-        log_ch_id = config.get("log_channel")
-        if log_ch_id:
-            log_ch = interaction.client.get_channel(log_ch_id)
-            if log_ch:
-                log_embed = discord.Embed(
-                    title="🔓 Auto-Close Cancelled",
-                    description=f"{interaction.user.mention} cancelled auto-close for [{thread.name}]({thread.jump_url})",
-                    color=discord.Color.green()
-                )
-                log_embed.add_field(name="Thread Owner", value=f"<@{thread.owner_id}>", inline=True)
-                log_embed.add_field(name="Reason", value="Multiple items in listing", inline=True)
-                log_embed.timestamp = datetime.now()
-                await log_ch.send(embed=log_embed)
+        log_event(
+            interaction.client, "auto_close_cancelled", thread.id, interaction.user.id,
+            thread_name=thread.name, jump_url=thread.jump_url, owner_id=thread.owner_id
+        )
                 
-        print(f"[AUTO-CLOSE] {interaction.user} cancelled auto-close for thread {thread.id} ({thread.name})")
+        log.info("%s cancelled auto-close for thread %s (%s)", interaction.user, thread.id, thread.name)
 
-class ReviewModal(discord.ui.Modal):
+class ReviewModal(InstrumentedModal):
     def __init__(self, thread: discord.Thread, receiver_id: int):
         super().__init__(title="Leave a Review")
         self.thread = thread
@@ -838,7 +1244,7 @@ class ReviewModal(discord.ui.Modal):
         notes_value = self.notes.value.strip() if self.notes.value else None
         
         # Record the review
-        success = db.add_review(
+        success = get_storage().add_review(
             interaction.user.id,
             self.receiver_id,
             self.thread.id,
@@ -852,6 +1258,7 @@ class ReviewModal(discord.ui.Modal):
                 ephemeral=True
             )
             return
+        metrics.reviews.inc()
         
         # Create confirmation embed
         embed = discord.Embed(
@@ -869,7 +1276,7 @@ class ReviewModal(discord.ui.Modal):
         await interaction.response.send_message(embed=embed, ephemeral=True)
         
         # Check if this is the first review in the thread
-        is_first = db.is_first_review_in_thread(self.thread.id)
+        is_first = get_storage().is_first_review_in_thread(self.thread.id)
         
         # Send mention to thread owner with review notification
         mention_message = f"<@{self.receiver_id}> You received a **{rating_value}/10** review!"
@@ -882,7 +1289,7 @@ class ReviewModal(discord.ui.Modal):
             # Schedule auto-close based on configured hours
             auto_close_hours = config.get("auto_close_hours", 24)
             close_time = time.time() + (auto_close_hours * 60 * 60)  # Convert hours to seconds
-            db.schedule_thread_auto_close(self.thread.id, close_time)
+            get_storage().schedule_thread_auto_close(self.thread.id, close_time)
             
             # Create auto-close warning embed
             auto_close_embed = discord.Embed(
@@ -900,29 +1307,20 @@ class ReviewModal(discord.ui.Modal):
             await self.thread.send(content=mention_message, embed=auto_close_embed, view=view)
             
             # Log auto-close scheduling
-            log_ch_id = config.get("log_channel")
-            if log_ch_id:
-                log_ch = interaction.client.get_channel(log_ch_id)
-                if log_ch:
-                    log_embed = discord.Embed(
-                        title="⏰ Auto-Close Scheduled",
-                        description=f"Thread [{self.thread.name}]({self.thread.jump_url}) scheduled to auto-close <t:{int(close_time)}:R>",
-                        color=discord.Color.orange()
-                    )
-                    log_embed.add_field(name="Thread Owner", value=f"<@{self.receiver_id}>", inline=True)
-                    log_embed.add_field(name="Trigger", value="First review received", inline=True)
-                    log_embed.add_field(name="Timer", value=f"{auto_close_hours} hours", inline=True)
-                    log_embed.timestamp = datetime.now()
-                    await log_ch.send(embed=log_embed)
+            log_event(
+                interaction.client, "auto_close_scheduled", self.thread.id,
+                thread_name=self.thread.name, jump_url=self.thread.jump_url, owner_id=self.receiver_id,
+                closes_at=int(close_time), hours=auto_close_hours
+            )
                     
-            print(f"[AUTO-CLOSE] Scheduled thread {self.thread.id} ({self.thread.name}) to close in {auto_close_hours} hours")
+            log.info("Scheduled thread %s (%s) to close in %s hours", self.thread.id, self.thread.name, auto_close_hours)
         else:
             # Just send the mention for subsequent reviews or when auto-close is disabled
-            await self.thread.send(content=mention_message)
+            outbox.enqueue(self.thread.id, content=mention_message, priority=Outbox.HIGH)
             
             # Log if auto-close is disabled but would have been triggered
             if is_first and not auto_close_enabled:
-                print(f"[AUTO-CLOSE] First review in thread {self.thread.id} but auto-close is disabled")
+                log.info("First review in thread %s but auto-close is disabled", self.thread.id)
         
         # Update thread log
         logging_cog = interaction.client.get_cog("LoggingSystem")
@@ -935,17 +1333,15 @@ class ReviewModal(discord.ui.Modal):
             )
         
         # Send to log channel if configured
-        config = load_config()
-        log_ch_id = config.get("log_channel")
-        if log_ch_id:
-            log_ch = interaction.client.get_channel(log_ch_id)
-            if log_ch:
-                await log_ch.send(embed=embed)
+        log_event(
+            interaction.client, "review_submitted", self.thread.id, interaction.user.id,
+            receiver_id=self.receiver_id, rating=rating_value, notes=notes_value, jump_url=self.thread.jump_url
+        )
         
-        # Refresh the in-thread review UI
-        await post_review_ui(self.thread, self.receiver_id)
+        # Refresh the in-thread review panel (one edit per burst of reviews)
+        review_panels.request(self.thread, self.receiver_id)
 
-class CloseConfirmationModal(discord.ui.Modal):
+class CloseConfirmationModal(InstrumentedModal):
     def __init__(self, thread: discord.Thread):
         super().__init__(title="Close Post Confirmation")
         self.thread = thread
@@ -984,7 +1380,7 @@ class CloseConfirmationModal(discord.ui.Modal):
         await self.thread.edit(archived=True, locked=True)
         
         # Update thread status in database
-        db.upsert_thread(
+        get_storage().upsert_thread(
             thread_id=self.thread.id,
             channel_id=self.thread.parent_id,
             guild_id=self.thread.guild.id,
@@ -994,8 +1390,10 @@ class CloseConfirmationModal(discord.ui.Modal):
             archived=True,
             locked=True
         )
+        event_router.untrack_thread(self.thread.id)
+        metrics.thread_closes.inc(path='owner_no_reviews')
 
-class AdminCloseConfirmationModal(discord.ui.Modal):
+class AdminCloseConfirmationModal(InstrumentedModal):
     def __init__(self, thread: discord.Thread, admin_user: discord.Member):
         super().__init__(title="Admin Close Post Confirmation")
         self.thread = thread
@@ -1035,7 +1433,7 @@ class AdminCloseConfirmationModal(discord.ui.Modal):
         await self.thread.edit(archived=True, locked=True)
         
         # Update thread status in database
-        db.upsert_thread(
+        get_storage().upsert_thread(
             thread_id=self.thread.id,
             channel_id=self.thread.parent_id,
             guild_id=self.thread.guild.id,
@@ -1045,24 +1443,16 @@ class AdminCloseConfirmationModal(discord.ui.Modal):
             archived=True,
             locked=True
         )
+        event_router.untrack_thread(self.thread.id)
+        metrics.thread_closes.inc(path='admin')
         
         # Log admin closure
-        config = load_config()
-        log_ch_id = config.get("log_channel")
-        if log_ch_id:
-            log_ch = interaction.client.get_channel(log_ch_id)
-            if log_ch:
-                log_embed = discord.Embed(
-                    title="🔒 Admin Force Close",
-                    description=f"{self.admin_user.mention} force-closed thread [{self.thread.name}]({self.thread.jump_url})",
-                    color=discord.Color.red()
-                )
-                log_embed.add_field(name="Thread Owner", value=f"<@{self.thread.owner_id}>", inline=True)
-                log_embed.add_field(name="Action", value="Force closed by admin", inline=True)
-                log_embed.timestamp = datetime.now()
-                await log_ch.send(embed=log_embed)
+        log_event(
+            interaction.client, "thread_force_closed", self.thread.id, self.admin_user.id,
+            thread_name=self.thread.name, jump_url=self.thread.jump_url, owner_id=self.thread.owner_id
+        )
         
-        print(f"[ADMIN-CLOSE] {self.admin_user} force-closed thread {self.thread.id} ({self.thread.name})")
+        log.info("%s force-closed thread %s (%s)", self.admin_user, self.thread.id, self.thread.name)
 
 # Load the category→messages mapping
 def load_rep_messages():
@@ -1089,13 +1479,18 @@ GIF_URL_RE = re.compile(
     flags=re.IGNORECASE
 )
 
-async def post_review_ui(thread: discord.Thread, op_id: int):
+async def post_review_ui(thread: discord.Thread, op_id: int, repost: bool = False):
+    """
+    Refresh the thread's review panel. The stored panel message is edited in
+    place; a new one is only sent when there is none yet, it was deleted,
+    or `repost` asks for it to be moved to the bottom of the thread.
+    """
     config = load_config()
     rep_msgs = load_rep_messages()
     no_rep_lines = config.get("no_rep_messages", [])
 
     # Get review data instead of old rep data
-    avg_rating, total_reviews, latest_reviews = db.get_user_reviews(op_id)
+    avg_rating, total_reviews, latest_reviews = get_storage().get_user_reviews(op_id)
 
     # 1) No reviews yet
     if total_reviews == 0:
@@ -1130,26 +1525,78 @@ async def post_review_ui(thread: discord.Thread, op_id: int):
     embed = discord.Embed(description=content, color=discord.Color.green())
     if gif_url:
         embed.set_image(url=gif_url)
-        print(f"[DEBUG] Embedding GIF: {gif_url}")  # for your logs
+        log.debug("Embedding GIF: %s", gif_url)
 
     # 5) Add latest reviews if any
     if latest_reviews:
         reviews_text = ""
         for i, review in enumerate(latest_reviews[:3]):
-            stars = "⭐" * (review['rating'] // 2) + ("✨" if review['rating'] % 2 else "")
-            reviews_text += f"**{stars} {review['rating']}/10** by <@{review['giver_id']}>"
-            if review['notes']:
-                notes_preview = review['notes'][:50] + "..." if len(review['notes']) > 50 else review['notes']
+            stars = "⭐" * (review.rating // 2) + ("✨" if review.rating % 2 else "")
+            reviews_text += f"**{stars} {review.rating}/10** by <@{review.giver_id}>"
+            if review.notes:
+                notes_preview = review.notes[:50] + "..." if len(review.notes) > 50 else review.notes
                 reviews_text += f"\n> {notes_preview}"
             reviews_text += "\n\n"
         
         embed.add_field(name="📝 Latest Reviews", value=reviews_text.strip(), inline=False)
 
-    view = ReviewButtonView()
-    await thread.send(embed=embed, view=view)
+    # 6) Edit the existing panel, or post a new one
+    message_id = get_storage().get_review_panel(thread.id)
+    if message_id:
+        panel = thread.get_partial_message(message_id)
+        try:
+            if not repost:
+                await panel.edit(embed=embed)
+                return
+            await panel.delete()
+        except discord.NotFound:
+            pass
+
+    panel = await thread.send(embed=embed, view=ReviewButtonView())
+    get_storage().set_review_panel(thread.id, panel.id)
 
 
-class ReviewButtonView(discord.ui.View):
+class ReviewPanelRefresher:
+    """
+    Coalesces review panel refreshes: reviews that land within `window`
+    seconds of each other share one panel edit.
+    """
+
+    def __init__(self, window: float = 3.0):
+        self.window = window
+        self._pending: dict[int, asyncio.Task] = {}
+        self.stats = {'requested': 0, 'edits': 0}
+
+    def request(self, thread: discord.Thread, op_id: int):
+        self.stats['requested'] += 1
+        if thread.id not in self._pending:
+            self._pending[thread.id] = asyncio.create_task(self._refresh_later(thread, op_id))
+
+    async def _refresh_later(self, thread: discord.Thread, op_id: int):
+        try:
+            await asyncio.sleep(self.window)
+        finally:
+            self._pending.pop(thread.id, None)
+        try:
+            await post_review_ui(thread, op_id)
+            self.stats['edits'] += 1
+        except Exception:
+            log.exception("Refreshing review panel failed", extra={'thread_id': thread.id})
+
+
+review_panels = ReviewPanelRefresher()
+
+# Sizes of the shared queues and caches above, read when /metrics is scraped
+metrics.tos_pending.track(lambda: len(tos_gates.gates))
+metrics.cache_entries.track(lambda: len(event_router.active_thread_ids), cache='active_threads')
+metrics.cache_entries.track(lambda: len(event_router.forum_ids), cache='tracked_forums')
+metrics.cache_entries.track(
+    lambda: thread_onboarding.queue.qsize() if thread_onboarding.queue else 0, cache='onboarding_queue')
+metrics.cache_entries.track(lambda: sum(map(len, tos_delete_buffer._pending.values())), cache='tos_delete_buffer')
+metrics.cache_entries.track(lambda: len(review_panels._pending), cache='review_panel_refreshes')
+
+
+class ReviewButtonView(InstrumentedView):
     def __init__(self):
         # persistent across restarts
         super().__init__(timeout=None)
@@ -1166,7 +1613,7 @@ class ReviewButtonView(discord.ui.View):
             )
 
         # 2) Check if already reviewed
-        if db.has_user_reviewed(interaction.user.id, op_id, thread.id):
+        if get_storage().has_user_reviewed(interaction.user.id, op_id, thread.id):
             return await interaction.response.send_message(
                 "You've already reviewed this user in this thread.", ephemeral=True
             )
@@ -1230,7 +1677,7 @@ class ReviewButtonView(discord.ui.View):
                 await thread.edit(archived=True, locked=True)
                 
                 # Update thread status in database
-                db.upsert_thread(
+                get_storage().upsert_thread(
                     thread_id=thread.id,
                     channel_id=thread.parent_id,
                     guild_id=thread.guild.id,
@@ -1240,18 +1687,13 @@ class ReviewButtonView(discord.ui.View):
                     archived=True,
                     locked=True
                 )
+                event_router.untrack_thread(thread.id)
+                metrics.thread_closes.inc(path='admin')
                 return
 
         # 3) For thread owner (OP), check if there's at least one review
         if is_owner:
-            conn = sqlite3.connect(db.DB_PATH)
-            c = conn.cursor()
-            c.execute(
-                "SELECT COUNT(*) FROM reviews WHERE thread_id = ? AND giver_id != ?",
-                (thread.id, op_id)
-            )
-            count = c.fetchone()[0]
-            conn.close()
+            count = get_storage().get_thread_review_count(thread.id)
 
             # If no reviews, show confirmation modal
             if count == 0:
@@ -1277,7 +1719,7 @@ class ReviewButtonView(discord.ui.View):
         await thread.edit(archived=True, locked=True)
         
         # 7) Update thread status in database
-        db.upsert_thread(
+        get_storage().upsert_thread(
             thread_id=thread.id,
             channel_id=thread.parent_id,
             guild_id=thread.guild.id,
@@ -1287,20 +1729,42 @@ class ReviewButtonView(discord.ui.View):
             archived=True,
             locked=True
         )
+        event_router.untrack_thread(thread.id)
+        metrics.thread_closes.inc(path='owner')
 
 
 class Rep(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        print("🔧 Rep cog loaded")
+        log.info("Rep cog loaded")
         
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        """Count the DB queries issued by each slash command invocation."""
+        command = interaction.command.qualified_name if interaction.command else "unknown"
+        begin_scope(f"command:{command}")
+        bind_interaction(interaction, 'command', command)
+        return True
+
     async def cog_load(self):
         """Start background tasks when the cog loads"""
+        self.load_routes()
         self.auto_close_task.start()
+        tos_gates.start(self.bot)
+        thread_onboarding.start(self.bot, load_config())
         
         # Initialize bot status from config
         await self.initialize_bot_status()
     
+    def load_routes(self):
+        """Rebuild the event router's forum and active thread sets"""
+        try:
+            event_router.load_forums(load_config())
+            event_router.load_active_threads(get_storage().get_active_thread_ids())
+            log.info("Tracking %d forum(s) and %d active thread(s)",
+                     len(event_router.forum_ids), len(event_router.active_thread_ids))
+        except Exception:
+            log.exception("Failed to load event routes")
+
     async def initialize_bot_status(self):
         """Initialize bot status from configuration on startup"""
         try:
@@ -1340,34 +1804,37 @@ class Rep(commands.Cog):
                 
                 # Update bot status
                 await self.bot.change_presence(status=status, activity=activity)
-                print(f"[BOT-STATUS] Initialized: {activity_type} {message} ({status_type})")
+                log.info("Initialized bot status: %s %s (%s)", activity_type, message, status_type)
             else:
-                print("[BOT-STATUS] Custom status disabled in config")
+                log.info("Custom bot status disabled in config")
                 
-        except Exception as e:
-            print(f"[ERROR] Failed to initialize bot status: {e}")
+        except Exception:
+            log.exception("Failed to initialize bot status")
     
     async def cog_unload(self):
         """Stop background tasks when the cog unloads"""
         self.auto_close_task.cancel()
+        # Queued posts still open TOS gates while they drain
+        await thread_onboarding.stop()
+        tos_gates.stop()
     
     @tasks.loop(minutes=10)  # Check every 10 minutes
     async def auto_close_task(self):
         """Background task to auto-close threads that have passed their scheduled time"""
         try:
-            threads_to_close = db.get_threads_to_auto_close()
+            threads_to_close = get_storage().get_threads_to_auto_close()
             
             if threads_to_close:
-                print(f"[AUTO-CLOSE] Found {len(threads_to_close)} thread(s) ready for auto-close")
+                log.info("Found %d thread(s) ready for auto-close", len(threads_to_close))
             
             for thread_data in threads_to_close:
                 try:
                     # Get the actual thread object
-                    channel = self.bot.get_channel(thread_data['channel_id'])
+                    channel = self.bot.get_channel(thread_data.channel_id)
                     if not channel:
                         continue
                         
-                    thread = channel.get_thread(thread_data['thread_id'])
+                    thread = channel.get_thread(thread_data.thread_id)
                     if not thread:
                         continue
                     
@@ -1397,7 +1864,7 @@ class Rep(commands.Cog):
                     await thread.edit(archived=True, locked=True)
                     
                     # Update thread status in database
-                    db.upsert_thread(
+                    get_storage().upsert_thread(
                         thread_id=thread.id,
                         channel_id=thread.parent_id,
                         guild_id=thread.guild.id,
@@ -1407,31 +1874,22 @@ class Rep(commands.Cog):
                         archived=True,
                         locked=True
                     )
+                    event_router.untrack_thread(thread.id)
+                    metrics.thread_closes.inc(path='auto_close')
                     
                     # Log to log channel
-                    config = load_config()
-                    log_ch_id = config.get("log_channel")
-                    if log_ch_id:
-                        log_ch = self.bot.get_channel(log_ch_id)
-                        if log_ch:
-                            log_embed = discord.Embed(
-                                title="🤖 Thread Auto-Closed",
-                                description=f"Thread [{thread.name}]({thread.jump_url}) was automatically closed",
-                                color=discord.Color.red()
-                            )
-                            log_embed.add_field(name="Thread Owner", value=f"<@{thread.owner_id}>", inline=True)
-                            log_embed.add_field(name="Reason", value="24-hour timer expired", inline=True)
-                            log_embed.add_field(name="Action", value="Archived & Locked", inline=True)
-                            log_embed.timestamp = datetime.now()
-                            await log_ch.send(embed=log_embed)
+                    log_event(
+                        self.bot, "thread_auto_closed", thread.id,
+                        thread_name=thread.name, jump_url=thread.jump_url, owner_id=thread.owner_id
+                    )
                     
-                    print(f"[AUTO-CLOSE] Successfully closed thread {thread.id} ({thread.name})")
+                    log.info("Auto-closed thread %s (%s)", thread.id, thread.name)
                     
-                except Exception as e:
-                    print(f"[ERROR] Failed to auto-close thread {thread_data['thread_id']}: {e}")
+                except Exception:
+                    log.exception("Failed to auto-close thread", extra={'thread_id': thread_data.thread_id})
                     
-        except Exception as e:
-            print(f"[ERROR] Auto-close task failed: {e}")
+        except Exception:
+            log.exception("Auto-close task failed")
     
     @auto_close_task.before_loop
     async def before_auto_close_task(self):
@@ -1441,77 +1899,23 @@ class Rep(commands.Cog):
 
     @commands.Cog.listener()
     async def on_thread_create(self, thread: discord.Thread):
-        try:
-            config = load_config()
-            forums = [int(f) for f in config.get("forums", []) if str(f).isdigit()]
-            if thread.parent_id not in forums:
-                return
-
-            # Save thread information to database
-            db.upsert_thread(
-                thread_id=thread.id,
-                channel_id=thread.parent_id,
-                guild_id=thread.guild.id,
-                name=thread.name,
-                owner_id=thread.owner_id,
-                jump_url=thread.jump_url,
-                archived=thread.archived,
-                locked=thread.locked
-            )
-
-            # Join so the bot can send
-            try:
-                await thread.join()
-            except Exception:
-                pass
-
-            # Prepare TOS prompt
-            timeout_secs = 30
-            ts = int(time.time()) + timeout_secs
-            countdown = f"<t:{ts}:R>"
-            tos_message_text = config["tos_message"].replace("{timeout}", countdown)
-            
-            # Create embedded TOS message
-            embed = discord.Embed(
-                title="📋 Marketplace Terms of Service",
-                description=tos_message_text,
-                color=discord.Color.blue()
-            )
-            
-            view = RepTOSView(thread=thread, op_id=thread.owner_id, timeout=timeout_secs)
-            await asyncio.sleep(2)
-            await thread.send(content=f"<@{thread.owner_id}>", embed=embed, view=view)
-            pending_tos_timestamps[thread.id] = time.time()
-
-            # Initialize log embed
-            logging_cog = self.bot.get_cog("LoggingSystem")
-            if logging_cog:
-                await logging_cog.create_thread_log(
-                    thread,
-                    fields={
-                        "TOS Status": "⏳ Pending",
-                        "Review Events": "*No events yet*",
-                        "Thread Status": "✅ Open"
-                    }
-                )
+        if not event_router.route("thread_create", thread.parent_id, event_router.forum_ids):
+            return
 
-        except Exception as e:
-            print(f"[ERROR] on_thread_create: {e}")
+        await thread_onboarding.submit(thread)
 
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
+        if not event_router.route("message", message.channel.id, event_router.active_thread_ids):
+            return
+
         # Delete user messages posted after TOS prompt until it's handled
-        ts = pending_tos_timestamps.get(message.channel.id)
         if (
-            ts
-            and isinstance(message.channel, discord.Thread)
+            isinstance(message.channel, discord.Thread)
             and not message.author.bot
-            and message.created_at.timestamp() > ts
+            and tos_gates.is_gated(message)
         ):
-            try:
-                await message.delete()
-            except discord.Forbidden:
-                pass
+            tos_delete_buffer.add(message)
 
     @app_commands.command(name="channel_set", description="Add a forum channel for tracking reps.")
     @app_commands.describe(channel="Forum channel to activate rep tracking on.")
@@ -1522,6 +1926,7 @@ class Rep(commands.Cog):
             config["forums"].append(channel.id)
             with open(CONFIG_PATH, 'w', encoding='utf-8') as f:
                 yaml.dump(config, f)
+            event_router.load_forums(config)
             await interaction.response.send_message(
                 f"✅ Channel {channel.mention} added to rep tracking.",
                 ephemeral=True
@@ -1534,7 +1939,7 @@ class Rep(commands.Cog):
     @app_commands.command(name="reviews", description="Check a user's reviews and rating.")
     @app_commands.describe(user="The user to check reviews for.")
     async def reviews_lookup(self, interaction: discord.Interaction, user: discord.Member):
-        avg_rating, total_reviews, latest_reviews = db.get_user_reviews(user.id)
+        avg_rating, total_reviews, latest_reviews = get_storage().get_user_reviews(user.id)
         
         embed = discord.Embed(
             title=f"⭐ Reviews for {user.display_name}",
@@ -1555,10 +1960,10 @@ class Rep(commands.Cog):
             if latest_reviews:
                 reviews_text = ""
                 for i, review in enumerate(latest_reviews):
-                    stars = "⭐" * (review['rating'] // 2) + ("✨" if review['rating'] % 2 else "")
-                    reviews_text += f"**{stars} {review['rating']}/10** by <@{review['giver_id']}>"
-                    if review['notes']:
-                        notes_preview = review['notes'][:80] + "..." if len(review['notes']) > 80 else review['notes']
+                    stars = "⭐" * (review.rating // 2) + ("✨" if review.rating % 2 else "")
+                    reviews_text += f"**{stars} {review.rating}/10** by <@{review.giver_id}>"
+                    if review.notes:
+                        notes_preview = review.notes[:80] + "..." if len(review.notes) > 80 else review.notes
                         reviews_text += f"\n> {notes_preview}"
                     if i < len(latest_reviews) - 1:
                         reviews_text += "\n\n"
@@ -1569,7 +1974,7 @@ class Rep(commands.Cog):
 
     @app_commands.command(name="leaderboard", description="Show the top 10 users by rating.")
     async def review_leaderboard(self, interaction: discord.Interaction):
-        top = db.get_top_rated_users(limit=10)
+        top = get_storage().get_top_rated_users(limit=10)
         embed = discord.Embed(
             title="🏆 Top Rated Users",
             description="Here are the highest rated users:",
@@ -1832,8 +2237,8 @@ class Rep(commands.Cog):
         thread = interaction.channel
         op_id = thread.owner_id
         
-        # Send the review UI
-        await post_review_ui(thread, op_id)
+        # Move the review panel to the bottom of the thread
+        await post_review_ui(thread, op_id, repost=True)
         
         await interaction.response.send_message(
             "✅ Rate/close interface sent to this thread.", ephemeral=True
@@ -1901,22 +2306,12 @@ class Rep(commands.Cog):
         await interaction.response.send_message(embed=embed, ephemeral=True)
         
         # Log the change to log channel
-        config_log = load_config()
-        log_ch_id = config_log.get("log_channel")
-        if log_ch_id:
-            log_ch = interaction.client.get_channel(log_ch_id)
-            if log_ch:
-                log_embed = discord.Embed(
-                    title="🔧 Auto-Close Setting Changed",
-                    description=f"{interaction.user.mention} **{'enabled' if enabled else 'disabled'}** the auto-close feature",
-                    color=color
-                )
-                log_embed.add_field(name="Previous Status", value="✅ Enabled" if old_status else "❌ Disabled", inline=True)
-                log_embed.add_field(name="New Status", value=status_text, inline=True)
-                log_embed.timestamp = datetime.now()
-                await log_ch.send(embed=log_embed)
+        log_event(
+            interaction.client, "auto_close_toggled", actor_id=interaction.user.id,
+            enabled=enabled, previous=old_status
+        )
         
-        print(f"[AUTO-CLOSE] {interaction.user} ({'enabled' if enabled else 'disabled'}) auto-close feature")
+        log.info("%s %s the auto-close feature", interaction.user, 'enabled' if enabled else 'disabled')
 
     @app_commands.command(name="auto_close_hours", description="Set the number of hours before auto-close (admin only).")
     @app_commands.describe(hours="Number of hours to wait before auto-closing threads (1-168)")
@@ -1958,20 +2353,45 @@ class Rep(commands.Cog):
         await interaction.response.send_message(embed=embed, ephemeral=True)
         
         # Log the change
-        config_log = load_config()
-        log_ch_id = config_log.get("log_channel")
-        if log_ch_id:
-            log_ch = interaction.client.get_channel(log_ch_id)
-            if log_ch:
-                log_embed = discord.Embed(
-                    title="⏰ Auto-Close Timer Changed",
-                    description=f"{interaction.user.mention} changed auto-close timer from **{old_hours}h** to **{hours}h**",
-                    color=discord.Color.blue()
-                )
-                log_embed.timestamp = datetime.now()
-                await log_ch.send(embed=log_embed)
+        log_event(
+            interaction.client, "auto_close_hours_changed", actor_id=interaction.user.id,
+            hours=hours, previous=old_hours
+        )
         
-        print(f"[AUTO-CLOSE] {interaction.user} changed auto-close timer to {hours} hours")
+        log.info("%s changed auto-close timer to %s hours", interaction.user, hours)
+
+    @app_commands.command(name="profiling", description="Turn the sampling profiler on/off (admin only).")
+    @app_commands.describe(enabled="Enable or disable profiling", percent="Percent of interactions to profile")
+    async def profiling(self, interaction: discord.Interaction, enabled: bool = None,
+                        percent: app_commands.Range[int, 1, 100] = None):
+        if not is_admin(interaction.user):
+            await interaction.response.send_message(
+                "❌ Only admins can control profiling.", ephemeral=True
+            )
+            return
+
+        if enabled is None and percent is None:
+            status = profiler.snapshot()
+        elif enabled is False:
+            status = profiler.disable()
+        else:
+            status = profiler.enable(percent / 100 if percent is not None else None)
+        if enabled is not None or percent is not None:
+            event_log.record("profiling_toggled", actor_id=interaction.user.id,
+                             enabled=status['enabled'], sample_rate=status['sample_rate'])
+            log.info("%s %s profiling", interaction.user, 'enabled' if status['enabled'] else 'disabled')
+
+        embed = discord.Embed(
+            title="🔬 Profiling",
+            description=f"**Status:** {'✅ Enabled' if status['enabled'] else '❌ Disabled'}",
+            color=discord.Color.green() if status['enabled'] else discord.Color.blue()
+        )
+        embed.add_field(name="Sampling", value=f"{status['sample_rate'] * 100:g}% of interactions", inline=True)
+        embed.add_field(name="Samples", value=str(status['samples']), inline=True)
+        if status['output_dir']:
+            embed.add_field(name="Profiles", value=f"`{status['output_dir']}`", inline=False)
+        embed.add_field(name="Usage", value="Use `/profiling true/false [percent]` to change", inline=False)
+        await interaction.response.send_message(embed=embed, ephemeral=True)
 
     @app_commands.command(name="settings", description="View and modify bot settings through an interactive interface (admin only).")
     async def settings_command(self, interaction: discord.Interaction):
@@ -1989,20 +2409,9 @@ class Rep(commands.Cog):
         await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
 
         # Log settings access
-        config = load_config()
-        log_ch_id = config.get("log_channel")
-        if log_ch_id:
-            log_ch = interaction.client.get_channel(log_ch_id)
-            if log_ch:
-                log_embed = discord.Embed(
-                    title="⚙️ Settings Panel Accessed",
-                    description=f"{interaction.user.mention} opened the settings dashboard",
-                    color=discord.Color.blue()
-                )
-                log_embed.timestamp = datetime.now()
-                await log_ch.send(embed=log_embed)
+        log_event(interaction.client, "settings_opened", actor_id=interaction.user.id, priority=Outbox.LOW)
 
-        print(f"[SETTINGS] {interaction.user} accessed settings dashboard")
+        log.info("%s accessed settings dashboard", interaction.user)
 
 async def setup(bot: commands.Bot):
     # Add persistent views
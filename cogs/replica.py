@@ -0,0 +1,79 @@
+import asyncio
+import logging
+import sqlite3
+import time
+from typing import Optional
+
+from discord.ext import commands, tasks
+
+from utils import db, replica
+
+log = logging.getLogger(__name__)
+
+
+class Replica(commands.Cog):
+    """Publishes read-only database snapshots for the web dashboards (see utils/replica.py)"""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self._watch_conn: Optional[sqlite3.Connection] = None
+        self._published_version: Optional[int] = None
+        self._last_publish = 0.0
+        log.info("Replica publisher loaded")
+
+    async def cog_load(self):
+        """Start watching the database when replica mode is enabled"""
+        settings = replica.get_settings()
+        if not settings['enabled']:
+            log.info("Replica mode disabled in config")
+            return
+        self.publish_task.change_interval(seconds=settings['check_interval_seconds'])
+        self.publish_task.start()
+
+    async def cog_unload(self):
+        """Stop the publisher and close the watch connection"""
+        self.publish_task.cancel()
+        if self._watch_conn:
+            self._watch_conn.close()
+            self._watch_conn = None
+
+    def _data_version(self) -> int:
+        # data_version only changes when *another* connection commits, so this
+        # connection must stay open and never write.
+        if self._watch_conn is None:
+            path = db.resolve_db_path()
+            self._watch_conn = sqlite3.connect(path, uri=path.startswith('file:'))
+            if db.USERS_DB_PATH:
+                self._watch_conn.execute(f"ATTACH DATABASE ? AS {db.USERS_SCHEMA}",
+                                         (db.resolve_db_path(db.USERS_DB_PATH),))
+        version = self._watch_conn.execute("PRAGMA main.data_version").fetchone()[0]
+        if db.USERS_DB_PATH:
+            # Member syncs only touch the users file, which has its own counter
+            version += self._watch_conn.execute(f"PRAGMA {db.USERS_SCHEMA}.data_version").fetchone()[0] << 32
+        return version
+
+    @tasks.loop(seconds=5)
+    async def publish_task(self):
+        """Publish a new snapshot when the database has changed since the last one"""
+        try:
+            version = self._data_version()
+            if version == self._published_version and replica.current_snapshot():
+                return
+            if time.time() - self._last_publish < replica.get_settings()['min_interval_seconds']:
+                return
+
+            started = time.perf_counter()
+            pointer = await asyncio.to_thread(replica.publish_snapshot, version)
+            self._published_version = version
+            self._last_publish = pointer['published_at']
+            log.info("Published %s in %.0fms", pointer['file'], (time.perf_counter() - started) * 1000)
+        except Exception:
+            log.exception("Replica publish failed")
+
+    @publish_task.before_loop
+    async def before_publish(self):
+        await self.bot.wait_until_ready()
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(Replica(bot))
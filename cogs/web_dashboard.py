@@ -1,20 +1,29 @@
 import discord
 from discord.ext import commands, tasks
 from flask import Flask, render_template, request, jsonify
-import sqlite3
 import os
+import secrets
 import sys
 import threading
 import time
 import asyncio
 import json
+import logging
 from datetime import datetime
 import yaml
 from typing import List, Dict, Any
 
 # Add parent directory to path to import utils
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from utils import db
+from utils import maintenance, metrics, replica
+from utils.access import admin_required
+from utils.instrumentation import install_flask_hooks, named_query, query_stats
+from utils.metrics import install_flask_metrics
+from utils.profiling import install_flask_profiling
+from utils.storage import get_storage
+
+log = logging.getLogger(__name__)
+
 
 class WebDashboard(commands.Cog):
     """Web dashboard integration cog for the Discord bot"""
@@ -34,7 +43,7 @@ class WebDashboard(commands.Cog):
             with open(config_path, 'r', encoding='utf-8') as f:
                 self.config = yaml.safe_load(f)
         except FileNotFoundError:
-            print("❌ Config file not found")
+            log.error("Config file not found")
             self.config = {}
     
     def setup_flask_app(self):
@@ -43,7 +52,11 @@ class WebDashboard(commands.Cog):
         static_folder = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'web_dashboard', 'static')
         
         self.app = Flask(__name__, template_folder=template_folder, static_folder=static_folder)
-        self.app.secret_key = 'discord-rep-bot-dashboard'
+        # Sessions gate the admin-only routes, so the key must not be guessable
+        self.app.secret_key = os.getenv('FLASK_SECRET_KEY', secrets.token_hex(16))
+        install_flask_hooks(self.app)
+        install_flask_metrics(self.app)
+        install_flask_profiling(self.app)
         
         # Template context processor
         @self.app.context_processor
@@ -121,37 +134,29 @@ class WebDashboard(commands.Cog):
         @self.app.route('/user/<int:user_id>')
         def user_profile(user_id):
             """User profile page"""
-            stats = self.get_user_stats(user_id)
-            return render_template('user_profile.html', user_id=user_id, stats=stats)
+            full_history = request.args.get('history') == 'full'
+            stats = self.get_user_stats(user_id, full_history=full_history)
+            return render_template('user_profile.html', user_id=user_id, stats=stats, full_history=full_history)
         
         @self.app.route('/api/discord_user/<int:user_id>')
         def get_discord_user_info(user_id):
             """API endpoint to get Discord user information"""
-            db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), db.DB_PATH)
-            conn = sqlite3.connect(db_path)
-            c = conn.cursor()
-            c.execute("""
-                SELECT username, display_name, avatar_url, banner_url, accent_color, 
-                       public_flags, is_in_server, roles, badges
-                FROM users WHERE user_id = ?
-            """, (user_id,))
-            result = c.fetchone()
-            conn.close()
-            
-            if result:
+            user = get_storage().get_user(user_id)
+            
+            if user:
                 # Parse JSON data
-                roles = json.loads(result[7]) if result[7] else []
-                badges = json.loads(result[8]) if result[8] else []
+                roles = json.loads(user.roles) if user.roles else []
+                badges = json.loads(user.badges) if user.badges else []
                 
                 return jsonify({
                     'id': user_id,
-                    'username': result[0],
-                    'display_name': result[1] or result[0],
-                    'avatar_url': result[2] or f'https://cdn.discordapp.com/embed/avatars/{user_id % 5}.png',
-                    'banner_url': result[3],
-                    'accent_color': result[4],
-                    'public_flags': result[5],
-                    'status': 'Online' if result[6] else 'Offline',
+                    'username': user.username,
+                    'display_name': user.display_name or user.username,
+                    'avatar_url': user.avatar_url or f'https://cdn.discordapp.com/embed/avatars/{user_id % 5}.png',
+                    'banner_url': user.banner_url,
+                    'accent_color': user.accent_color,
+                    'public_flags': user.public_flags,
+                    'status': 'Online' if user.is_in_server else 'Offline',
                     'roles': roles,
                     'badges': badges
                 })
@@ -229,6 +234,68 @@ class WebDashboard(commands.Cog):
                 'pagination': pagination_info
             })
 
+        @self.app.route('/api/query_stats')
+        @admin_required
+        def get_query_stats():
+            """API endpoint exposing DB query latencies, slow queries and N+1 warnings"""
+            if request.args.get('dump'):
+                return jsonify({'status': 'success', 'path': query_stats.dump_json()})
+            if request.args.get('reset'):
+                query_stats.reset()
+            return jsonify(query_stats.snapshot())
+
+        @self.app.route('/api/replica_status')
+        def get_replica_status():
+            """API endpoint reporting whether reads come from a snapshot and how old it is"""
+            return jsonify(replica.status())
+
+        @self.app.route('/api/maintenance_status')
+        def get_maintenance_status():
+            """API endpoint with duration and bytes-reclaimed metrics for each maintenance job"""
+            return jsonify(maintenance.snapshot_stats())
+
+        @self.app.route('/api/routing_stats')
+        def get_routing_stats():
+            """API endpoint with routed vs dropped event counts and TOS delete batching from the Rep cog"""
+            from cogs.rep import event_router, tos_delete_buffer
+            return jsonify({**event_router.snapshot(), 'tos_deletes': dict(tos_delete_buffer.stats)})
+
+        @self.app.route('/api/onboarding_stats')
+        def get_onboarding_stats():
+            """API endpoint with the new-post onboarding queue depth and time to TOS prompt"""
+            from cogs.rep import thread_onboarding
+            return jsonify(thread_onboarding.snapshot())
+
+        @self.app.route('/api/outbox_stats')
+        def get_outbox_stats():
+            """API endpoint with the log/notification outbox depth and send, retry and drop counts"""
+            from cogs.logging import outbox
+            return jsonify(outbox.snapshot())
+
+        @self.app.route('/api/loop_blockers')
+        @admin_required
+        def get_loop_blockers():
+            """API endpoint with event loop lag and the calls that blocked the loop longest"""
+            from utils.loop_watchdog import loop_watchdog
+            limit = min(max(request.args.get('limit', 10, type=int), 1), 50)
+            return jsonify(loop_watchdog.snapshot(limit))
+
+        @self.app.route('/api/events')
+        @admin_required
+        def get_events():
+            """API endpoint with the audit event timeline, newest first. Pass `next_cursor` back as `before` for the next page"""
+            limit = min(max(request.args.get('limit', 50, type=int), 1), 200)
+            events = get_storage().get_events(
+                thread_id=request.args.get('thread_id', type=int),
+                event_type=request.args.get('type') or None,
+                before_id=request.args.get('before', type=int),
+                limit=limit
+            )
+            return jsonify({
+                'events': events,
+                'next_cursor': events[-1].id if len(events) == limit else None
+            })
+
         @self.app.route('/api/sync_members', methods=['POST'])
         def sync_members():
             """API endpoint to manually sync Discord members"""
@@ -331,8 +398,8 @@ class WebDashboard(commands.Cog):
             
         try:
             await self.sync_enhanced_profiles()
-        except Exception as e:
-            print(f"⚠️  Background enhanced sync error: {e}")
+        except Exception:
+            log.exception("Background enhanced sync failed")
     
     @enhanced_sync_task.before_loop
     async def before_enhanced_sync(self):
@@ -343,36 +410,23 @@ class WebDashboard(commands.Cog):
     async def sync_enhanced_profiles(self):
         """Sync enhanced profile data for users who don't have it yet"""
         try:
-            db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), db.DB_PATH)
-            conn = sqlite3.connect(db_path)
-            c = conn.cursor()
-            
             # Find users without enhanced data (no banner_url and no badges)
-            c.execute("""
-                SELECT user_id, username FROM users 
-                WHERE is_in_server = TRUE 
-                AND (banner_url IS NULL AND badges IS NULL)
-                ORDER BY last_updated ASC
-                LIMIT 50
-            """)
-            
-            users_to_update = c.fetchall()
-            conn.close()
+            users_to_update = get_storage().get_users_missing_profile(limit=50)
             
             if not users_to_update:
-                print("🎯 All users have enhanced profile data")
+                log.debug("All users have enhanced profile data")
                 return
             
-            print(f"🔄 Background sync: updating enhanced data for {len(users_to_update)} users...")
+            log.info("Background sync: updating enhanced data for %d users", len(users_to_update))
             
-            for i, (user_id, username) in enumerate(users_to_update):
+            for i, user in enumerate(users_to_update):
                 try:
                     # Rate limiting
                     if i > 0 and i % 5 == 0:
                         await asyncio.sleep(3)
                     
                     # Fetch enhanced data
-                    full_user = await self.bot.fetch_user(user_id)
+                    full_user = await self.bot.fetch_user(user.user_id)
                     if full_user:
                         banner_url = full_user.banner.url if full_user.banner else None
                         accent_color = full_user.accent_color.value if full_user.accent_color else None
@@ -384,192 +438,34 @@ class WebDashboard(commands.Cog):
                             badges_json = json.dumps(badges) if badges else None
                         
                         # Update only enhanced fields
-                        db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), db.DB_PATH)
-                        conn = sqlite3.connect(db_path)
-                        c = conn.cursor()
-                        c.execute("""
-                            UPDATE users 
-                            SET banner_url = ?, accent_color = ?, public_flags = ?, badges = ?, 
-                                last_updated = CURRENT_TIMESTAMP
-                            WHERE user_id = ?
-                        """, (banner_url, accent_color, public_flags, badges_json, user_id))
-                        conn.commit()
-                        conn.close()
+                        get_storage().update_user_profile(user.user_id, banner_url, accent_color,
+                                                          public_flags, badges_json)
                         
                 except Exception as e:
                     # Skip individual errors
                     continue
             
-            print(f"✅ Background sync completed for {len(users_to_update)} users")
+            log.info("Background sync completed for %d users", len(users_to_update))
+            metrics.member_syncs.inc(mode='profiles')
             
-        except Exception as e:
-            print(f"❌ Background enhanced sync error: {e}")
+        except Exception:
+            log.exception("Background enhanced sync failed")
 
-    def get_user_stats(self, user_id):
+    @named_query
+    def get_user_stats(self, user_id, full_history=False):
         """Get comprehensive user statistics"""
-        db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), db.DB_PATH)
-        conn = sqlite3.connect(db_path)
-        c = conn.cursor()
-        
-        # Get review stats
-        c.execute("""
-            SELECT AVG(rating), COUNT(*) 
-            FROM reviews 
-            WHERE receiver_id = ?
-        """, (user_id,))
-        result = c.fetchone()
-        avg_rating = result[0] if result[0] else 0.0
-        total_reviews = result[1]
-        
-        # Get reviews given by this user
-        c.execute("""
-            SELECT COUNT(*) 
-            FROM reviews 
-            WHERE giver_id = ?
-        """, (user_id,))
-        reviews_given = c.fetchone()[0]
-        
-        # Get active threads (not archived)
-        c.execute("""
-            SELECT DISTINCT thread_id 
-            FROM reviews 
-            WHERE receiver_id = ?
-        """, (user_id,))
-        thread_ids = [row[0] for row in c.fetchall()]
-        
-        # Get latest reviews received
-        c.execute("""
-            SELECT giver_id, rating, notes, created_at 
-            FROM reviews 
-            WHERE receiver_id = ? 
-            ORDER BY created_at DESC 
-            LIMIT 10
-        """, (user_id,))
-        
-        latest_reviews = []
-        for row in c.fetchall():
-            latest_reviews.append({
-                'giver_id': row[0],
-                'rating': row[1],
-                'notes': row[2],
-                'created_at': row[3]
-            })
-        
-        # Get latest reviews given
-        c.execute("""
-            SELECT receiver_id, rating, notes, created_at, thread_id
-            FROM reviews 
-            WHERE giver_id = ? 
-            ORDER BY created_at DESC 
-            LIMIT 10
-        """, (user_id,))
-        
-        reviews_given_data = []
-        for row in c.fetchall():
-            reviews_given_data.append({
-                'receiver_id': row[0],
-                'rating': row[1],
-                'notes': row[2],
-                'created_at': row[3],
-                'thread_id': row[4]
-            })
-        
-        conn.close()
-        
-        return {
-            'avg_rating': avg_rating,
-            'total_reviews': total_reviews,
-            'reviews_given': reviews_given,
-            'thread_ids': thread_ids,
-            'latest_reviews': latest_reviews,
-            'reviews_given_data': reviews_given_data
-        }
+        # Full history also includes reviews moved to the archive database
+        return get_storage().get_profile_stats(user_id, full_history=full_history)
     
+    @named_query
     def get_all_users_with_activity(self):
         """Get all users from the database with their review stats"""
-        db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), db.DB_PATH)
-        conn = sqlite3.connect(db_path)
-        c = conn.cursor()
-        
-        c.execute("""
-            SELECT 
-                u.user_id,
-                u.username,
-                u.display_name,
-                u.avatar_url,
-                u.banner_url,
-                u.accent_color,
-                u.public_flags,
-                u.is_in_server,
-                u.left_at,
-                u.roles,
-                u.badges,
-                COALESCE(AVG(r_received.rating), 0) as avg_rating,
-                COALESCE(COUNT(r_received.id), 0) as total_reviews,
-                COALESCE(COUNT(r_given.id), 0) as reviews_given
-            FROM users u
-            LEFT JOIN reviews r_received ON u.user_id = r_received.receiver_id
-            LEFT JOIN reviews r_given ON u.user_id = r_given.giver_id
-            GROUP BY u.user_id, u.username, u.display_name, u.avatar_url, u.banner_url, 
-                     u.accent_color, u.public_flags, u.is_in_server, u.left_at, u.roles, u.badges
-            ORDER BY u.is_in_server DESC, COALESCE(AVG(r_received.rating), 0) DESC, u.username ASC
-        """)
-        
-        users_data = []
-        for row in c.fetchall():
-            # Parse JSON data
-            roles = json.loads(row[9]) if row[9] else []
-            badges = json.loads(row[10]) if row[10] else []
-            
-            users_data.append({
-                'user_id': row[0],
-                'username': row[1],
-                'display_name': row[2],
-                'avatar_url': row[3],
-                'banner_url': row[4],
-                'accent_color': row[5],
-                'public_flags': row[6],
-                'is_in_server': bool(row[7]),
-                'left_at': row[8],
-                'roles': roles,
-                'badges': badges,
-                'avg_rating': float(row[11]),
-                'total_reviews': row[12],
-                'reviews_given': row[13]
-            })
-        
-        conn.close()
-        return users_data
+        return get_storage().list_user_activity()
     
+    @named_query
     def get_homepage_stats(self):
         """Get overall statistics for the homepage"""
-        db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), db.DB_PATH)
-        conn = sqlite3.connect(db_path)
-        c = conn.cursor()
-        
-        # Get total reviews and average rating
-        c.execute("SELECT COUNT(*), AVG(rating) FROM reviews")
-        total_reviews, avg_rating = c.fetchone()
-        total_reviews = total_reviews or 0
-        avg_rating = avg_rating or 0.0
-        
-        # Get active users (users who have given or received reviews)
-        c.execute("""
-            SELECT COUNT(DISTINCT user_id) FROM (
-                SELECT giver_id as user_id FROM reviews
-                UNION
-                SELECT receiver_id as user_id FROM reviews
-            )
-        """)
-        active_users = c.fetchone()[0] or 0
-        
-        conn.close()
-        
-        return {
-            'total_reviews': total_reviews,
-            'avg_rating': avg_rating,
-            'active_users': active_users
-        }
+        return get_storage().get_site_stats()
     
     def get_guild_info(self):
         """Get Discord guild information"""
@@ -583,129 +479,25 @@ class WebDashboard(commands.Cog):
             }
         return None
     
+    @named_query
     def get_recent_reviews(self, limit=6):
         """Get recent reviews for homepage"""
-        db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), db.DB_PATH)
-        conn = sqlite3.connect(db_path)
-        c = conn.cursor()
-        
-        c.execute("""
-            SELECT 
-                r.rating,
-                r.created_at,
-                giver.username as giver_name,
-                giver.display_name as giver_display,
-                giver.avatar_url as giver_avatar,
-                receiver.username as receiver_name,
-                receiver.display_name as receiver_display,
-                receiver.avatar_url as receiver_avatar
-            FROM reviews r
-            LEFT JOIN users giver ON r.giver_id = giver.user_id
-            LEFT JOIN users receiver ON r.receiver_id = receiver.user_id
-            ORDER BY r.created_at DESC
-            LIMIT ?
-        """, (limit,))
-        
         recent_reviews = []
-        for row in c.fetchall():
+        for review in get_storage().get_recent_reviews(limit):
             recent_reviews.append({
-                'rating': row[0],
-                'created_at': row[1],
-                'giver_name': row[3] or row[2] or f'User',
-                'giver_avatar': row[4],
-                'receiver_name': row[6] or row[5] or f'User',
-                'receiver_avatar': row[7]
+                'rating': review.rating,
+                'created_at': review.created_at,
+                'giver_name': review.giver_display or review.giver_name or f'User',
+                'giver_avatar': review.giver_avatar,
+                'receiver_name': review.receiver_display or review.receiver_name or f'User',
+                'receiver_avatar': review.receiver_avatar
             })
-        
-        conn.close()
         return recent_reviews
 
+    @named_query
     def search_users_in_database(self, query):
         """Search users in database by username, display_name, or user_id"""
-        db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), db.DB_PATH)
-        conn = sqlite3.connect(db_path)
-        c = conn.cursor()
-        
-        # Search by username, display_name, or user_id
-        search_query = f"%{query}%"
-        
-        # Check if query is a number (user_id search)
-        if query.isdigit():
-            c.execute("""
-                SELECT 
-                    u.user_id,
-                    u.username,
-                    u.display_name,
-                    u.avatar_url,
-                    u.banner_url,
-                    u.accent_color,
-                    u.public_flags,
-                    u.is_in_server,
-                    u.left_at,
-                    u.roles,
-                    u.badges,
-                    COALESCE(AVG(r_received.rating), 0) as avg_rating,
-                    COALESCE(COUNT(r_received.id), 0) as total_reviews,
-                    COALESCE(COUNT(r_given.id), 0) as reviews_given
-                FROM users u
-                LEFT JOIN reviews r_received ON u.user_id = r_received.receiver_id
-                LEFT JOIN reviews r_given ON u.user_id = r_given.giver_id
-                WHERE u.user_id = ? OR u.username LIKE ? OR u.display_name LIKE ?
-                GROUP BY u.user_id, u.username, u.display_name, u.avatar_url, u.banner_url, 
-                         u.accent_color, u.public_flags, u.is_in_server, u.left_at, u.roles, u.badges
-                ORDER BY u.is_in_server DESC, COALESCE(AVG(r_received.rating), 0) DESC, u.username ASC
-            """, (int(query), search_query, search_query))
-        else:
-            c.execute("""
-                SELECT 
-                    u.user_id,
-                    u.username,
-                    u.display_name,
-                    u.avatar_url,
-                    u.banner_url,
-                    u.accent_color,
-                    u.public_flags,
-                    u.is_in_server,
-                    u.left_at,
-                    u.roles,
-                    u.badges,
-                    COALESCE(AVG(r_received.rating), 0) as avg_rating,
-                    COALESCE(COUNT(r_received.id), 0) as total_reviews,
-                    COALESCE(COUNT(r_given.id), 0) as reviews_given
-                FROM users u
-                LEFT JOIN reviews r_received ON u.user_id = r_received.receiver_id
-                LEFT JOIN reviews r_given ON u.user_id = r_given.giver_id
-                WHERE u.username LIKE ? OR u.display_name LIKE ?
-                GROUP BY u.user_id, u.username, u.display_name, u.avatar_url, u.banner_url, 
-                         u.accent_color, u.public_flags, u.is_in_server, u.left_at, u.roles, u.badges
-                ORDER BY u.is_in_server DESC, COALESCE(AVG(r_received.rating), 0) DESC, u.username ASC
-            """, (search_query, search_query))
-        
-        users_data = []
-        for row in c.fetchall():
-            # Parse JSON data
-            roles = json.loads(row[9]) if row[9] else []
-            badges = json.loads(row[10]) if row[10] else []
-            
-            users_data.append({
-                'user_id': row[0],
-                'username': row[1],
-                'display_name': row[2],
-                'avatar_url': row[3],
-                'banner_url': row[4],
-                'accent_color': row[5],
-                'public_flags': row[6],
-                'is_in_server': bool(row[7]),
-                'left_at': row[8],
-                'roles': roles,
-                'badges': badges,
-                'avg_rating': float(row[11]),
-                'total_reviews': row[12],
-                'reviews_given': row[13]
-            })
-        
-        conn.close()
-        return users_data
+        return get_storage().list_user_activity(search=query)
     
     async def sync_guild_members(self, enhanced=False):
         """Sync all guild members to database with optional enhanced profile data"""
@@ -717,9 +509,9 @@ class WebDashboard(commands.Cog):
             current_member_ids = set()
             
             if enhanced:
-                print(f"🔄 Syncing {guild.member_count} members from {guild.name} with enhanced data...")
+                log.info("Syncing %s members from %s with enhanced data", guild.member_count, guild.name)
             else:
-                print(f"🔄 Syncing {guild.member_count} members from {guild.name} (basic info)...")
+                log.info("Syncing %s members from %s (basic info)", guild.member_count, guild.name)
             
             # Process all members
             enhanced_count = 0
@@ -742,7 +534,7 @@ class WebDashboard(commands.Cog):
                     try:
                         # Rate limiting
                         if i > 0 and i % 20 == 0:
-                            print(f"⏳ Processed {i}/{len(guild.members)} members...")
+                            log.debug("Processed %d/%d members", i, len(guild.members))
                             await asyncio.sleep(3)
                         
                         # Fetch enhanced user data
@@ -760,7 +552,7 @@ class WebDashboard(commands.Cog):
                             
                     except discord.HTTPException as e:
                         if e.status == 429:  # Rate limited
-                            print(f"⚠️  Rate limited, waiting...")
+                            log.warning("Rate limited during member sync, waiting")
                             await asyncio.sleep(10)
                             continue
                     except Exception:
@@ -768,7 +560,7 @@ class WebDashboard(commands.Cog):
                         pass
                 
                 # Update database
-                db.upsert_user(
+                get_storage().upsert_user(
                     user_id=member.id,
                     username=member.name,
                     display_name=member.display_name,
@@ -783,28 +575,29 @@ class WebDashboard(commands.Cog):
                 )
             
             # Mark users who left the server
-            all_db_users = db.get_all_users()
+            all_db_users = get_storage().get_all_users()
             left_count = 0
             for user in all_db_users:
-                if user['is_in_server'] and user['user_id'] not in current_member_ids:
-                    db.mark_user_left(user['user_id'])
+                if user.is_in_server and user.user_id not in current_member_ids:
+                    get_storage().mark_user_left(user.user_id)
                     left_count += 1
             
             if enhanced:
-                print(f"✅ Synced {len(current_member_ids)} members ({enhanced_count} with enhanced data), marked {left_count} as left")
+                log.info("Synced %d members (%d with enhanced data), marked %d as left",
+                         len(current_member_ids), enhanced_count, left_count)
             else:
-                print(f"✅ Synced {len(current_member_ids)} members (basic info), marked {left_count} as left")
+                log.info("Synced %d members (basic info), marked %d as left", len(current_member_ids), left_count)
+            metrics.member_syncs.inc(mode='enhanced' if enhanced else 'basic')
             return {'success': True, 'count': len(current_member_ids), 'enhanced': enhanced_count}
             
         except Exception as e:
-            print(f"❌ Sync error: {e}")
+            log.exception("Member sync failed")
             return {'success': False, 'error': str(e)}
     
     def start_flask(self):
         """Start Flask server in a separate thread"""
         def run_flask():
-            print("🌐 Starting integrated web dashboard...")
-            print("📊 Dashboard available at http://localhost:5000")
+            log.info("Starting integrated web dashboard at http://localhost:5000")
             self.app.run(debug=False, host='0.0.0.0', port=5000, use_reloader=False)
         
         self.flask_thread = threading.Thread(target=run_flask, daemon=True)
@@ -821,7 +614,7 @@ class WebDashboard(commands.Cog):
             await self.bot.wait_until_ready()
             await asyncio.sleep(3)  # Give Flask time to start
             
-            print("🔄 Auto-syncing guild members (basic info)...")
+            log.info("Auto-syncing guild members (basic info)")
             await self.sync_guild_members(enhanced=False)  # Only basic sync on startup
     
     @commands.Cog.listener()
@@ -853,7 +646,7 @@ class WebDashboard(commands.Cog):
         role_data = self.get_role_data(member)
         roles_json = json.dumps(role_data) if role_data else None
         
-        db.upsert_user(
+        get_storage().upsert_user(
             user_id=member.id,
             username=member.name,
             display_name=member.display_name,
@@ -866,13 +659,13 @@ class WebDashboard(commands.Cog):
             roles=roles_json,
             badges=badges_json
         )
-        print(f"👋 Added new member: {member.display_name} ({member.id})")
+        log.info("Added new member: %s (%s)", member.display_name, member.id)
     
     @commands.Cog.listener()
     async def on_member_remove(self, member):
         """Called when a member leaves the guild"""
-        db.mark_user_left(member.id)
-        print(f"👋 Marked member as left: {member.display_name} ({member.id})")
+        get_storage().mark_user_left(member.id)
+        log.info("Marked member as left: %s (%s)", member.display_name, member.id)
     
     @commands.Cog.listener()
     async def on_member_update(self, before, after):
@@ -908,7 +701,7 @@ class WebDashboard(commands.Cog):
             except:
                 pass
             
-            db.upsert_user(
+            get_storage().upsert_user(
                 user_id=after.id,
                 username=after.name,
                 display_name=after.display_name,
@@ -0,0 +1,75 @@
+"""
+Admin checks shared by the slash commands and the dashboards.
+
+A user is an admin when their ID is in `admin_ids` or they hold a role in
+`admin_role_ids` (config.yaml). The bot checks the member's live roles.
+The dashboards check the user logged in through Discord OAuth, with the
+roles stored by the last member sync.
+
+Dashboard routes that expose internals or change runtime state need an admin
+session (`admin_required`):
+- `/api/query_stats` (SQL text; can dump or reset the stats)
+- `/api/loop_blockers` (stack traces)
+- `/api/events` (audit trail)
+- `/api/profiling` (profiler switch)
+
+The counter-only routes (`/metrics`, `/api/*_stats`, `/api/*_status`) stay
+open so scrapers and health checks work. Keep the dashboard port local or
+behind a proxy if even those counts shouldn't be public.
+"""
+import functools
+import json
+import os
+from typing import Iterable, Optional
+
+import yaml
+
+from utils.storage import get_storage
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'config.yaml')
+
+
+def load_config() -> dict:
+    try:
+        with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+            return yaml.safe_load(f) or {}
+    except FileNotFoundError:
+        return {}
+
+
+def is_admin_id(user_id: int, role_ids: Iterable[int], config: Optional[dict] = None) -> bool:
+    """Check a user ID and role IDs against admin_ids / admin_role_ids."""
+    config = load_config() if config is None else config
+    if user_id in config.get("admin_ids", []):
+        return True
+    admin_role_ids = set(config.get("admin_role_ids", []))
+    return any(role_id in admin_role_ids for role_id in role_ids)
+
+
+def session_admin_id() -> Optional[int]:
+    """The ID of the admin logged in to the current dashboard request, or None."""
+    from flask import session
+    user = session.get('user')
+    if not user:
+        return None
+    try:
+        user_id = int(user['id'])
+    except (KeyError, TypeError, ValueError):
+        return None
+    stored = get_storage().get_user(user_id)
+    try:
+        role_ids = [int(role['id']) for role in json.loads(stored.roles or '[]')] if stored else []
+    except (TypeError, ValueError, KeyError):
+        role_ids = []
+    return user_id if is_admin_id(user_id, role_ids) else None
+
+
+def admin_required(view):
+    """Flask view decorator: 403 unless the request comes from an admin session."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        from flask import jsonify
+        if session_admin_id() is None:
+            return jsonify({'status': 'error', 'message': 'Admin login required'}), 403
+        return view(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,151 @@
+"""
+Hot/cold archival of closed threads and old reviews.
+
+Archived threads older than `thread_days`, and optionally reviews older than
+`review_days` on threads that are no longer open, are moved from rep.db into
+rep_archive.db. That keeps the hot tables small enough to stay in the page
+cache. Lifetime stats come from `user_stats`, which is not touched, so
+averages and counts stay correct. Queries that need everything use
+`db.attach_history()` to read through the `all_reviews` / `all_threads` views.
+
+The maintenance scheduler runs the job during quiet hours when
+`archive.enabled` is set in config.yaml. To run it by hand:
+`python -m utils.archive`.
+"""
+import argparse
+import os
+import sqlite3
+import time
+from typing import Optional
+
+import yaml
+
+from utils import db
+from utils.instrumentation import named_query
+from utils.records import Review, Thread
+
+CONFIG_PATH = os.path.join(db.ROOT_DIR, 'data', 'config.yaml')
+
+DEFAULT_SETTINGS = {
+    'enabled': False,
+    'thread_days': 180,     # archive closed threads older than this
+    'review_days': None,    # also archive reviews older than this (None = keep all reviews hot)
+    'batch_size': 500,
+}
+
+_settings: Optional[dict] = None
+
+
+def get_settings() -> dict:
+    """
+    Archive settings, loaded once from the `archive` section of config.yaml.
+    """
+    global _settings
+    if _settings is None:
+        try:
+            with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+                config = yaml.safe_load(f) or {}
+        except FileNotFoundError:
+            config = {}
+        _settings = {**DEFAULT_SETTINGS, **(config.get("archive") or {})}
+    return _settings
+
+
+def _move(conn: sqlite3.Connection, table: str, key: str, columns: str,
+          where: str, params: tuple, batch_size: int) -> int:
+    """Copy matching rows into archive.<table> and delete them from main, one batch per transaction."""
+    c = conn.cursor()
+    moved = 0
+    while True:
+        c.execute(f"SELECT {key} FROM main.{table} WHERE {where} LIMIT ?", params + (batch_size,))
+        keys = [row[0] for row in c.fetchall()]
+        if not keys:
+            return moved
+        placeholders = ", ".join("?" * len(keys))
+        # INSERT OR REPLACE keeps a re-run idempotent if a previous run was
+        # interrupted between the two files committing.
+        c.execute(f"""
+            INSERT OR REPLACE INTO archive.{table} ({columns})
+            SELECT {columns} FROM main.{table} WHERE {key} IN ({placeholders})
+        """, keys)
+        c.execute(f"DELETE FROM main.{table} WHERE {key} IN ({placeholders})", keys)
+        conn.commit()
+        moved += len(keys)
+
+
+@named_query
+def archive_old_data(thread_days: Optional[int] = None, review_days: Optional[int] = None,
+                     batch_size: Optional[int] = None) -> dict:
+    """
+    Move cold threads (and optionally cold reviews) into the archive database.
+    Returns counts and timing for the maintenance metrics.
+    """
+    settings = get_settings()
+    thread_days = settings['thread_days'] if thread_days is None else thread_days
+    review_days = settings['review_days'] if review_days is None else review_days
+    batch_size = batch_size or settings['batch_size']
+
+    started = time.perf_counter()
+    conn = db.connect()
+    try:
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        pages_before = conn.execute("PRAGMA page_count").fetchone()[0] - conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+        conn.execute("ATTACH DATABASE ? AS archive", (db.resolve_db_path(db.ARCHIVE_PATH),))
+        db.ensure_archive_schema(conn.cursor())
+        conn.commit()
+
+        threads_moved = _move(
+            conn, 'threads', 'thread_id', Thread.COLUMNS,
+            "state = 'closed' AND created_at < datetime('now', ?)",
+            (f"-{int(thread_days)} days",), batch_size
+        )
+
+        reviews_moved = 0
+        if review_days:
+            # Only reviews on threads that are closed or already archived; an
+            # open thread keeps its reviews hot for duplicate checks.
+            reviews_moved = _move(
+                conn, 'reviews', 'id', Review.COLUMNS,
+                "created_at < datetime('now', ?) "
+                "AND thread_id NOT IN (SELECT thread_id FROM main.threads WHERE state != 'closed')",
+                (f"-{int(review_days)} days",), batch_size
+            )
+
+        pages_after = conn.execute("PRAGMA page_count").fetchone()[0] - conn.execute("PRAGMA freelist_count").fetchone()[0]
+    finally:
+        conn.close()
+
+    return {
+        'duration_ms': round((time.perf_counter() - started) * 1000, 1),
+        'threads_moved': threads_moved,
+        'reviews_moved': reviews_moved,
+        # Pages freed in rep.db; the quiet-hours vacuum returns them to the filesystem
+        'bytes_reclaimed': max(0, pages_before - pages_after) * page_size,
+    }
+
+
+def main() -> int:
+    settings = get_settings()
+
+    parser = argparse.ArgumentParser(description="Move closed threads and old reviews into rep_archive.db.")
+    parser.add_argument("--thread-days", type=int, default=settings['thread_days'],
+                        help="Archive closed threads created more than this many days ago")
+    parser.add_argument("--review-days", type=int, default=settings['review_days'],
+                        help="Also archive reviews older than this many days")
+    parser.add_argument("--rebuild-stats", action="store_true",
+                        help="Recompute user_stats from hot and archived reviews afterwards")
+    args = parser.parse_args()
+
+    db.init_db()
+    result = archive_old_data(thread_days=args.thread_days, review_days=args.review_days)
+    print(f"[ARCHIVE] Moved {result['threads_moved']} threads and {result['reviews_moved']} reviews "
+          f"in {result['duration_ms']:.0f}ms")
+    if args.rebuild_stats:
+        db.rebuild_user_stats()
+        print("[ARCHIVE] Rebuilt user_stats")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,28 +1,87 @@
+import logging
+import os
 import sqlite3
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
+import yaml
+from utils.instrumentation import InstrumentedConnection, named_query
+from utils.records import Event, OutboxMessage, RecentReview, Review, Thread, TOSGate, User, UserActivity
 
 DB_PATH = 'data/rep.db'
+ARCHIVE_PATH = 'data/rep_archive.db'
 
-def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    
-    # New reviews table to replace the old rep system
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS reviews (
-            id          INTEGER PRIMARY KEY AUTOINCREMENT,
-            giver_id    INTEGER NOT NULL,
-            receiver_id INTEGER NOT NULL,
-            thread_id   INTEGER NOT NULL,
-            rating      INTEGER NOT NULL CHECK(rating >= 1 AND rating <= 10),
-            notes       TEXT,
-            created_at  TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            UNIQUE(giver_id, receiver_id, thread_id)
-        )
-    """)
-    
-    # Users table to store all server members
+log = logging.getLogger(__name__)
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Schema name the users database is attached under in split-file mode
+USERS_SCHEMA = 'users_db'
+
+def _load_users_db_path() -> Optional[str]:
+    try:
+        with open(os.path.join(ROOT_DIR, 'data', 'config.yaml'), 'r', encoding='utf-8') as f:
+            config = yaml.safe_load(f) or {}
+    except FileNotFoundError:
+        return None
+    return (config.get("storage") or {}).get("users_db") or None
+
+# Optional separate file for the users table (the member profile cache). When
+# set, member syncs write to that file alone and never hold the rep.db write
+# lock that review commits need. None keeps users inside rep.db.
+USERS_DB_PATH: Optional[str] = _load_users_db_path()
+
+def resolve_db_path(path: Optional[str] = None) -> str:
+    """
+    Resolve a database path against the project root so the bot and the
+    standalone dashboard open the same file regardless of working directory.
+    `file:` URIs are returned unchanged.
+    """
+    path = path or DB_PATH
+    if path.startswith('file:') or path == ':memory:' or os.path.isabs(path):
+        return path
+    return os.path.join(ROOT_DIR, path)
+
+def connect(path: Optional[str] = None) -> sqlite3.Connection:
+    """
+    Open an instrumented connection to the database (see utils.instrumentation).
+
+    In split-file mode the users database is attached to connections on the
+    main database, so unqualified `users` in joins resolves to it.
+    """
+    resolved = resolve_db_path(path)
+    conn = sqlite3.connect(resolved, factory=InstrumentedConnection, uri=resolved.startswith('file:'))
+    if USERS_DB_PATH and path is None:
+        conn.execute(f"ATTACH DATABASE ? AS {USERS_SCHEMA}", (resolve_db_path(USERS_DB_PATH),))
+    return conn
+
+def connect_users() -> sqlite3.Connection:
+    """
+    Open a connection for work that only touches the users table. In
+    split-file mode this opens the users database alone.
+    """
+    if USERS_DB_PATH:
+        path = resolve_db_path(USERS_DB_PATH)
+        return sqlite3.connect(path, factory=InstrumentedConnection, uri=path.startswith('file:'))
+    return connect()
+
+def attach_history(conn: sqlite3.Connection) -> str:
+    """
+    Give a connection access to full history: attach the archive database
+    (if one exists) and create temp views `all_reviews` and `all_threads`
+    spanning hot and archived rows. Returns the reviews view name.
+    """
+    archive_path = resolve_db_path(ARCHIVE_PATH)
+    has_archive = os.path.exists(archive_path)
+    if has_archive:
+        conn.execute("ATTACH DATABASE ? AS archive", (archive_path,))
+    for view, table, columns in (('all_reviews', 'reviews', Review.COLUMNS),
+                                 ('all_threads', 'threads', Thread.COLUMNS)):
+        archived = f" UNION ALL SELECT {columns} FROM archive.{table}" if has_archive else ""
+        conn.execute(f"CREATE TEMP VIEW IF NOT EXISTS {view} AS SELECT {columns} FROM main.{table}{archived}")
+    return 'all_reviews'
+
+def _create_users_table(c: sqlite3.Cursor):
     c.execute("""
         CREATE TABLE IF NOT EXISTS users (
             user_id     INTEGER PRIMARY KEY,
@@ -40,40 +99,131 @@ def init_db():
             last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     """)
-    
-    # Threads table to store Discord thread information
+
+def _init_users_db(c: sqlite3.Cursor):
+    """
+    Create the users table in its own database file and move any existing
+    rows out of rep.db. Once main.users is dropped, unqualified `users`
+    resolves to the attached users database.
+    """
+    users_conn = connect_users()
+    users_conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    users_conn.execute("PRAGMA journal_mode = WAL")
+    _create_users_table(users_conn.cursor())
+    users_conn.commit()
+    users_conn.close()
+
+    c.execute("SELECT 1 FROM main.sqlite_master WHERE type = 'table' AND name = 'users'")
+    if c.fetchone():
+        c.execute(f"""
+            INSERT OR REPLACE INTO {USERS_SCHEMA}.users ({User.COLUMNS}, last_updated)
+            SELECT {User.COLUMNS}, last_updated FROM main.users
+        """)
+        moved = c.rowcount
+        c.execute("DROP TABLE main.users")
+        log.info("Moved %d users into %s", moved, USERS_DB_PATH)
+
+def _add_thread_state_columns(c: sqlite3.Cursor, schema: str) -> bool:
+    """
+    Add the lifecycle state columns to `schema`.threads if they are missing.
+    Returns True when they were added.
+    """
+    c.execute(f"PRAGMA {schema}.table_info(threads)")
+    if 'state' in {row[1] for row in c.fetchall()}:
+        return False
+    for column in ("state TEXT NOT NULL DEFAULT 'open'", "review_count INTEGER NOT NULL DEFAULT 0",
+                   "state_changed_at TIMESTAMP NULL", "opened_at TIMESTAMP NULL",
+                   "reviewed_at TIMESTAMP NULL", "closed_at TIMESTAMP NULL"):
+        c.execute(f"ALTER TABLE {schema}.threads ADD COLUMN {column}")
+    return True
+
+def ensure_archive_schema(c: sqlite3.Cursor):
+    """
+    Create the tables of the archive database, attached as `archive`.
+    """
     c.execute("""
-        CREATE TABLE IF NOT EXISTS threads (
+        CREATE TABLE IF NOT EXISTS archive.reviews (
+            id          INTEGER PRIMARY KEY,
+            giver_id    INTEGER NOT NULL,
+            receiver_id INTEGER NOT NULL,
+            thread_id   INTEGER NOT NULL,
+            rating      INTEGER NOT NULL,
+            notes       TEXT,
+            created_at  TIMESTAMP
+        )
+    """)
+    c.execute("CREATE INDEX IF NOT EXISTS archive.idx_archive_reviews_receiver ON reviews(receiver_id, created_at)")
+    c.execute("CREATE INDEX IF NOT EXISTS archive.idx_archive_reviews_giver ON reviews(giver_id, created_at)")
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS archive.threads (
             thread_id   INTEGER PRIMARY KEY,
             channel_id  INTEGER NOT NULL,
             guild_id    INTEGER NOT NULL,
             name        TEXT NOT NULL,
             owner_id    INTEGER NOT NULL,
-            created_at  TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            archived    BOOLEAN DEFAULT FALSE,
-            locked      BOOLEAN DEFAULT FALSE,
+            created_at  TIMESTAMP,
+            archived    BOOLEAN,
+            locked      BOOLEAN,
             jump_url    TEXT NOT NULL,
             auto_close_scheduled TIMESTAMP NULL,
-            auto_close_cancelled BOOLEAN DEFAULT FALSE
+            auto_close_cancelled BOOLEAN
         )
     """)
+    if _add_thread_state_columns(c, 'archive'):
+        # Only closed threads are ever archived
+        c.execute("UPDATE archive.threads SET state = 'closed'")
+
+@named_query
+def init_db():
+    conn = connect()
+    c = conn.cursor()
+
+    # Incremental auto-vacuum only applies to a brand-new database; older
+    # databases are converted once by the maintenance scheduler.
+    c.execute("PRAGMA main.auto_vacuum = INCREMENTAL")
+    # WAL lets dashboard reads and backups run alongside bot writes
+    c.execute("PRAGMA main.journal_mode = WAL")
     
-    # Keep rep and rep_totals for backward compatibility, but they'll be deprecated
+    # New reviews table to replace the old rep system
     c.execute("""
-        CREATE TABLE IF NOT EXISTS rep (
-            giver_id    INTEGER,
-            receiver_id INTEGER,
-            thread_id   INTEGER,
-            rep_type    TEXT  CHECK(rep_type IN ('+', '-')),
+        CREATE TABLE IF NOT EXISTS reviews (
+            id          INTEGER PRIMARY KEY AUTOINCREMENT,
+            giver_id    INTEGER NOT NULL,
+            receiver_id INTEGER NOT NULL,
+            thread_id   INTEGER NOT NULL,
+            rating      INTEGER NOT NULL CHECK(rating >= 1 AND rating <= 10),
+            notes       TEXT,
+            created_at  TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             UNIQUE(giver_id, receiver_id, thread_id)
         )
     """)
     
+    # Users table to store all server members
+    if USERS_DB_PATH:
+        _init_users_db(c)
+    else:
+        _create_users_table(c)
+    
+    # Threads table to store Discord thread information
     c.execute("""
-        CREATE TABLE IF NOT EXISTS rep_totals (
-            user_id  INTEGER PRIMARY KEY,
-            positive INTEGER DEFAULT 0,
-            negative INTEGER DEFAULT 0
+        CREATE TABLE IF NOT EXISTS threads (
+            thread_id   INTEGER PRIMARY KEY,
+            channel_id  INTEGER NOT NULL,
+            guild_id    INTEGER NOT NULL,
+            name        TEXT NOT NULL,
+            owner_id    INTEGER NOT NULL,
+            created_at  TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            archived    BOOLEAN DEFAULT FALSE,
+            locked      BOOLEAN DEFAULT FALSE,
+            jump_url    TEXT NOT NULL,
+            auto_close_scheduled TIMESTAMP NULL,
+            auto_close_cancelled BOOLEAN DEFAULT FALSE,
+            state       TEXT NOT NULL DEFAULT 'open',
+            review_count INTEGER NOT NULL DEFAULT 0,
+            state_changed_at TIMESTAMP NULL,
+            opened_at   TIMESTAMP NULL,
+            reviewed_at TIMESTAMP NULL,
+            closed_at   TIMESTAMP NULL
         )
     """)
     
@@ -89,73 +239,213 @@ def init_db():
     except sqlite3.OperationalError:
         # Column already exists
         pass
+
+    # Lifecycle state columns (migration). Existing threads get a state and
+    # review count derived from their flags and reviews.
+    if _add_thread_state_columns(c, 'main'):
+        c.execute("""
+            UPDATE threads SET review_count = counts.n
+            FROM (SELECT thread_id, COUNT(*) AS n FROM reviews GROUP BY thread_id) AS counts
+            WHERE counts.thread_id = threads.thread_id
+        """)
+        c.execute("""
+            UPDATE threads SET state_changed_at = CURRENT_TIMESTAMP, state = CASE
+                WHEN archived THEN 'closed'
+                WHEN auto_close_scheduled IS NOT NULL AND NOT auto_close_cancelled THEN 'close_scheduled'
+                WHEN review_count > 0 THEN 'reviewed'
+                ELSE 'open'
+            END
+        """)
+        log.info("Added lifecycle state to existing threads")
+
+    # Auto-close scans and per-owner active thread lists read by state
+    c.execute("CREATE INDEX IF NOT EXISTS idx_threads_state ON threads(state, auto_close_scheduled)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_threads_owner_state ON threads(owner_id, state)")
+
+    # Every new review bumps the thread's review count and moves a
+    # tos_pending/open thread to reviewed, in the same transaction
+    c.execute("""
+        CREATE TRIGGER IF NOT EXISTS reviews_thread_state AFTER INSERT ON reviews
+        BEGIN
+            UPDATE threads SET
+                review_count = review_count + 1,
+                reviewed_at = COALESCE(reviewed_at, CURRENT_TIMESTAMP),
+                state_changed_at = CASE WHEN state IN ('tos_pending', 'open') THEN CURRENT_TIMESTAMP ELSE state_changed_at END,
+                state = CASE WHEN state IN ('tos_pending', 'open') THEN 'reviewed' ELSE state END
+            WHERE thread_id = NEW.thread_id;
+        END
+    """)
+
+    # Threads waiting on TOS acceptance; a row lives until the owner answers
+    # or the prompt expires, so pending gates survive a restart
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS tos_gates (
+            thread_id INTEGER PRIMARY KEY,
+            channel_id INTEGER NOT NULL,
+            op_id INTEGER NOT NULL,
+            message_id INTEGER,
+            prompted_at REAL NOT NULL,
+            expires_at REAL NOT NULL
+        )
+    """)
+
+    # The one review panel message each thread has, edited in place
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS review_panels (
+            thread_id INTEGER PRIMARY KEY,
+            message_id INTEGER NOT NULL
+        )
+    """)
+
+    # Log channel embeds and their event lists, keyed by a stable name
+    # ("thread:<id>" or "custom:<identifier>") so restarts find them again
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS log_messages (
+            log_key TEXT PRIMARY KEY,
+            channel_id INTEGER NOT NULL,
+            message_id INTEGER NOT NULL
+        )
+    """)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS log_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            log_key TEXT NOT NULL,
+            field TEXT NOT NULL,
+            event TEXT NOT NULL
+        )
+    """)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_log_events_key ON log_events(log_key, id)")
+
+    # Append-only audit trail; log channel embeds and the dashboard timeline
+    # are both rendered from these rows
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            type TEXT NOT NULL,
+            thread_id INTEGER,
+            actor_id INTEGER,
+            payload TEXT NOT NULL DEFAULT '{}',
+            created_at REAL NOT NULL
+        )
+    """)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_events_thread ON events(thread_id, id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_events_type ON events(type, id)")
+
+    # Messages waiting to be sent by the outbox dispatcher (cogs/logging.py);
+    # rows are deleted once sent, so a restart resumes where it stopped
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            channel_id INTEGER NOT NULL,
+            priority INTEGER NOT NULL DEFAULT 1,
+            content TEXT,
+            embed TEXT,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL,
+            created_at REAL NOT NULL
+        )
+    """)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox(next_attempt_at)")
+
+    # Keep an existing archive database's threads table in step with the schema
+    archive_path = resolve_db_path(ARCHIVE_PATH)
+    if os.path.exists(archive_path):
+        c.execute("ATTACH DATABASE ? AS archive", (archive_path,))
+        ensure_archive_schema(c)
+        conn.commit()
+        c.execute("DETACH DATABASE archive")
+
+    # Lifetime review aggregates per user. Kept up to date by a trigger so the
+    # stats stay correct after old reviews are moved to the archive database.
+    c.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'user_stats'")
+    backfill_stats = c.fetchone() is None
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS user_stats (
+            user_id          INTEGER PRIMARY KEY,
+            reviews_received INTEGER NOT NULL DEFAULT 0,
+            rating_sum       INTEGER NOT NULL DEFAULT 0,
+            reviews_given    INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    c.execute("""
+        CREATE TRIGGER IF NOT EXISTS reviews_user_stats AFTER INSERT ON reviews
+        BEGIN
+            INSERT INTO user_stats (user_id, reviews_received, rating_sum)
+            VALUES (NEW.receiver_id, 1, NEW.rating)
+            ON CONFLICT(user_id) DO UPDATE SET
+                reviews_received = reviews_received + 1,
+                rating_sum = rating_sum + NEW.rating;
+            INSERT INTO user_stats (user_id, reviews_given)
+            VALUES (NEW.giver_id, 1)
+            ON CONFLICT(user_id) DO UPDATE SET
+                reviews_given = reviews_given + 1;
+        END
+    """)
+    if backfill_stats:
+        _rebuild_user_stats(c, 'reviews')
     
     conn.commit()
     conn.close()
 
-def add_rep(giver_id: int, receiver_id: int, thread_id: int, rep_type: str) -> bool:
+def _rebuild_user_stats(c: sqlite3.Cursor, source: str):
     """
-    Records a rep from giver_id to receiver_id in a given thread.
-    Returns False if the same giver already rated this receiver in this thread.
+    Recompute user_stats from every review in `source` (a table or view name).
     """
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    try:
-        # insert the individual rep
-        c.execute(
-            "INSERT INTO rep (giver_id, receiver_id, thread_id, rep_type) VALUES (?, ?, ?, ?)",
-            (giver_id, receiver_id, thread_id, rep_type)
+    c.execute("DELETE FROM user_stats")
+    c.execute(f"""
+        INSERT INTO user_stats (user_id, reviews_received, rating_sum, reviews_given)
+        SELECT user_id, SUM(received), SUM(rating_sum), SUM(given)
+        FROM (
+            SELECT receiver_id AS user_id, COUNT(*) AS received, SUM(rating) AS rating_sum, 0 AS given
+            FROM {source} GROUP BY receiver_id
+            UNION ALL
+            SELECT giver_id, 0, 0, COUNT(*)
+            FROM {source} GROUP BY giver_id
         )
-        # bump the receiver’s total
-        if rep_type == '+':
-            c.execute(
-                "INSERT INTO rep_totals (user_id, positive, negative) VALUES (?, 1, 0) "
-                "ON CONFLICT(user_id) DO UPDATE SET positive = positive + 1",
-                (receiver_id,)
-            )
-        else:
-            c.execute(
-                "INSERT INTO rep_totals (user_id, positive, negative) VALUES (?, 0, 1) "
-                "ON CONFLICT(user_id) DO UPDATE SET negative = negative + 1",
-                (receiver_id,)
-            )
-        conn.commit()
-        return True
-    except sqlite3.IntegrityError:
-        return False
-    finally:
-        conn.close()
+        GROUP BY user_id
+    """)
 
-def get_user_rep(user_id: int) -> tuple[int,int]:
+@named_query
+def rebuild_user_stats() -> None:
     """
-    Fetch the total positive and negative rep for a given user (the receiver).
+    Recompute user_stats from scratch across hot and archived reviews.
     """
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect()
     c = conn.cursor()
-    c.execute("SELECT positive, negative FROM rep_totals WHERE user_id = ?", (user_id,))
-    row = c.fetchone()
+    _rebuild_user_stats(c, attach_history(conn))
+    conn.commit()
     conn.close()
-    return (row[0], row[1]) if row else (0, 0)
 
-def get_top_positive_rep(limit: int = 10) -> list[tuple[int,int]]:
-    """
-    Returns a list of (user_id, positive_count) sorted descending.
-    """
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT user_id, positive FROM rep_totals ORDER BY positive DESC LIMIT ?", (limit,))
-    results = c.fetchall()
-    conn.close()
-    return results
+# Profile columns plus lifetime review stats, shared by the dashboard user listings
+USER_ACTIVITY_SELECT = """
+    SELECT
+        u.user_id,
+        u.username,
+        u.display_name,
+        u.avatar_url,
+        u.banner_url,
+        u.accent_color,
+        u.public_flags,
+        u.is_in_server,
+        u.left_at,
+        u.roles,
+        u.badges,
+        COALESCE(CAST(s.rating_sum AS REAL) / NULLIF(s.reviews_received, 0), 0) AS avg_rating,
+        COALESCE(s.reviews_received, 0) AS total_reviews,
+        COALESCE(s.reviews_given, 0) AS reviews_given
+    FROM users u
+    LEFT JOIN user_stats s ON s.user_id = u.user_id
+"""
 
 # New review system functions
 
+@named_query
 def add_review(giver_id: int, receiver_id: int, thread_id: int, rating: int, notes: Optional[str] = None) -> bool:
     """
     Records a review from giver_id to receiver_id in a given thread.
     Returns False if the same giver already reviewed this receiver in this thread.
     """
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect()
     c = conn.cursor()
     try:
         c.execute(
@@ -169,69 +459,67 @@ def add_review(giver_id: int, receiver_id: int, thread_id: int, rating: int, not
     finally:
         conn.close()
 
-def get_user_reviews(user_id: int) -> Tuple[float, int, List[dict]]:
+@named_query
+def get_user_reviews(user_id: int, full_history: bool = False) -> Tuple[float, int, List[Review]]:
     """
     Get user's review statistics and latest reviews.
+    The stats always cover every review; with full_history the latest reviews
+    are also looked up in the archive database.
     Returns: (average_rating, total_reviews, latest_3_reviews)
     """
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect()
     c = conn.cursor()
+    reviews_table = attach_history(conn) if full_history else 'reviews'
     
     # Get average rating and total count
     c.execute("""
-        SELECT AVG(rating), COUNT(*) 
-        FROM reviews 
-        WHERE receiver_id = ?
+        SELECT CAST(rating_sum AS REAL) / NULLIF(reviews_received, 0), reviews_received
+        FROM user_stats 
+        WHERE user_id = ?
     """, (user_id,))
-    result = c.fetchone()
+    result = c.fetchone() or (None, 0)
     avg_rating = result[0] if result[0] else 0.0
     total_reviews = result[1]
     
     # Get latest 3 reviews
-    c.execute("""
-        SELECT giver_id, rating, notes, created_at 
-        FROM reviews 
+    c.row_factory = Review.from_row
+    c.execute(f"""
+        SELECT {Review.COLUMNS}
+        FROM {reviews_table} 
         WHERE receiver_id = ? 
         ORDER BY created_at DESC 
         LIMIT 3
     """, (user_id,))
-    
-    latest_reviews = []
-    for row in c.fetchall():
-        latest_reviews.append({
-            'giver_id': row[0],
-            'rating': row[1],
-            'notes': row[2],
-            'created_at': row[3]
-        })
+    latest_reviews = c.fetchall()
     
     conn.close()
     return (avg_rating, total_reviews, latest_reviews)
 
+@named_query
 def get_top_rated_users(limit: int = 10) -> List[Tuple[int, float, int]]:
     """
     Returns top rated users by average rating.
     Returns: [(user_id, avg_rating, total_reviews), ...]
     """
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect()
     c = conn.cursor()
     c.execute("""
-        SELECT receiver_id, AVG(rating), COUNT(*) 
-        FROM reviews 
-        GROUP BY receiver_id 
-        HAVING COUNT(*) >= 1
-        ORDER BY AVG(rating) DESC, COUNT(*) DESC 
+        SELECT user_id, CAST(rating_sum AS REAL) / reviews_received AS avg_rating, reviews_received 
+        FROM user_stats 
+        WHERE reviews_received >= 1
+        ORDER BY avg_rating DESC, reviews_received DESC 
         LIMIT ?
     """, (limit,))
     results = c.fetchall()
     conn.close()
     return results
 
+@named_query
 def has_user_reviewed(giver_id: int, receiver_id: int, thread_id: int) -> bool:
     """
     Check if a user has already reviewed another user in a specific thread.
     """
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect()
     c = conn.cursor()
     c.execute("""
         SELECT 1 FROM reviews 
@@ -243,13 +531,14 @@ def has_user_reviewed(giver_id: int, receiver_id: int, thread_id: int) -> bool:
 
 # User management functions
 
+@named_query
 def upsert_user(user_id: int, username: str, display_name: str = None, avatar_url: str = None, 
                 banner_url: str = None, accent_color: int = None, public_flags: int = None,
                 joined_at: str = None, is_in_server: bool = True, roles: str = None, badges: str = None) -> None:
     """
     Insert or update a user in the users table.
     """
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect_users()
     c = conn.cursor()
     c.execute("""
         INSERT INTO users (user_id, username, display_name, avatar_url, banner_url, accent_color, 
@@ -272,11 +561,12 @@ def upsert_user(user_id: int, username: str, display_name: str = None, avatar_ur
     conn.commit()
     conn.close()
 
+@named_query
 def mark_user_left(user_id: int) -> None:
     """
     Mark a user as having left the server.
     """
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect_users()
     c = conn.cursor()
     c.execute("""
         UPDATE users 
@@ -286,149 +576,676 @@ def mark_user_left(user_id: int) -> None:
     conn.commit()
     conn.close()
 
-def get_all_users() -> List[dict]:
+@named_query
+def get_all_users() -> List[User]:
     """
     Get all users from the database, including those who left the server.
     """
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect_users()
     c = conn.cursor()
-    c.execute("""
-        SELECT user_id, username, display_name, avatar_url, banner_url, accent_color, 
-               public_flags, joined_at, left_at, is_in_server, roles, badges
+    c.row_factory = User.from_row
+    c.execute(f"""
+        SELECT {User.COLUMNS}
         FROM users 
         ORDER BY is_in_server DESC, username ASC
     """)
-    users = []
-    for row in c.fetchall():
-        users.append({
-            'user_id': row[0],
-            'username': row[1],
-            'display_name': row[2],
-            'avatar_url': row[3],
-            'banner_url': row[4],
-            'accent_color': row[5],
-            'public_flags': row[6],
-            'joined_at': row[7],
-            'left_at': row[8],
-            'is_in_server': bool(row[9]),
-            'roles': row[10],
-            'badges': row[11]
-        })
+    users = c.fetchall()
+    conn.close()
+    return users
+
+@named_query
+def get_users_missing_profile(limit: int = 50) -> List[User]:
+    """
+    Members still in the server without enhanced profile data (no banner and
+    no badges), least recently updated first.
+    """
+    conn = connect_users()
+    c = conn.cursor()
+    c.row_factory = User.from_row
+    c.execute(f"""
+        SELECT {User.COLUMNS}
+        FROM users
+        WHERE is_in_server = TRUE
+        AND (banner_url IS NULL AND badges IS NULL)
+        ORDER BY last_updated ASC
+        LIMIT ?
+    """, (limit,))
+    users = c.fetchall()
     conn.close()
     return users
 
+@named_query
+def update_user_profile(user_id: int, banner_url: str = None, accent_color: int = None,
+                        public_flags: int = None, badges: str = None) -> None:
+    """
+    Update only the enhanced profile fields of a user.
+    """
+    conn = connect_users()
+    c = conn.cursor()
+    c.execute("""
+        UPDATE users
+        SET banner_url = ?, accent_color = ?, public_flags = ?, badges = ?,
+            last_updated = CURRENT_TIMESTAMP
+        WHERE user_id = ?
+    """, (banner_url, accent_color, public_flags, badges, user_id))
+    conn.commit()
+    conn.close()
+
 # Thread management functions
 
+# New threads start in tos_pending; archiving a thread moves it to closed
+UPSERT_THREAD_SQL = """
+    INSERT INTO threads (thread_id, channel_id, guild_id, name, owner_id, jump_url, archived, locked,
+                         state, state_changed_at, closed_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?,
+            CASE WHEN ? THEN 'closed' ELSE 'tos_pending' END, CURRENT_TIMESTAMP,
+            CASE WHEN ? THEN CURRENT_TIMESTAMP END)
+    ON CONFLICT(thread_id) DO UPDATE SET
+        name = ?,
+        archived = ?,
+        locked = ?,
+        jump_url = ?,
+        state_changed_at = CASE WHEN ? AND state != 'closed' THEN CURRENT_TIMESTAMP ELSE state_changed_at END,
+        closed_at = CASE WHEN ? AND state != 'closed' THEN CURRENT_TIMESTAMP ELSE closed_at END,
+        state = CASE WHEN ? THEN 'closed' ELSE state END
+"""
+
+def _upsert_thread_params(thread_id: int, channel_id: int, guild_id: int, name: str,
+                          owner_id: int, jump_url: str, archived: bool = False, locked: bool = False) -> tuple:
+    return (thread_id, channel_id, guild_id, name, owner_id, jump_url, archived, locked, archived, archived,
+            name, archived, locked, jump_url, archived, archived, archived)
+
+@named_query
 def upsert_thread(thread_id: int, channel_id: int, guild_id: int, name: str, 
                   owner_id: int, jump_url: str, archived: bool = False, locked: bool = False) -> None:
     """
     Insert or update a thread in the threads table.
+    New threads start in tos_pending; archiving a thread moves it to closed.
     """
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect()
     c = conn.cursor()
-    c.execute("""
-        INSERT INTO threads (thread_id, channel_id, guild_id, name, owner_id, jump_url, archived, locked) 
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ON CONFLICT(thread_id) DO UPDATE SET
-            name = ?,
-            archived = ?,
-            locked = ?,
-            jump_url = ?
-    """, (thread_id, channel_id, guild_id, name, owner_id, jump_url, archived, locked,
-          name, archived, locked, jump_url))
+    c.execute(UPSERT_THREAD_SQL, _upsert_thread_params(
+        thread_id, channel_id, guild_id, name, owner_id, jump_url, archived, locked
+    ))
     conn.commit()
     conn.close()
 
-def get_thread_info(thread_id: int) -> Optional[dict]:
+@named_query
+def upsert_threads(threads: List[tuple]) -> None:
+    """
+    upsert_thread for several threads in one transaction. Each tuple holds
+    upsert_thread's arguments in order.
+    """
+    conn = connect()
+    c = conn.cursor()
+    c.executemany(UPSERT_THREAD_SQL, [_upsert_thread_params(*thread) for thread in threads])
+    conn.commit()
+    conn.close()
+
+@named_query
+def get_thread_info(thread_id: int) -> Optional[Thread]:
     """
     Get thread information from the database.
     """
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect()
     c = conn.cursor()
-    c.execute("""
-        SELECT thread_id, channel_id, guild_id, name, owner_id, created_at, archived, locked, jump_url
+    c.row_factory = Thread.from_row
+    c.execute(f"""
+        SELECT {Thread.COLUMNS}
         FROM threads 
         WHERE thread_id = ?
     """, (thread_id,))
     result = c.fetchone()
     conn.close()
-    
-    if result:
-        return {
-            'thread_id': result[0],
-            'channel_id': result[1],
-            'guild_id': result[2],
-            'name': result[3],
-            'owner_id': result[4],
-            'created_at': result[5],
-            'archived': bool(result[6]),
-            'locked': bool(result[7]),
-            'jump_url': result[8]
-        }
-    return None
+    return result
 
+@named_query
 def schedule_thread_auto_close(thread_id: int, close_timestamp: float) -> None:
     """
     Schedule a thread for auto-close at the specified timestamp.
     """
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect()
     c = conn.cursor()
     c.execute("""
         UPDATE threads 
-        SET auto_close_scheduled = ?, auto_close_cancelled = FALSE
-        WHERE thread_id = ?
+        SET auto_close_scheduled = ?, auto_close_cancelled = FALSE,
+            state = 'close_scheduled', state_changed_at = CURRENT_TIMESTAMP
+        WHERE thread_id = ? AND state != 'closed'
     """, (datetime.fromtimestamp(close_timestamp), thread_id))
     conn.commit()
     conn.close()
 
+@named_query
 def cancel_thread_auto_close(thread_id: int) -> None:
     """
     Cancel the auto-close for a thread.
     """
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect()
     c = conn.cursor()
     c.execute("""
         UPDATE threads 
-        SET auto_close_cancelled = TRUE
+        SET auto_close_cancelled = TRUE,
+            state_changed_at = CASE WHEN state = 'close_scheduled' THEN CURRENT_TIMESTAMP ELSE state_changed_at END,
+            state = CASE WHEN state = 'close_scheduled' THEN 'reviewed' ELSE state END
         WHERE thread_id = ?
     """, (thread_id,))
     conn.commit()
     conn.close()
 
-def get_threads_to_auto_close() -> List[dict]:
+@named_query
+def get_threads_to_auto_close() -> List[Thread]:
     """
     Get threads that should be auto-closed (scheduled time has passed and not cancelled).
     """
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect()
     c = conn.cursor()
-    c.execute("""
-        SELECT thread_id, channel_id, guild_id, name, owner_id, jump_url
+    c.row_factory = Thread.from_row
+    # Range read on idx_threads_state; cancelling or closing moves a thread
+    # out of close_scheduled
+    c.execute(f"""
+        SELECT {Thread.COLUMNS}
         FROM threads 
-        WHERE auto_close_scheduled IS NOT NULL
+        WHERE state = 'close_scheduled'
         AND auto_close_scheduled <= CURRENT_TIMESTAMP
-        AND auto_close_cancelled = FALSE
-        AND archived = FALSE
     """)
-    threads = []
-    for row in c.fetchall():
-        threads.append({
-            'thread_id': row[0],
-            'channel_id': row[1],
-            'guild_id': row[2],
-            'name': row[3],
-            'owner_id': row[4],
-            'jump_url': row[5]
-        })
+    threads = c.fetchall()
     conn.close()
     return threads
 
+@named_query
+def get_active_thread_ids() -> List[int]:
+    """
+    IDs of every thread that isn't closed yet (idx_threads_state).
+    """
+    conn = connect()
+    c = conn.cursor()
+    c.execute("""
+        SELECT thread_id FROM threads
+        WHERE state IN ('tos_pending', 'open', 'reviewed', 'close_scheduled')
+    """)
+    thread_ids = [row[0] for row in c.fetchall()]
+    conn.close()
+    return thread_ids
+
+@named_query
+def count_threads_by_state(conn: Optional[sqlite3.Connection] = None) -> Dict[str, int]:
+    """
+    Number of stored threads in each lifecycle state (covered by idx_threads_state).
+    """
+    with _reading(conn) as conn:
+        c = conn.cursor()
+        c.execute("SELECT state, COUNT(*) FROM threads GROUP BY state")
+        return dict(c.fetchall())
+
+@named_query
+def set_thread_state(thread_id: int, state: str) -> None:
+    """
+    Move a thread to a lifecycle state (see Thread.TOS_PENDING etc.) and
+    stamp the transition. Closed threads stay closed.
+    """
+    conn = connect()
+    c = conn.cursor()
+    c.execute("""
+        UPDATE threads
+        SET state = ?,
+            state_changed_at = CURRENT_TIMESTAMP,
+            opened_at = CASE WHEN ? = 'open' THEN COALESCE(opened_at, CURRENT_TIMESTAMP) ELSE opened_at END,
+            closed_at = CASE WHEN ? = 'closed' THEN CURRENT_TIMESTAMP ELSE closed_at END
+        WHERE thread_id = ? AND state != ? AND state != 'closed'
+    """, (state, state, state, thread_id, state))
+    conn.commit()
+    conn.close()
+
+def _thread_review_count(c: sqlite3.Cursor, thread_id: int) -> int:
+    c.execute("SELECT review_count FROM threads WHERE thread_id = ?", (thread_id,))
+    row = c.fetchone()
+    if row is None:
+        # Threads the bot never saw created have no row to keep a count on
+        c.execute("SELECT COUNT(*) FROM reviews WHERE thread_id = ?", (thread_id,))
+        row = c.fetchone()
+    return row[0]
+
+@named_query
+def get_thread_review_count(thread_id: int) -> int:
+    """
+    Number of reviews left in a thread (kept on the thread row by a trigger).
+    """
+    conn = connect()
+    count = _thread_review_count(conn.cursor(), thread_id)
+    conn.close()
+    return count
+
+@named_query
+def add_tos_gate(thread_id: int, channel_id: int, op_id: int, message_id: Optional[int],
+                 prompted_at: float, expires_at: float) -> None:
+    """
+    Record that a thread is waiting on TOS acceptance until expires_at.
+    """
+    conn = connect()
+    c = conn.cursor()
+    c.execute(f"""
+        INSERT OR REPLACE INTO tos_gates ({TOSGate.COLUMNS})
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (thread_id, channel_id, op_id, message_id, prompted_at, expires_at))
+    conn.commit()
+    conn.close()
+
+@named_query
+def get_tos_gates() -> List[TOSGate]:
+    """
+    Every pending TOS gate, soonest to expire first.
+    """
+    conn = connect()
+    c = conn.cursor()
+    c.row_factory = TOSGate.from_row
+    c.execute(f"SELECT {TOSGate.COLUMNS} FROM tos_gates ORDER BY expires_at")
+    gates = c.fetchall()
+    conn.close()
+    return gates
+
+@named_query
+def delete_tos_gates(thread_ids: List[int]) -> None:
+    """
+    Drop the TOS gates of threads that were answered or expired.
+    """
+    conn = connect()
+    c = conn.cursor()
+    c.executemany("DELETE FROM tos_gates WHERE thread_id = ?", [(t,) for t in thread_ids])
+    conn.commit()
+    conn.close()
+
+@named_query
+def get_review_panel(thread_id: int) -> Optional[int]:
+    """
+    Message ID of the thread's review panel, if one was posted.
+    """
+    conn = connect()
+    c = conn.cursor()
+    c.execute("SELECT message_id FROM review_panels WHERE thread_id = ?", (thread_id,))
+    row = c.fetchone()
+    conn.close()
+    return row[0] if row else None
+
+@named_query
+def set_review_panel(thread_id: int, message_id: int) -> None:
+    """
+    Remember the message that holds the thread's review panel.
+    """
+    conn = connect()
+    c = conn.cursor()
+    c.execute("""
+        INSERT INTO review_panels (thread_id, message_id) VALUES (?, ?)
+        ON CONFLICT(thread_id) DO UPDATE SET message_id = excluded.message_id
+    """, (thread_id, message_id))
+    conn.commit()
+    conn.close()
+
+@named_query
+def get_log_message(log_key: str) -> Optional[Tuple[int, int]]:
+    """
+    (channel_id, message_id) of a log embed, if one was posted.
+    """
+    conn = connect()
+    c = conn.cursor()
+    c.execute("SELECT channel_id, message_id FROM log_messages WHERE log_key = ?", (log_key,))
+    row = c.fetchone()
+    conn.close()
+    return row
+
+@named_query
+def set_log_message(log_key: str, channel_id: int, message_id: int) -> None:
+    """
+    Remember which message holds a log embed.
+    """
+    conn = connect()
+    c = conn.cursor()
+    c.execute("""
+        INSERT INTO log_messages (log_key, channel_id, message_id) VALUES (?, ?, ?)
+        ON CONFLICT(log_key) DO UPDATE SET channel_id = excluded.channel_id, message_id = excluded.message_id
+    """, (log_key, channel_id, message_id))
+    conn.commit()
+    conn.close()
+
+@named_query
+def get_log_events(log_key: str) -> List[Tuple[str, str]]:
+    """
+    (field, event) pairs logged against a log embed, oldest first.
+    """
+    conn = connect()
+    c = conn.cursor()
+    c.execute("SELECT field, event FROM log_events WHERE log_key = ? ORDER BY id", (log_key,))
+    events = c.fetchall()
+    conn.close()
+    return events
+
+@named_query
+def add_log_events(events: List[tuple]) -> None:
+    """
+    Append a batch of (log_key, field, event) lines to log embed histories
+    in one transaction.
+    """
+    conn = connect()
+    c = conn.cursor()
+    c.executemany("INSERT INTO log_events (log_key, field, event) VALUES (?, ?, ?)", events)
+    conn.commit()
+    conn.close()
+
+@named_query
+def append_events(events: List[tuple]) -> None:
+    """
+    Append a batch of (type, thread_id, actor_id, payload_json, created_at)
+    rows to the audit trail in one transaction.
+    """
+    conn = connect()
+    c = conn.cursor()
+    c.executemany("""
+        INSERT INTO events (type, thread_id, actor_id, payload, created_at)
+        VALUES (?, ?, ?, ?, ?)
+    """, events)
+    conn.commit()
+    conn.close()
+
+@named_query
+def get_events(thread_id: Optional[int] = None, event_type: Optional[str] = None,
+               before_id: Optional[int] = None, limit: int = 50,
+               conn: Optional[sqlite3.Connection] = None) -> List[Event]:
+    """
+    Audit events, newest first. Pass the last id of a page as `before_id`
+    to get the next one.
+    """
+    where, params = [], []
+    if thread_id is not None:
+        where.append("thread_id = ?")
+        params.append(thread_id)
+    if event_type is not None:
+        where.append("type = ?")
+        params.append(event_type)
+    if before_id is not None:
+        where.append("id < ?")
+        params.append(before_id)
+    clause = f"WHERE {' AND '.join(where)}" if where else ""
+    with _reading(conn) as conn:
+        c = conn.cursor()
+        c.row_factory = Event.from_row
+        c.execute(f"SELECT {Event.COLUMNS} FROM events {clause} ORDER BY id DESC LIMIT ?", (*params, limit))
+        return c.fetchall()
+
+@named_query
+def add_outbox_messages(messages: List[tuple]) -> None:
+    """
+    Queue a batch of (channel_id, priority, content, embed, created_at) rows
+    for the outbox dispatcher in one transaction. `embed` is the JSON of
+    `discord.Embed.to_dict()`.
+    """
+    conn = connect()
+    c = conn.cursor()
+    c.executemany("""
+        INSERT INTO outbox (channel_id, priority, content, embed, next_attempt_at, created_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, [(channel_id, priority, content, embed, created_at, created_at)
+          for channel_id, priority, content, embed, created_at in messages])
+    conn.commit()
+    conn.close()
+
+@named_query
+def get_due_outbox_messages(now: float, limit: int = 50) -> List[OutboxMessage]:
+    """
+    Queued messages whose next attempt is due, highest priority (lowest
+    number) first, then oldest first.
+    """
+    conn = connect()
+    c = conn.cursor()
+    c.row_factory = OutboxMessage.from_row
+    c.execute(f"""
+        SELECT {OutboxMessage.COLUMNS} FROM outbox
+        WHERE next_attempt_at <= ?
+        ORDER BY priority, id
+        LIMIT ?
+    """, (now, limit))
+    messages = c.fetchall()
+    conn.close()
+    return messages
+
+@named_query
+def get_outbox_depth() -> Tuple[int, Optional[float]]:
+    """
+    (queued messages, earliest next attempt) across the outbox.
+    """
+    conn = connect()
+    c = conn.cursor()
+    c.execute("SELECT COUNT(*), MIN(next_attempt_at) FROM outbox")
+    row = c.fetchone()
+    conn.close()
+    return row
+
+@named_query
+def delete_outbox_messages(ids: List[int]) -> None:
+    """
+    Drop outbox messages that were sent or given up on.
+    """
+    conn = connect()
+    c = conn.cursor()
+    c.executemany("DELETE FROM outbox WHERE id = ?", [(i,) for i in ids])
+    conn.commit()
+    conn.close()
+
+@named_query
+def retry_outbox_message(message_id: int, next_attempt_at: float) -> None:
+    """
+    Count a failed send and push the message's next attempt back.
+    """
+    conn = connect()
+    c = conn.cursor()
+    c.execute("UPDATE outbox SET attempts = attempts + 1, next_attempt_at = ? WHERE id = ?",
+              (next_attempt_at, message_id))
+    conn.commit()
+    conn.close()
+
+@named_query
 def is_first_review_in_thread(thread_id: int) -> bool:
     """
     Check if this is the first review in the thread.
     """
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect()
+    count = _thread_review_count(conn.cursor(), thread_id)
+    conn.close()
+    return count == 1
+
+@named_query
+def count_reviews_by_others(thread_id: int, user_id: int) -> int:
+    """
+    Count the reviews in a thread that were left by someone other than user_id.
+    """
+    conn = connect()
     c = conn.cursor()
-    c.execute("SELECT COUNT(*) FROM reviews WHERE thread_id = ?", (thread_id,))
+    c.execute(
+        "SELECT COUNT(*) FROM reviews WHERE thread_id = ? AND giver_id != ?",
+        (thread_id, user_id)
+    )
     count = c.fetchone()[0]
     conn.close()
-    return count == 1
+    return count
+
+# Dashboard queries. These take an optional connection so the dashboards can
+# read from the replica snapshot (see utils/storage.py); without one they open
+# and close their own.
+
+@contextmanager
+def _reading(conn: Optional[sqlite3.Connection]):
+    if conn is not None:
+        yield conn
+        return
+    conn = connect()
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+def _user_search(search: Optional[str]) -> Tuple[str, tuple]:
+    """WHERE clause matching username, display name or user ID, case-insensitively."""
+    if not search:
+        return "", ()
+    term = f"%{search.lower()}%"
+    return ("""
+        WHERE LOWER(u.username) LIKE ?
+           OR LOWER(u.display_name) LIKE ?
+           OR CAST(u.user_id AS TEXT) LIKE ?
+    """, (term, term, term))
+
+@named_query
+def get_user(user_id: int, conn: Optional[sqlite3.Connection] = None) -> Optional[User]:
+    """
+    Get a single user's profile.
+    """
+    with _reading(conn) as conn:
+        c = conn.cursor()
+        c.row_factory = User.from_row
+        c.execute(f"SELECT {User.COLUMNS} FROM users WHERE user_id = ?", (user_id,))
+        return c.fetchone()
+
+@named_query
+def get_profile_stats(user_id: int, full_history: bool = False,
+                      conn: Optional[sqlite3.Connection] = None) -> dict:
+    """
+    Lifetime stats, reviewed and still-active thread IDs and the latest
+    reviews received and given, for the profile page. With full_history the reviews also come
+    from the archive database.
+    """
+    with _reading(conn) as conn:
+        c = conn.cursor()
+        reviews_table = attach_history(conn) if full_history else 'reviews'
+
+        # Lifetime stats include archived reviews either way
+        c.execute("""
+            SELECT CAST(rating_sum AS REAL) / NULLIF(reviews_received, 0), reviews_received, reviews_given
+            FROM user_stats
+            WHERE user_id = ?
+        """, (user_id,))
+        result = c.fetchone() or (None, 0, 0)
+
+        c.execute(f"SELECT DISTINCT thread_id FROM {reviews_table} WHERE receiver_id = ? ORDER BY thread_id DESC",
+                  (user_id,))
+        thread_ids = [row[0] for row in c.fetchall()]
+
+        # Posts that aren't closed yet (idx_threads_owner_state)
+        c.execute("""
+            SELECT thread_id FROM threads
+            WHERE owner_id = ? AND state IN ('tos_pending', 'open', 'reviewed', 'close_scheduled')
+            ORDER BY thread_id DESC
+        """, (user_id,))
+        active_thread_ids = [row[0] for row in c.fetchall()]
+
+        c.row_factory = Review.from_row
+        c.execute(f"""
+            SELECT {Review.COLUMNS}
+            FROM {reviews_table}
+            WHERE receiver_id = ?
+            ORDER BY created_at DESC
+            LIMIT 10
+        """, (user_id,))
+        latest_reviews = c.fetchall()
+
+        c.execute(f"""
+            SELECT {Review.COLUMNS}
+            FROM {reviews_table}
+            WHERE giver_id = ?
+            ORDER BY created_at DESC
+            LIMIT 10
+        """, (user_id,))
+        reviews_given_data = c.fetchall()
+
+    return {
+        'avg_rating': result[0] if result[0] else 0.0,
+        'total_reviews': result[1],
+        'reviews_given': result[2],
+        'thread_ids': thread_ids,
+        'active_thread_ids': active_thread_ids,
+        'latest_reviews': latest_reviews,
+        'reviews_given_data': reviews_given_data
+    }
+
+@named_query
+def list_user_activity(search: Optional[str] = None, limit: Optional[int] = None, offset: int = 0,
+                       conn: Optional[sqlite3.Connection] = None) -> List[UserActivity]:
+    """
+    Users with their lifetime review stats, members first and then by
+    average rating. `search` filters by username, display name or user ID.
+    """
+    where, params = _user_search(search)
+    paging = ""
+    if limit is not None:
+        paging = "LIMIT ? OFFSET ?"
+        params += (limit, offset)
+    with _reading(conn) as conn:
+        c = conn.cursor()
+        c.row_factory = UserActivity.from_row
+        c.execute(f"""
+            {USER_ACTIVITY_SELECT}
+            {where}
+            ORDER BY u.is_in_server DESC, avg_rating DESC, u.username ASC
+            {paging}
+        """, params)
+        return c.fetchall()
+
+@named_query
+def count_users(search: Optional[str] = None, conn: Optional[sqlite3.Connection] = None) -> int:
+    """
+    Number of users matching `search` (all users without one).
+    """
+    where, params = _user_search(search)
+    with _reading(conn) as conn:
+        c = conn.cursor()
+        c.execute(f"SELECT COUNT(*) FROM users u {where}", params)
+        return c.fetchone()[0]
+
+@named_query
+def get_site_stats(conn: Optional[sqlite3.Connection] = None) -> dict:
+    """
+    Total reviews, overall average rating and number of users with any
+    review activity, for the homepage.
+    """
+    with _reading(conn) as conn:
+        c = conn.cursor()
+        # Totals come from user_stats so archived reviews still count
+        c.execute("""
+            SELECT SUM(reviews_received), CAST(SUM(rating_sum) AS REAL) / NULLIF(SUM(reviews_received), 0)
+            FROM user_stats
+        """)
+        total_reviews, avg_rating = c.fetchone()
+        c.execute("""
+            SELECT COUNT(*) FROM user_stats
+            WHERE reviews_received > 0 OR reviews_given > 0
+        """)
+        active_users = c.fetchone()[0]
+
+    return {
+        'total_reviews': total_reviews or 0,
+        'avg_rating': avg_rating or 0.0,
+        'active_users': active_users or 0
+    }
+
+@named_query
+def get_recent_reviews(limit: int = 6, conn: Optional[sqlite3.Connection] = None) -> List[RecentReview]:
+    """
+    The newest reviews with the giver's and receiver's profile.
+    """
+    with _reading(conn) as conn:
+        c = conn.cursor()
+        c.row_factory = RecentReview.from_row
+        c.execute("""
+            SELECT
+                r.rating,
+                r.created_at,
+                giver.username,
+                giver.display_name,
+                giver.avatar_url,
+                receiver.username,
+                receiver.display_name,
+                receiver.avatar_url
+            FROM reviews r
+            LEFT JOIN users giver ON r.giver_id = giver.user_id
+            LEFT JOIN users receiver ON r.receiver_id = receiver.user_id
+            ORDER BY r.created_at DESC, r.id DESC
+            LIMIT ?
+        """, (limit,))
+        return c.fetchall()
@@ -0,0 +1,116 @@
+"""
+Append-only audit trail of what happened to threads, reviews and settings.
+
+`event_log.record()` builds an `Event` and queues it; a background task
+writes the queue to the `events` table in batches with `asyncio.to_thread`,
+so handlers never wait on SQLite. The log channel embeds are rendered from
+the same `Event` (see `render_event` in cogs/logging.py), which keeps the
+channel and the dashboard timeline (`/api/events`) telling the same story.
+
+Recorded events only get an `id` once they are read back from the table.
+If writes keep failing, the queue holds at most `MAX_PENDING` events; the
+oldest are dropped (and counted) to make room.
+"""
+import asyncio
+import json
+import logging
+import time
+from typing import List, Optional
+
+from utils import metrics
+from utils.records import Event
+from utils.storage import get_storage
+
+FLUSH_INTERVAL = 1.0    # seconds between batch writes
+MAX_BATCH = 500         # rows per write; a bigger backlog is written over several
+MAX_PENDING = 10_000    # queued events kept while writes fail; the oldest go first
+
+log = logging.getLogger(__name__)
+
+
+class EventLog:
+    """Buffers events and writes them to storage in batches off the event loop."""
+
+    def __init__(self, interval: float = FLUSH_INTERVAL):
+        self.interval = interval
+        self._pending: List[Event] = []
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self.written = 0
+        self.failed_writes = 0
+        self.dropped = 0
+        self._overflowing = False
+
+    def record(self, event_type: str, thread_id: Optional[int] = None,
+               actor_id: Optional[int] = None, **payload) -> Event:
+        """Queue an event for writing and return it for rendering."""
+        event = Event(None, event_type, thread_id, actor_id, payload, time.time())
+        self._pending.append(event)
+        self._trim()
+        return event
+
+    def _trim(self):
+        """Drop the oldest queued events beyond MAX_PENDING."""
+        excess = len(self._pending) - MAX_PENDING
+        if excess <= 0:
+            return
+        del self._pending[:excess]
+        if not self._overflowing:
+            self._overflowing = True
+            log.warning("Event queue full (%d); dropping the oldest events until a write succeeds",
+                        MAX_PENDING)
+        self.dropped += excess
+        metrics.events_dropped.inc(excess)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the writer and write whatever is still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    async def flush(self):
+        async with self._lock:
+            while self._pending:
+                # Take the batch off the queue first: record() may trim the
+                # queue while the write runs, and must not trim these
+                batch = self._pending[:MAX_BATCH]
+                del self._pending[:len(batch)]
+                rows = [(e.type, e.thread_id, e.actor_id, json.dumps(e.payload, default=str), e.created_at)
+                        for e in batch]
+                try:
+                    await asyncio.to_thread(get_storage().append_events, rows)
+                except Exception:
+                    # Put the batch back in front; the next flush tries again
+                    self._pending[:0] = batch
+                    self._trim()
+                    self.failed_writes += 1
+                    log.exception("Failed to write %d events", len(rows))
+                    return
+                self.written += len(batch)
+                self._overflowing = False
+
+    def snapshot(self) -> dict:
+        return {
+            'pending': len(self._pending),
+            'written': self.written,
+            'failed_writes': self.failed_writes,
+            'dropped': self.dropped,
+        }
+
+
+event_log = EventLog()
+metrics.cache_entries.track(lambda: len(event_log._pending), cache='event_log')
@@ -0,0 +1,339 @@
+"""
+Query timing, slow-query logging and N+1 detection for the database layer.
+
+Every connection opened through `db.connect()` uses `InstrumentedConnection`,
+which times each statement and files it under the name of the enclosing
+`@named_query` function. Statements slower than `slow_query_ms` are logged
+together with their `EXPLAIN QUERY PLAN`.
+
+Query scopes count statements per Flask request or per Discord interaction
+and warn when a single scope issues more than `max_queries_per_scope`
+statements, which is almost always an N+1 loop.
+
+Settings come from the optional `db_instrumentation` section of config.yaml.
+"""
+import asyncio
+import contextvars
+import functools
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+import yaml
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'config.yaml')
+DEFAULT_DUMP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'query_stats.json')
+
+log = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds in milliseconds
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+DEFAULT_SETTINGS = {
+    'enabled': True,
+    'slow_query_ms': 100,
+    'explain_slow_queries': True,
+    'max_queries_per_scope': 25,
+}
+
+_settings: Optional[dict] = None
+
+_query_name: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('query_name', default=None)
+_scope: contextvars.ContextVar[Optional['QueryScope']] = contextvars.ContextVar('query_scope', default=None)
+
+
+def get_settings() -> dict:
+    """
+    Instrumentation settings, loaded once from config.yaml.
+    """
+    global _settings
+    if _settings is None:
+        try:
+            with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+                config = yaml.safe_load(f) or {}
+        except FileNotFoundError:
+            config = {}
+        _settings = {**DEFAULT_SETTINGS, **(config.get("db_instrumentation") or {})}
+    return _settings
+
+
+def configure(**overrides) -> dict:
+    """
+    Override instrumentation settings at runtime (e.g. from benchmarks).
+    """
+    global _settings
+    _settings = {**get_settings(), **overrides}
+    return _settings
+
+
+class LatencyHistogram:
+    __slots__ = ('count', 'total_ms', 'max_ms', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def observe(self, duration_ms: float):
+        self.count += 1
+        self.total_ms += duration_ms
+        if duration_ms > self.max_ms:
+            self.max_ms = duration_ms
+        for i, bound in enumerate(BUCKETS_MS):
+            if duration_ms <= bound:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    def percentile(self, pct: float) -> float:
+        """Approximate percentile, reported as the upper bound of its bucket."""
+        if not self.count:
+            return 0.0
+        target = self.count * pct / 100
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= target:
+                return float(BUCKETS_MS[i]) if i < len(BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self) -> dict:
+        return {
+            'count': self.count,
+            'total_ms': round(self.total_ms, 3),
+            'avg_ms': round(self.total_ms / self.count, 3) if self.count else 0.0,
+            'max_ms': round(self.max_ms, 3),
+            'p50_ms': self.percentile(50),
+            'p95_ms': self.percentile(95),
+            'p99_ms': self.percentile(99),
+            'buckets': {
+                **{f"le_{bound}": n for bound, n in zip(BUCKETS_MS, self.buckets)},
+                'le_inf': self.buckets[-1],
+            },
+        }
+
+
+class QueryStats:
+    """
+    Process-wide registry of query latencies, slow queries and scope counts.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.histograms: Dict[str, LatencyHistogram] = {}
+            self.scopes: Dict[str, dict] = {}
+            self.slow_queries = deque(maxlen=100)
+            self.scope_warnings = deque(maxlen=100)
+
+    def record(self, name: str, duration_ms: float):
+        with self._lock:
+            hist = self.histograms.get(name)
+            if hist is None:
+                hist = self.histograms[name] = LatencyHistogram()
+            hist.observe(duration_ms)
+
+    def record_slow(self, name: str, sql: str, duration_ms: float, plan: Optional[list]):
+        entry = {
+            'name': name,
+            'duration_ms': round(duration_ms, 3),
+            'sql': " ".join(sql.split()),
+            'plan': plan,
+            'at': time.time(),
+        }
+        with self._lock:
+            self.slow_queries.append(entry)
+        plan_text = "; ".join(plan) if plan else "n/a"
+        log.warning("Slow query %s took %.1fms | plan: %s", name, duration_ms, plan_text,
+                    extra={'query': name, 'duration_ms': round(duration_ms, 1)})
+
+    def record_scope(self, scope: 'QueryScope'):
+        limit = get_settings().get('max_queries_per_scope', 0)
+        with self._lock:
+            entry = self.scopes.setdefault(scope.label, {'scopes': 0, 'queries': 0, 'max_queries': 0, 'warnings': 0})
+            entry['scopes'] += 1
+            entry['queries'] += scope.count
+            entry['max_queries'] = max(entry['max_queries'], scope.count)
+            over_limit = limit and scope.count > limit
+            if over_limit:
+                entry['warnings'] += 1
+                top = sorted(scope.per_name.items(), key=lambda kv: kv[1], reverse=True)[:3]
+                self.scope_warnings.append({
+                    'scope': scope.label,
+                    'queries': scope.count,
+                    'top': dict(top),
+                    'at': time.time(),
+                })
+        if over_limit:
+            repeated = ", ".join(f"{name} x{n}" for name, n in top)
+            log.warning("%s issued %d queries (limit %d): %s", scope.label, scope.count, limit, repeated,
+                        extra={'scope': scope.label, 'query_count': scope.count})
+
+    def histogram_items(self) -> List[Tuple[str, List[int], float]]:
+        """(name, bucket counts, total_ms) per query, copied under the lock."""
+        with self._lock:
+            return [(name, hist.buckets[:], hist.total_ms) for name, hist in sorted(self.histograms.items())]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                'generated_at': time.time(),
+                'settings': dict(get_settings()),
+                'queries': {name: hist.to_dict() for name, hist in sorted(self.histograms.items())},
+                'scopes': {label: dict(entry) for label, entry in sorted(self.scopes.items())},
+                'slow_queries': list(self.slow_queries),
+                'scope_warnings': list(self.scope_warnings),
+            }
+
+    def dump_json(self, path: Optional[str] = None) -> str:
+        path = path or DEFAULT_DUMP_PATH
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, indent=2)
+        return path
+
+
+query_stats = QueryStats()
+
+
+class QueryScope:
+    """
+    Counts the statements issued while handling one request or interaction.
+    """
+    __slots__ = ('label', 'count', 'per_name', 'closed')
+
+    def __init__(self, label: str):
+        self.label = label
+        self.count = 0
+        self.per_name: Dict[str, int] = {}
+        self.closed = False
+
+    def add(self, name: str):
+        self.count += 1
+        self.per_name[name] = self.per_name.get(name, 0) + 1
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        query_stats.record_scope(self)
+
+
+def begin_scope(label: str) -> QueryScope:
+    """
+    Start counting queries for the current context.
+
+    Inside an asyncio task the scope closes itself when the task finishes, so
+    interaction handlers only need to call this once. Elsewhere (Flask request
+    threads) call `end_scope` when the work is done.
+    """
+    scope = QueryScope(label)
+    _scope.set(scope)
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    if task is not None:
+        task.add_done_callback(lambda _t: scope.close())
+    return scope
+
+
+def end_scope():
+    scope = _scope.get()
+    if scope is not None:
+        scope.close()
+        _scope.set(None)
+
+
+def named_query(func: Callable) -> Callable:
+    """
+    Decorator that files every statement run inside `func` under its name.
+    """
+    name = func.__qualname__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _query_name.set(name)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _query_name.reset(token)
+    return wrapper
+
+
+def _explain(conn: sqlite3.Connection, sql: str, params) -> Optional[list]:
+    try:
+        rows = sqlite3.Connection.execute(conn, "EXPLAIN QUERY PLAN " + sql, params).fetchall()
+        return [row[3] for row in rows]
+    except sqlite3.Error:
+        return None
+
+
+def _observe(conn: sqlite3.Connection, sql: str, params, started: float):
+    duration_ms = (time.perf_counter() - started) * 1000
+    name = _query_name.get() or " ".join(sql.split())[:60]
+    query_stats.record(name, duration_ms)
+
+    scope = _scope.get()
+    if scope is not None:
+        scope.add(name)
+
+    settings = get_settings()
+    if duration_ms >= settings['slow_query_ms']:
+        plan = _explain(conn, sql, params) if settings['explain_slow_queries'] else None
+        query_stats.record_slow(name, sql, duration_ms, plan)
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    def execute(self, sql, parameters=()):
+        if not get_settings()['enabled']:
+            return super().execute(sql, parameters)
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            _observe(self.connection, sql, parameters, started)
+
+    def executemany(self, sql, seq_of_parameters):
+        if not get_settings()['enabled']:
+            return super().executemany(sql, seq_of_parameters)
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            # No single parameter set to explain for a batch
+            _observe(self.connection, sql, None, started)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def install_flask_hooks(app):
+    """
+    Open a query scope for every Flask request.
+    """
+    from flask import request
+
+    @app.before_request
+    def _begin_query_scope():
+        begin_scope(f"route:{request.endpoint or request.path}")
+
+    @app.teardown_request
+    def _end_query_scope(_exc):
+        end_scope()
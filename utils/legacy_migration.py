@@ -0,0 +1,216 @@
+"""
+One-shot migration of the legacy +/- rep system into the reviews table.
+
+Streams rows from the old `rep` table into `reviews` in chunks, recording a
+checkpoint after every chunk so an interrupted run resumes where it stopped.
+Once every row is copied the legacy `rep` and `rep_totals` tables are dropped.
+
+Run it by hand with `python -m utils.legacy_migration`, or let the bot run it
+on startup (it is a no-op once the legacy tables are gone).
+"""
+import argparse
+import logging
+import sqlite3
+from typing import Callable, Optional
+
+import yaml
+
+from utils import db
+
+CONFIG_PATH = 'data/config.yaml'
+MIGRATION_NAME = 'legacy_rep'
+
+DEFAULT_POSITIVE_RATING = 10
+DEFAULT_NEGATIVE_RATING = 1
+DEFAULT_CHUNK_SIZE = 1000
+
+log = logging.getLogger(__name__)
+
+
+def load_migration_settings() -> dict:
+    """
+    Read the `legacy_rep_migration` section of config.yaml, falling back to defaults.
+    """
+    try:
+        with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+            config = yaml.safe_load(f) or {}
+    except FileNotFoundError:
+        config = {}
+
+    section = config.get("legacy_rep_migration", {}) or {}
+    return {
+        'positive_rating': int(section.get("positive_rating", DEFAULT_POSITIVE_RATING)),
+        'negative_rating': int(section.get("negative_rating", DEFAULT_NEGATIVE_RATING)),
+        'chunk_size': int(section.get("chunk_size", DEFAULT_CHUNK_SIZE)),
+    }
+
+
+def has_legacy_rep(db_path: Optional[str] = None) -> bool:
+    """
+    Check whether the legacy `rep` or `rep_totals` tables still exist.
+    """
+    conn = db.connect(db_path)
+    c = conn.cursor()
+    c.execute("""
+        SELECT COUNT(*) FROM sqlite_master
+        WHERE type = 'table' AND name IN ('rep', 'rep_totals')
+    """)
+    count = c.fetchone()[0]
+    conn.close()
+    return count > 0
+
+
+def _load_checkpoint(c: sqlite3.Cursor) -> tuple[int, int, int]:
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS migration_checkpoints (
+            name         TEXT PRIMARY KEY,
+            last_rowid   INTEGER NOT NULL DEFAULT 0,
+            migrated     INTEGER NOT NULL DEFAULT 0,
+            skipped      INTEGER NOT NULL DEFAULT 0,
+            completed_at TIMESTAMP NULL,
+            updated_at   TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    c.execute(
+        "SELECT last_rowid, migrated, skipped FROM migration_checkpoints WHERE name = ?",
+        (MIGRATION_NAME,)
+    )
+    row = c.fetchone()
+    return (row[0], row[1], row[2]) if row else (0, 0, 0)
+
+
+def migrate_legacy_rep(
+    db_path: Optional[str] = None,
+    positive_rating: int = DEFAULT_POSITIVE_RATING,
+    negative_rating: int = DEFAULT_NEGATIVE_RATING,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    progress: Optional[Callable[[str], None]] = log.info
+) -> dict:
+    """
+    Copy every legacy rep row into `reviews`, then drop the legacy tables.
+
+    '+' rows become `positive_rating` reviews and '-' rows become `negative_rating`
+    reviews. Rows that collide with an existing review (same giver, receiver and
+    thread) or are missing IDs are skipped. Progress lines go to `progress`
+    (the module logger by default). Returns a summary dict.
+    """
+    for rating in (positive_rating, negative_rating):
+        if not (1 <= rating <= 10):
+            raise ValueError("Mapped ratings must be between 1 and 10")
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+
+    report = progress or (lambda _msg: None)
+    conn = db.connect(db_path)
+    c = conn.cursor()
+
+    try:
+        c.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'rep'")
+        has_rep_table = c.fetchone() is not None
+
+        last_rowid, migrated, skipped = _load_checkpoint(c)
+        conn.commit()
+
+        if has_rep_table:
+            c.execute("SELECT COUNT(*), COALESCE(MAX(rowid), 0) FROM rep")
+            total, max_rowid = c.fetchone()
+            if last_rowid:
+                report(f"[MIGRATION] Resuming legacy rep migration after row {last_rowid} "
+                       f"({migrated + skipped}/{total} done)")
+            else:
+                report(f"[MIGRATION] Migrating {total} legacy rep rows into reviews...")
+
+            while last_rowid < max_rowid:
+                c.execute("""
+                    SELECT rowid, giver_id, receiver_id, thread_id, rep_type
+                    FROM rep
+                    WHERE rowid > ?
+                    ORDER BY rowid
+                    LIMIT ?
+                """, (last_rowid, chunk_size))
+                rows = c.fetchall()
+                if not rows:
+                    break
+
+                chunk_migrated = 0
+                for rowid, giver_id, receiver_id, thread_id, rep_type in rows:
+                    if None in (giver_id, receiver_id, thread_id) or rep_type not in ('+', '-'):
+                        continue
+                    rating = positive_rating if rep_type == '+' else negative_rating
+                    c.execute(
+                        "INSERT OR IGNORE INTO reviews (giver_id, receiver_id, thread_id, rating, notes) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (giver_id, receiver_id, thread_id, rating, f"Migrated from legacy {rep_type}rep")
+                    )
+                    chunk_migrated += c.rowcount
+
+                last_rowid = rows[-1][0]
+                migrated += chunk_migrated
+                skipped += len(rows) - chunk_migrated
+
+                # The checkpoint is written in the same transaction as the chunk,
+                # so a crash can never double-count or lose rows.
+                c.execute("""
+                    INSERT INTO migration_checkpoints (name, last_rowid, migrated, skipped, updated_at)
+                    VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+                    ON CONFLICT(name) DO UPDATE SET
+                        last_rowid = excluded.last_rowid,
+                        migrated = excluded.migrated,
+                        skipped = excluded.skipped,
+                        updated_at = CURRENT_TIMESTAMP
+                """, (MIGRATION_NAME, last_rowid, migrated, skipped))
+                conn.commit()
+
+                report(f"[MIGRATION] {migrated + skipped}/{total} legacy rep rows processed "
+                       f"({migrated} migrated, {skipped} skipped)")
+
+        # Refresh the query planner statistics now that reviews has grown
+        c.execute("ANALYZE reviews")
+
+        c.execute("DROP TABLE IF EXISTS rep")
+        c.execute("DROP TABLE IF EXISTS rep_totals")
+        c.execute("""
+            INSERT INTO migration_checkpoints (name, last_rowid, migrated, skipped, completed_at)
+            VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(name) DO UPDATE SET completed_at = CURRENT_TIMESTAMP
+        """, (MIGRATION_NAME, last_rowid, migrated, skipped))
+        conn.commit()
+
+        report(f"[MIGRATION] Legacy rep migration complete: {migrated} migrated, "
+               f"{skipped} skipped. Dropped legacy rep tables.")
+        return {'migrated': migrated, 'skipped': skipped, 'last_rowid': last_rowid}
+    finally:
+        conn.close()
+
+
+def main() -> int:
+    settings = load_migration_settings()
+
+    parser = argparse.ArgumentParser(description="Migrate legacy +/- rep into the reviews table.")
+    parser.add_argument("--db", default=db.DB_PATH, help="Path to rep.db")
+    parser.add_argument("--positive-rating", type=int, default=settings['positive_rating'],
+                        help="Rating given to '+' rep (1-10)")
+    parser.add_argument("--negative-rating", type=int, default=settings['negative_rating'],
+                        help="Rating given to '-' rep (1-10)")
+    parser.add_argument("--chunk-size", type=int, default=settings['chunk_size'],
+                        help="Rows committed per chunk")
+    args = parser.parse_args()
+
+    if not has_legacy_rep(args.db):
+        print("[MIGRATION] No legacy rep tables found - nothing to do.")
+        return 0
+
+    db.DB_PATH = args.db
+    db.init_db()
+    migrate_legacy_rep(
+        db_path=args.db,
+        positive_rating=args.positive_rating,
+        negative_rating=args.negative_rating,
+        chunk_size=args.chunk_size,
+        progress=print
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
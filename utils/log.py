@@ -0,0 +1,138 @@
+"""
+Structured logging for the bot and the dashboards.
+
+`setup_logging()` sends every logger through a `QueueHandler`. The calling
+task only puts the record on a queue. A `QueueListener` thread then formats
+it as a JSON line and writes it to the console and to a rotating file. Log
+calls use %-style arguments (`log.info("Closed thread %s", thread_id)`).
+Those arguments are merged on the listener thread too, so a busy event loop
+never waits on formatting or disk I/O.
+
+`bind()` sets context fields (thread_id, user_id, interaction_id, ...) for
+the current task or Flask request. They are added to every record logged
+from there, next to any `extra=` fields.
+
+Settings come from the optional `logging` section of config.yaml.
+"""
+import atexit
+import contextvars
+import json
+import logging
+import os
+import queue
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Optional
+
+import yaml
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIG_PATH = os.path.join(ROOT_DIR, 'data', 'config.yaml')
+
+DEFAULT_SETTINGS = {
+    'level': 'INFO',
+    'levels': {},                        # per-logger overrides, e.g. {'discord': 'WARNING'}
+    'console': True,
+    'console_format': 'json',            # json or text
+    'file': 'logs/{component}.log',      # relative to the project root; empty to disable
+    'max_bytes': 10 * 1024 * 1024,
+    'backup_count': 5,
+}
+
+# Attributes every LogRecord has; anything else on a record is a context/extra field
+_RECORD_FIELDS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'taskName'}
+
+_context: contextvars.ContextVar[dict] = contextvars.ContextVar('log_context', default={})
+_listener: Optional[QueueListener] = None
+
+
+def bind(**fields):
+    """Add context fields to every record logged from the current task or request."""
+    _context.set({**_context.get(), **fields})
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg, then context and extra fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_FIELDS:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class _ContextQueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The stock handler formats here, on the caller's thread. Only attach
+        # the bound context and leave msg/args for the listener.
+        for key, value in _context.get().items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return record
+
+
+def get_settings() -> dict:
+    try:
+        with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+            config = yaml.safe_load(f) or {}
+    except FileNotFoundError:
+        config = {}
+    return {**DEFAULT_SETTINGS, **(config.get('logging') or {})}
+
+
+def setup_logging(component: str = 'bot') -> None:
+    """
+    Route all logging through the queue listener. `component` names the log
+    file (logs/bot.log, logs/dashboard.log). Safe to call more than once.
+    """
+    global _listener
+    if _listener is not None:
+        return
+    settings = get_settings()
+
+    handlers = []
+    if settings['console']:
+        console = logging.StreamHandler(sys.stderr)
+        if settings['console_format'] == 'text':
+            console.setFormatter(logging.Formatter('%(asctime)s %(levelname)-7s %(name)s: %(message)s'))
+        else:
+            console.setFormatter(JsonFormatter())
+        handlers.append(console)
+    if settings['file']:
+        path = os.path.join(ROOT_DIR, settings['file'].format(component=component))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        file_handler = RotatingFileHandler(path, maxBytes=settings['max_bytes'],
+                                           backupCount=settings['backup_count'], encoding='utf-8')
+        file_handler.setFormatter(JsonFormatter())
+        handlers.append(file_handler)
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(_ContextQueueHandler(log_queue))
+    root.setLevel(str(settings['level']).upper())
+    # Levels are checked before a record is built, so quiet loggers cost almost nothing
+    for name, level in (settings['levels'] or {}).items():
+        logging.getLogger(name).setLevel(str(level).upper())
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging() -> None:
+    """Write out queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,181 @@
+"""
+Event loop lag monitoring with stack capture of whatever blocked the loop.
+
+A probe task on the event loop sleeps for `interval_ms` and records how late
+it woke up (the `event_loop_lag_seconds` gauge). A watchdog thread checks
+the probe's deadline. Once the loop is `threshold_ms` late, it snapshots the
+loop thread's stack with `sys._current_frames()`. That snapshot is taken
+while the blocking call is still running, so it names the sync SQLite query,
+YAML load or file read that stalled the loop.
+
+When the probe wakes up again the stall is recorded:
+- in the `event_loop_stalls_total` / `event_loop_stall_seconds` metrics,
+- as a warning log with the stack,
+- in a ranked blocker report, keyed by the innermost repo frame
+  (`top_blockers()`, served at `/api/loop_blockers`).
+
+Settings come from the optional `loop_watchdog` section of config.yaml.
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Dict, List, Optional
+
+import yaml
+
+from utils import metrics
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIG_PATH = os.path.join(ROOT_DIR, 'data', 'config.yaml')
+
+DEFAULT_SETTINGS = {
+    'enabled': True,
+    'interval_ms': 100,      # how often the probe checks in on the loop
+    'threshold_ms': 250,     # lag that counts as a stall and triggers a stack capture
+    'stack_depth': 12,       # frames kept per blocker (innermost last)
+}
+
+MAX_BLOCKERS = 200          # distinct blocking sites kept; the least costly is dropped first
+
+log = logging.getLogger(__name__)
+
+
+def get_settings() -> dict:
+    try:
+        with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+            config = yaml.safe_load(f) or {}
+    except FileNotFoundError:
+        config = {}
+    return {**DEFAULT_SETTINGS, **(config.get('loop_watchdog') or {})}
+
+
+def _site(stack: traceback.StackSummary) -> str:
+    """The innermost frame in our own code, e.g. 'cogs/rep.py:455 in load_config'."""
+    for frame in reversed(stack):
+        path = os.path.abspath(frame.filename)
+        if path.startswith(ROOT_DIR + os.sep) and path != os.path.abspath(__file__):
+            return f"{os.path.relpath(path, ROOT_DIR)}:{frame.lineno} in {frame.name}"
+    leaf = stack[-1]
+    return f"{os.path.basename(leaf.filename)}:{leaf.lineno} in {leaf.name}"
+
+
+class LoopWatchdog:
+    """Probe task on the event loop plus a helper thread that captures stalls."""
+
+    def __init__(self, settings: Optional[dict] = None):
+        self.settings = settings
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._loop_thread_id: Optional[int] = None
+        self._deadline: Optional[float] = None     # monotonic time the probe should wake up
+        self._capture: Optional[tuple] = None      # (deadline, stack) for the stall in progress
+        self.blockers: Dict[str, dict] = {}
+        self.stats = {'stalls': 0, 'captured': 0, 'max_lag_ms': 0.0}
+
+    def start(self):
+        """Start the probe on the running loop and the watchdog thread."""
+        if self.settings is None:
+            self.settings = get_settings()
+        if not self.settings['enabled'] or (self._task is not None and not self._task.done()):
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._task = asyncio.create_task(self._run())
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name='loop-watchdog', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._stop.set()
+        self._deadline = None
+
+    async def _run(self):
+        interval = self.settings['interval_ms'] / 1000
+        threshold = self.settings['threshold_ms'] / 1000
+        while True:
+            self._deadline = time.monotonic() + interval
+            await asyncio.sleep(interval)
+            lag = max(0.0, time.monotonic() - self._deadline)
+            metrics.event_loop_lag.set(lag)
+            if lag >= threshold:
+                self._record_stall(lag)
+
+    def _watch(self):
+        threshold = self.settings['threshold_ms'] / 1000
+        poll = max(0.02, threshold / 4)
+        while not self._stop.wait(poll):
+            deadline = self._deadline
+            if deadline is None or time.monotonic() - deadline < threshold:
+                continue
+            with self._lock:
+                if self._capture is not None and self._capture[0] == deadline:
+                    continue   # already have this stall's stack
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = traceback.extract_stack(frame)
+            del frame
+            with self._lock:
+                self._capture = (deadline, stack)
+
+    def _record_stall(self, lag: float):
+        with self._lock:
+            capture, self._capture = self._capture, None
+        stack = capture[1] if capture is not None and capture[0] == self._deadline else None
+        lag_ms = lag * 1000
+        self.stats['stalls'] += 1
+        self.stats['max_lag_ms'] = max(self.stats['max_lag_ms'], round(lag_ms, 1))
+        metrics.event_loop_stalls.inc()
+        metrics.event_loop_stall_seconds.observe(lag)
+
+        if stack is None:
+            # Blocked for less than one watchdog poll past the threshold
+            site, lines = 'not captured', []
+        else:
+            self.stats['captured'] += 1
+            site = _site(stack)
+            lines = [line.rstrip('\n') for line in traceback.format_list(stack[-self.settings['stack_depth']:])]
+
+        with self._lock:
+            entry = self.blockers.get(site)
+            if entry is None:
+                if len(self.blockers) >= MAX_BLOCKERS:
+                    del self.blockers[min(self.blockers, key=lambda s: self.blockers[s]['total_ms'])]
+                entry = self.blockers[site] = {'site': site, 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                                               'last_at': None, 'stack': []}
+            entry['count'] += 1
+            entry['total_ms'] += lag_ms
+            entry['last_at'] = time.time()
+            if lag_ms >= entry['max_ms']:
+                # Keep the stack of the worst stall at this site
+                entry['max_ms'] = lag_ms
+                entry['stack'] = lines or entry['stack']
+
+        log.warning("Event loop blocked for %.0fms at %s\n%s", lag_ms, site, "\n".join(lines),
+                    extra={'lag_ms': round(lag_ms, 1), 'site': site})
+
+    def top_blockers(self, limit: int = 10) -> List[dict]:
+        """Blocking sites ranked by total time the loop spent stalled there."""
+        with self._lock:
+            ranked = sorted(self.blockers.values(), key=lambda e: e['total_ms'], reverse=True)[:limit]
+            return [{**entry, 'total_ms': round(entry['total_ms'], 1), 'max_ms': round(entry['max_ms'], 1),
+                     'stack': list(entry['stack'])} for entry in ranked]
+
+    def snapshot(self, limit: int = 10) -> dict:
+        return {
+            **self.stats,
+            'lag_ms': round((metrics.event_loop_lag.value() or 0.0) * 1000, 1),
+            'threshold_ms': self.settings['threshold_ms'] if self.settings else None,
+            'top_blockers': self.top_blockers(limit),
+        }
+
+
+loop_watchdog = LoopWatchdog()
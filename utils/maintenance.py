@@ -0,0 +1,249 @@
+"""
+Database maintenance jobs: online backups, WAL checkpoints and vacuuming.
+
+The functions here are blocking and are scheduled by cogs/maintenance.py,
+which runs them in a worker thread. Every job returns a result dict with its
+duration and bytes reclaimed/written. `record()` stores the result in
+`job_stats`, which the dashboard exposes at /api/maintenance_status.
+
+Settings come from the `maintenance` section of config.yaml.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+import yaml
+
+from utils import db
+
+CONFIG_PATH = os.path.join(db.ROOT_DIR, 'data', 'config.yaml')
+BACKUP_PREFIX = 'rep-'
+USERS_BACKUP_PREFIX = 'users-'
+
+log = logging.getLogger(__name__)
+
+DEFAULT_SETTINGS = {
+    'enabled': True,
+    'backup_directory': 'data/backups',
+    'backup_interval_hours': 24,
+    'keep_backups': 7,
+    'checkpoint_interval_minutes': 5,
+    'passive_checkpoint_mb': 4,      # PASSIVE checkpoint once the WAL is this big
+    'truncate_checkpoint_mb': 64,    # TRUNCATE (shrink the WAL file) past this size
+    'quiet_hours_start': 4,          # local hour, inclusive
+    'quiet_hours_end': 6,            # local hour, exclusive
+}
+
+_settings: Optional[dict] = None
+_stats_lock = threading.Lock()
+job_stats: dict = {}
+
+
+def get_settings() -> dict:
+    """
+    Maintenance settings, loaded once from the `maintenance` section of config.yaml.
+    """
+    global _settings
+    if _settings is None:
+        try:
+            with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+                config = yaml.safe_load(f) or {}
+        except FileNotFoundError:
+            config = {}
+        _settings = {**DEFAULT_SETTINGS, **(config.get("maintenance") or {})}
+    return _settings
+
+
+def record(job: str, result: Optional[dict] = None, error: Optional[str] = None):
+    """
+    Store the outcome of a job run in `job_stats` and log a summary line.
+    """
+    with _stats_lock:
+        entry = job_stats.setdefault(job, {
+            'runs': 0, 'failures': 0, 'total_duration_ms': 0.0, 'total_bytes_reclaimed': 0,
+            'last_run_at': None, 'last_result': None, 'last_error': None,
+        })
+        entry['last_run_at'] = time.time()
+        if error:
+            entry['failures'] += 1
+            entry['last_error'] = error
+        else:
+            entry['runs'] += 1
+            entry['total_duration_ms'] += result['duration_ms']
+            entry['total_bytes_reclaimed'] += max(0, result.get('bytes_reclaimed', 0))
+            entry['last_result'] = result
+    if error:
+        log.error("Maintenance job %s failed: %s", job, error)
+    else:
+        details = ", ".join(f"{k}={v}" for k, v in result.items() if k != 'duration_ms')
+        log.info("%s took %.0fms (%s)", job, result['duration_ms'], details, extra={'job': job})
+
+
+def snapshot_stats() -> dict:
+    with _stats_lock:
+        return {job: dict(entry) for job, entry in job_stats.items()}
+
+
+def _file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def _database_paths() -> list:
+    """rep.db, plus the users database when it is split out (see db.USERS_DB_PATH)."""
+    return [None, db.USERS_DB_PATH] if db.USERS_DB_PATH else [None]
+
+
+def in_quiet_hours(now: Optional[datetime] = None) -> bool:
+    settings = get_settings()
+    hour = (now or datetime.now()).hour
+    start, end = settings['quiet_hours_start'], settings['quiet_hours_end']
+    if start <= end:
+        return start <= hour < end
+    # Window wraps past midnight, e.g. 23 -> 5
+    return hour >= start or hour < end
+
+
+def backup_database(directory: Optional[str] = None, keep: Optional[int] = None) -> dict:
+    """
+    Take an online backup with the sqlite3 backup API and rotate old backups.
+    """
+    settings = get_settings()
+    directory = directory or settings['backup_directory']
+    if not os.path.isabs(directory):
+        directory = os.path.join(db.ROOT_DIR, directory)
+    keep = settings['keep_backups'] if keep is None else keep
+    os.makedirs(directory, exist_ok=True)
+
+    started = time.perf_counter()
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    targets = [('main', BACKUP_PREFIX)]
+    if db.USERS_DB_PATH:
+        targets.append((db.USERS_SCHEMA, USERS_BACKUP_PREFIX))
+
+    source = db.connect()
+    written = 0
+    paths = []
+    try:
+        for schema, prefix in targets:
+            path = os.path.join(directory, f"{prefix}{stamp}.db")
+            tmp_path = path + '.tmp'
+            target = sqlite3.connect(tmp_path)
+            try:
+                # One step, so one read transaction: under WAL it sees a
+                # consistent snapshot and never blocks bot writes. A stepped
+                # copy would restart whenever the bot commits between steps.
+                source.backup(target, pages=-1, name=schema)
+                target.execute("PRAGMA journal_mode=DELETE")
+            finally:
+                target.close()
+            os.replace(tmp_path, path)
+            written += _file_size(path)
+            paths.append(path)
+    finally:
+        source.close()
+
+    removed = 0
+    rotated = 0
+    for _schema, prefix in targets:
+        backups = sorted(n for n in os.listdir(directory) if n.startswith(prefix) and n.endswith('.db'))
+        for old in backups[:-keep] if keep > 0 else []:
+            removed += _file_size(os.path.join(directory, old))
+            os.remove(os.path.join(directory, old))
+            rotated += 1
+
+    return {
+        'duration_ms': round((time.perf_counter() - started) * 1000, 1),
+        'path': ", ".join(paths),
+        'bytes_written': written,
+        'bytes_reclaimed': removed,
+        'rotated': rotated,
+    }
+
+
+def checkpoint_wal(passive_bytes: Optional[int] = None, truncate_bytes: Optional[int] = None) -> Optional[dict]:
+    """
+    Checkpoint the WAL when it has grown past the configured size.
+
+    A PASSIVE checkpoint copies what it can without waiting on readers or
+    writers. Past `truncate_bytes` a TRUNCATE checkpoint also shrinks the WAL
+    file back to zero. Returns None when the WAL is small enough to leave alone.
+    """
+    settings = get_settings()
+    passive_bytes = passive_bytes if passive_bytes is not None else settings['passive_checkpoint_mb'] * 1024 * 1024
+    truncate_bytes = truncate_bytes if truncate_bytes is not None else settings['truncate_checkpoint_mb'] * 1024 * 1024
+
+    wal_paths = [db.resolve_db_path(path) + '-wal' for path in _database_paths()]
+    wal_before = sum(_file_size(p) for p in wal_paths)
+    if wal_before < passive_bytes:
+        return None
+
+    mode = 'TRUNCATE' if wal_before >= truncate_bytes else 'PASSIVE'
+    started = time.perf_counter()
+    conn = db.connect()
+    try:
+        # Without a schema name this checkpoints every attached database
+        busy, log_frames, checkpointed = conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+    finally:
+        conn.close()
+    wal_after = sum(_file_size(p) for p in wal_paths)
+
+    return {
+        'duration_ms': round((time.perf_counter() - started) * 1000, 1),
+        'mode': mode,
+        'busy': bool(busy),
+        'frames': log_frames,
+        'checkpointed': checkpointed,
+        'wal_bytes_before': wal_before,
+        'wal_bytes_after': wal_after,
+        'bytes_reclaimed': wal_before - wal_after,
+    }
+
+
+def vacuum_and_optimize() -> dict:
+    """
+    Return free pages to the filesystem and refresh query planner statistics.
+
+    Databases created before incremental auto-vacuum was enabled are converted
+    once with a full VACUUM. After that, each run only releases the free pages.
+    """
+    started = time.perf_counter()
+    schemas = ['main', db.USERS_SCHEMA] if db.USERS_DB_PATH else ['main']
+    conn = db.connect()
+    freelist = 0
+    reclaimed = 0
+    converted = False
+    try:
+        for schema in schemas:
+            page_size = conn.execute(f"PRAGMA {schema}.page_size").fetchone()[0]
+            pages_before = conn.execute(f"PRAGMA {schema}.page_count").fetchone()[0]
+            freelist += conn.execute(f"PRAGMA {schema}.freelist_count").fetchone()[0]
+
+            if conn.execute(f"PRAGMA {schema}.auto_vacuum").fetchone()[0] != 2:
+                conn.execute(f"PRAGMA {schema}.auto_vacuum = INCREMENTAL")
+                conn.execute(f"VACUUM {schema}")
+                converted = True
+            else:
+                # incremental_vacuum frees one page per step, so drain every row
+                conn.execute(f"PRAGMA {schema}.incremental_vacuum").fetchall()
+
+            reclaimed += (pages_before - conn.execute(f"PRAGMA {schema}.page_count").fetchone()[0]) * page_size
+
+        conn.execute("PRAGMA optimize")
+        conn.commit()
+    finally:
+        conn.close()
+
+    return {
+        'duration_ms': round((time.perf_counter() - started) * 1000, 1),
+        'converted_to_incremental': converted,
+        'free_pages': freelist,
+        'bytes_reclaimed': reclaimed,
+        'db_bytes': sum(_file_size(db.resolve_db_path(path)) for path in _database_paths()),
+    }
@@ -0,0 +1,440 @@
+"""
+In-memory storage engine (see utils/storage.py).
+
+Reviews are kept in an append-only list with per-user and per-thread indexes,
+users and threads in dicts keyed by ID, and lifetime stats are updated on
+every review the way the `reviews_user_stats` trigger does in SQLite. Results
+match `SQLiteStorage`, including ordering, so the two engines can be swapped
+in tests and compared in benchmarks. Nothing is written to disk.
+"""
+import json
+import sqlite3
+import threading
+from collections import Counter, defaultdict
+from dataclasses import replace
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from utils.records import Event, OutboxMessage, RecentReview, Review, Thread, TOSGate, User, UserActivity
+
+
+def _now() -> str:
+    # Same format and timezone (UTC) as SQLite's CURRENT_TIMESTAMP
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _newest_first(reviews: List[Review], limit: int) -> List[Review]:
+    return sorted(reviews, key=lambda r: (r.created_at or '', r.id), reverse=True)[:limit]
+
+
+class MemoryStorage:
+    """Dict- and list-backed storage engine. Safe to share between threads."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reviews: List[Review] = []
+        self._review_keys: set = set()     # (giver_id, receiver_id, thread_id)
+        self._received: Dict[int, List[Review]] = defaultdict(list)
+        self._given: Dict[int, List[Review]] = defaultdict(list)
+        self._by_thread: Dict[int, List[Review]] = defaultdict(list)
+        self._stats: Dict[int, List[int]] = {}   # user_id -> [reviews_received, rating_sum, reviews_given]
+        self._users: Dict[int, User] = {}
+        self._user_updated: Dict[int, str] = {}
+        self._threads: Dict[int, Thread] = {}
+        self._threads_by_owner: Dict[int, set] = defaultdict(set)
+        self._tos_gates: Dict[int, TOSGate] = {}
+        self._review_panels: Dict[int, int] = {}
+        self._log_messages: Dict[str, Tuple[int, int]] = {}
+        self._log_events: Dict[str, List[Tuple[str, str]]] = defaultdict(list)
+        self._events: List[Event] = []
+        self._outbox: Dict[int, OutboxMessage] = {}
+        self._outbox_ids = 0
+
+    @classmethod
+    def from_sqlite(cls, path: str) -> "MemoryStorage":
+        """Load a copy of an existing rep.db, e.g. to benchmark both engines on the same data."""
+        storage = cls()
+        conn = sqlite3.connect(path)
+        try:
+            for row in conn.execute(f"SELECT {User.COLUMNS}, last_updated FROM users"):
+                user = User.from_row(None, row[:-1])
+                storage._users[user.user_id] = user
+                storage._user_updated[user.user_id] = row[-1] or ''
+            for row in conn.execute(f"SELECT {Thread.COLUMNS} FROM threads"):
+                thread = Thread.from_row(None, row)
+                storage._threads[thread.thread_id] = thread
+                storage._threads_by_owner[thread.owner_id].add(thread.thread_id)
+            for row in conn.execute(f"SELECT {Review.COLUMNS} FROM reviews ORDER BY id"):
+                storage._index_review(Review(*row))
+            # Lifetime stats also cover reviews that were moved to the archive
+            for user_id, received, rating_sum, given in conn.execute(
+                    "SELECT user_id, reviews_received, rating_sum, reviews_given FROM user_stats"):
+                storage._stats[user_id] = [received, rating_sum, given]
+        finally:
+            conn.close()
+        return storage
+
+    def init(self) -> None:
+        pass
+
+    def _index_review(self, review: Review):
+        self._reviews.append(review)
+        self._review_keys.add((review.giver_id, review.receiver_id, review.thread_id))
+        self._received[review.receiver_id].append(review)
+        self._given[review.giver_id].append(review)
+        self._by_thread[review.thread_id].append(review)
+
+    def _user_stats(self, user_id: int) -> Tuple[float, int, int]:
+        received, rating_sum, given = self._stats.get(user_id, (0, 0, 0))
+        return (rating_sum / received if received else 0.0), received, given
+
+    # Reviews
+
+    def add_review(self, giver_id: int, receiver_id: int, thread_id: int, rating: int,
+                   notes: Optional[str] = None) -> bool:
+        if not 1 <= rating <= 10:
+            return False
+        with self._lock:
+            if (giver_id, receiver_id, thread_id) in self._review_keys:
+                return False
+            review_id = self._reviews[-1].id + 1 if self._reviews else 1
+            now = _now()
+            self._index_review(Review(review_id, giver_id, receiver_id, thread_id, rating, notes, now))
+            receiver = self._stats.setdefault(receiver_id, [0, 0, 0])
+            receiver[0] += 1
+            receiver[1] += rating
+            self._stats.setdefault(giver_id, [0, 0, 0])[2] += 1
+
+            # Same as the reviews_thread_state trigger
+            thread = self._threads.get(thread_id)
+            if thread:
+                changes = {'review_count': thread.review_count + 1, 'reviewed_at': thread.reviewed_at or now}
+                if thread.state in (Thread.TOS_PENDING, Thread.OPEN):
+                    changes.update(state=Thread.REVIEWED, state_changed_at=now)
+                self._threads[thread_id] = replace(thread, **changes)
+            return True
+
+    def get_user_reviews(self, user_id: int, full_history: bool = False) -> Tuple[float, int, List[Review]]:
+        with self._lock:
+            avg_rating, total_reviews, _ = self._user_stats(user_id)
+            return avg_rating, total_reviews, _newest_first(self._received.get(user_id, []), 3)
+
+    def get_top_rated_users(self, limit: int = 10) -> List[Tuple[int, float, int]]:
+        with self._lock:
+            rated = [(user_id, rating_sum / received, received)
+                     for user_id, (received, rating_sum, _) in self._stats.items() if received >= 1]
+        rated.sort(key=lambda row: (-row[1], -row[2], row[0]))
+        return rated[:limit]
+
+    def has_user_reviewed(self, giver_id: int, receiver_id: int, thread_id: int) -> bool:
+        return (giver_id, receiver_id, thread_id) in self._review_keys
+
+    def get_thread_review_count(self, thread_id: int) -> int:
+        thread = self._threads.get(thread_id)
+        return thread.review_count if thread else len(self._by_thread.get(thread_id, ()))
+
+    def is_first_review_in_thread(self, thread_id: int) -> bool:
+        return self.get_thread_review_count(thread_id) == 1
+
+    def count_reviews_by_others(self, thread_id: int, user_id: int) -> int:
+        with self._lock:
+            return sum(1 for r in self._by_thread.get(thread_id, ()) if r.giver_id != user_id)
+
+    def get_recent_reviews(self, limit: int = 6) -> List[RecentReview]:
+        with self._lock:
+            recent = []
+            for review in _newest_first(self._reviews, limit):
+                giver = self._users.get(review.giver_id)
+                receiver = self._users.get(review.receiver_id)
+                recent.append(RecentReview(
+                    review.rating, review.created_at,
+                    giver.username if giver else None,
+                    giver.display_name if giver else None,
+                    giver.avatar_url if giver else None,
+                    receiver.username if receiver else None,
+                    receiver.display_name if receiver else None,
+                    receiver.avatar_url if receiver else None,
+                ))
+            return recent
+
+    # Users
+
+    def upsert_user(self, user_id: int, username: str, display_name: str = None, avatar_url: str = None,
+                    banner_url: str = None, accent_color: int = None, public_flags: int = None,
+                    joined_at: str = None, is_in_server: bool = True, roles: str = None,
+                    badges: str = None) -> None:
+        with self._lock:
+            existing = self._users.get(user_id)
+            if existing:
+                # Like the SQL upsert: joined_at and left_at are kept
+                joined_at, left_at = existing.joined_at, existing.left_at
+            else:
+                left_at = None
+            self._users[user_id] = User(user_id, username, display_name, avatar_url, banner_url, accent_color,
+                                        public_flags, joined_at, left_at, bool(is_in_server), roles, badges)
+            self._user_updated[user_id] = _now()
+
+    def mark_user_left(self, user_id: int) -> None:
+        with self._lock:
+            user = self._users.get(user_id)
+            if user:
+                self._users[user_id] = replace(user, is_in_server=False, left_at=_now())
+                self._user_updated[user_id] = _now()
+
+    def get_all_users(self) -> List[User]:
+        with self._lock:
+            users = list(self._users.values())
+        return sorted(users, key=lambda u: (not u.is_in_server, u.username))
+
+    def get_user(self, user_id: int) -> Optional[User]:
+        return self._users.get(user_id)
+
+    def get_users_missing_profile(self, limit: int = 50) -> List[User]:
+        with self._lock:
+            missing = [u for u in self._users.values()
+                       if u.is_in_server and u.banner_url is None and u.badges is None]
+            missing.sort(key=lambda u: self._user_updated.get(u.user_id, ''))
+        return missing[:limit]
+
+    def update_user_profile(self, user_id: int, banner_url: str = None, accent_color: int = None,
+                            public_flags: int = None, badges: str = None) -> None:
+        with self._lock:
+            user = self._users.get(user_id)
+            if user:
+                self._users[user_id] = replace(user, banner_url=banner_url, accent_color=accent_color,
+                                               public_flags=public_flags, badges=badges)
+                self._user_updated[user_id] = _now()
+
+    # Threads
+
+    def upsert_thread(self, thread_id: int, channel_id: int, guild_id: int, name: str,
+                      owner_id: int, jump_url: str, archived: bool = False, locked: bool = False) -> None:
+        now = _now()
+        with self._lock:
+            existing = self._threads.get(thread_id)
+            if existing:
+                changes = {'name': name, 'archived': bool(archived), 'locked': bool(locked), 'jump_url': jump_url}
+                if archived and existing.state != Thread.CLOSED:
+                    changes.update(state=Thread.CLOSED, state_changed_at=now, closed_at=now)
+                self._threads[thread_id] = replace(existing, **changes)
+            else:
+                state = Thread.CLOSED if archived else Thread.TOS_PENDING
+                self._threads[thread_id] = Thread(thread_id, channel_id, guild_id, name, owner_id, now,
+                                                  bool(archived), bool(locked), jump_url, None, False,
+                                                  state, 0, now, None, None, now if archived else None)
+                self._threads_by_owner[owner_id].add(thread_id)
+
+    def upsert_threads(self, threads: List[tuple]) -> None:
+        with self._lock:
+            for thread in threads:
+                self.upsert_thread(*thread)
+
+    def get_thread_info(self, thread_id: int) -> Optional[Thread]:
+        return self._threads.get(thread_id)
+
+    def schedule_thread_auto_close(self, thread_id: int, close_timestamp: float) -> None:
+        with self._lock:
+            thread = self._threads.get(thread_id)
+            if thread and thread.state != Thread.CLOSED:
+                # Stored the way sqlite3 adapts a datetime
+                self._threads[thread_id] = replace(
+                    thread, auto_close_scheduled=str(datetime.fromtimestamp(close_timestamp)),
+                    auto_close_cancelled=False, state=Thread.CLOSE_SCHEDULED, state_changed_at=_now()
+                )
+
+    def cancel_thread_auto_close(self, thread_id: int) -> None:
+        with self._lock:
+            thread = self._threads.get(thread_id)
+            if thread:
+                changes = {'auto_close_cancelled': True}
+                if thread.state == Thread.CLOSE_SCHEDULED:
+                    changes.update(state=Thread.REVIEWED, state_changed_at=_now())
+                self._threads[thread_id] = replace(thread, **changes)
+
+    def get_threads_to_auto_close(self) -> List[Thread]:
+        now = _now()
+        with self._lock:
+            return [t for t in self._threads.values()
+                    if t.state == Thread.CLOSE_SCHEDULED and t.auto_close_scheduled <= now]
+
+    def get_active_thread_ids(self) -> List[int]:
+        with self._lock:
+            return [t.thread_id for t in self._threads.values() if t.state in Thread.ACTIVE_STATES]
+
+    def count_threads_by_state(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(Counter(t.state for t in self._threads.values()))
+
+    def set_thread_state(self, thread_id: int, state: str) -> None:
+        now = _now()
+        with self._lock:
+            thread = self._threads.get(thread_id)
+            if not thread or thread.state in (state, Thread.CLOSED):
+                return
+            changes = {'state': state, 'state_changed_at': now}
+            if state == Thread.OPEN:
+                changes['opened_at'] = thread.opened_at or now
+            elif state == Thread.CLOSED:
+                changes['closed_at'] = now
+            self._threads[thread_id] = replace(thread, **changes)
+
+    # TOS gates
+
+    def add_tos_gate(self, thread_id: int, channel_id: int, op_id: int, message_id: Optional[int],
+                     prompted_at: float, expires_at: float) -> None:
+        with self._lock:
+            self._tos_gates[thread_id] = TOSGate(thread_id, channel_id, op_id, message_id, prompted_at, expires_at)
+
+    def get_tos_gates(self) -> List[TOSGate]:
+        with self._lock:
+            return sorted(self._tos_gates.values(), key=lambda g: g.expires_at)
+
+    def delete_tos_gates(self, thread_ids: List[int]) -> None:
+        with self._lock:
+            for thread_id in thread_ids:
+                self._tos_gates.pop(thread_id, None)
+
+    # Review panels
+
+    def get_review_panel(self, thread_id: int) -> Optional[int]:
+        return self._review_panels.get(thread_id)
+
+    def set_review_panel(self, thread_id: int, message_id: int) -> None:
+        with self._lock:
+            self._review_panels[thread_id] = message_id
+
+    # Log channel embeds
+
+    def get_log_message(self, log_key: str) -> Optional[Tuple[int, int]]:
+        return self._log_messages.get(log_key)
+
+    def set_log_message(self, log_key: str, channel_id: int, message_id: int) -> None:
+        with self._lock:
+            self._log_messages[log_key] = (channel_id, message_id)
+
+    def get_log_events(self, log_key: str) -> List[Tuple[str, str]]:
+        with self._lock:
+            return list(self._log_events.get(log_key, []))
+
+    def add_log_events(self, events: List[tuple]) -> None:
+        with self._lock:
+            for log_key, field, event in events:
+                self._log_events[log_key].append((field, event))
+
+    # Audit events
+
+    def append_events(self, events: List[tuple]) -> None:
+        with self._lock:
+            for event_type, thread_id, actor_id, payload, created_at in events:
+                self._events.append(Event(len(self._events) + 1, event_type, thread_id, actor_id,
+                                          json.loads(payload) if payload else {}, created_at))
+
+    def get_events(self, thread_id: Optional[int] = None, event_type: Optional[str] = None,
+                   before_id: Optional[int] = None, limit: int = 50) -> List[Event]:
+        with self._lock:
+            # ids are list positions + 1, so the cursor is a slice bound
+            end = len(self._events) if before_id is None else max(0, min(before_id - 1, len(self._events)))
+            page = []
+            for event in reversed(self._events[:end]):
+                if len(page) >= limit:
+                    break
+                if thread_id is not None and event.thread_id != thread_id:
+                    continue
+                if event_type is not None and event.type != event_type:
+                    continue
+                page.append(event)
+            return page
+
+    # Outbox
+
+    def add_outbox_messages(self, messages: List[tuple]) -> None:
+        with self._lock:
+            for channel_id, priority, content, embed, created_at in messages:
+                self._outbox_ids += 1
+                self._outbox[self._outbox_ids] = OutboxMessage(
+                    self._outbox_ids, channel_id, priority, content,
+                    json.loads(embed) if embed else None, 0, created_at, created_at)
+
+    def get_due_outbox_messages(self, now: float, limit: int = 50) -> List[OutboxMessage]:
+        with self._lock:
+            due = [m for m in self._outbox.values() if m.next_attempt_at <= now]
+            due.sort(key=lambda m: (m.priority, m.id))
+            return [replace(m) for m in due[:limit]]
+
+    def get_outbox_depth(self) -> Tuple[int, Optional[float]]:
+        with self._lock:
+            if not self._outbox:
+                return 0, None
+            return len(self._outbox), min(m.next_attempt_at for m in self._outbox.values())
+
+    def delete_outbox_messages(self, ids: List[int]) -> None:
+        with self._lock:
+            for message_id in ids:
+                self._outbox.pop(message_id, None)
+
+    def retry_outbox_message(self, message_id: int, next_attempt_at: float) -> None:
+        with self._lock:
+            message = self._outbox.get(message_id)
+            if message:
+                self._outbox[message_id] = replace(message, attempts=message.attempts + 1,
+                                                   next_attempt_at=next_attempt_at)
+
+    # Stats and dashboard listings
+
+    def get_profile_stats(self, user_id: int, full_history: bool = False) -> dict:
+        # Nothing is ever archived in memory, so full_history changes nothing
+        with self._lock:
+            avg_rating, total_reviews, reviews_given = self._user_stats(user_id)
+            received = self._received.get(user_id, [])
+            return {
+                'avg_rating': avg_rating,
+                'total_reviews': total_reviews,
+                'reviews_given': reviews_given,
+                'thread_ids': sorted({r.thread_id for r in received}, reverse=True),
+                'active_thread_ids': sorted(
+                    (t for t in self._threads_by_owner.get(user_id, ())
+                     if self._threads[t].state in Thread.ACTIVE_STATES),
+                    reverse=True
+                ),
+                'latest_reviews': _newest_first(received, 10),
+                'reviews_given_data': _newest_first(self._given.get(user_id, []), 10),
+            }
+
+    def _matching_users(self, search: Optional[str]) -> List[User]:
+        users = list(self._users.values())
+        if not search:
+            return users
+        term = search.lower()
+        return [u for u in users
+                if term in u.username.lower()
+                or (u.display_name and term in u.display_name.lower())
+                or term in str(u.user_id)]
+
+    def list_user_activity(self, search: Optional[str] = None, limit: Optional[int] = None,
+                           offset: int = 0) -> List[UserActivity]:
+        with self._lock:
+            rows = []
+            for u in self._matching_users(search):
+                avg_rating, total_reviews, reviews_given = self._user_stats(u.user_id)
+                rows.append(UserActivity.from_row(None, (
+                    u.user_id, u.username, u.display_name, u.avatar_url, u.banner_url, u.accent_color,
+                    u.public_flags, u.is_in_server, u.left_at, u.roles, u.badges,
+                    avg_rating, total_reviews, reviews_given,
+                )))
+        rows.sort(key=lambda a: (not a.is_in_server, -a.avg_rating, a.username))
+        return rows[offset:offset + limit] if limit is not None else rows[offset:]
+
+    def count_users(self, search: Optional[str] = None) -> int:
+        with self._lock:
+            return len(self._matching_users(search))
+
+    def get_site_stats(self) -> dict:
+        with self._lock:
+            total_reviews = sum(s[0] for s in self._stats.values())
+            rating_sum = sum(s[1] for s in self._stats.values())
+            active_users = sum(1 for s in self._stats.values() if s[0] > 0 or s[2] > 0)
+        return {
+            'total_reviews': total_reviews,
+            'avg_rating': rating_sum / total_reviews if total_reviews else 0.0,
+            'active_users': active_users,
+        }
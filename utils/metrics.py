@@ -0,0 +1,319 @@
+"""
+Runtime metrics for the bot and dashboards, in the Prometheus text format.
+
+Counters, gauges and histograms live in one process-wide `registry`. The
+metrics below are shared by the cogs and both dashboards, and
+`install_flask_metrics()` serves them at `/metrics`. Point a local
+Prometheus (or `curl`) at the dashboard to scrape them.
+
+- Counters and histograms are updated where things happen, e.g.
+  `metrics.reviews.inc()` or
+  `metrics.discord_rest_seconds.observe(0.12, method='GET', route=...)`.
+- Gauges for state that already lives somewhere (queue depths, cache sizes)
+  register a callback with `gauge.track(fn, **labels)`. It is read at scrape
+  time, so nothing is updated on the hot path.
+- Database query latency is rendered from `query_stats` (see
+  utils/instrumentation.py) rather than timed twice.
+
+In the bot process the dashboard shows bot, Discord and database metrics.
+The standalone dashboard only has its own routes and queries.
+"""
+import asyncio
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from utils.instrumentation import BUCKETS_MS, query_stats
+
+# Histogram bucket upper bounds in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelKey = Tuple[str, ...]
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names: Iterable[str], values: Iterable, extra: str = '') -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _number(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> LabelKey:
+        return tuple(str(labels.get(name, '')) for name in self.label_names)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}", *self.samples()]
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_labels(self.label_names, key)} {_number(v)}" for key, v in items]
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelKey, float] = {}
+        self._callbacks: Dict[LabelKey, Callable[[], Optional[float]]] = {}
+        self._series_callbacks: List[Callable[[], dict]] = []
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def track(self, fn: Callable[[], Optional[float]], **labels):
+        """Read the value from fn at scrape time (None skips the sample)."""
+        with self._lock:
+            self._callbacks[self._key(labels)] = fn
+
+    def track_all(self, fn: Callable[[], dict]):
+        """Read a whole set of samples from fn at scrape time: {label value(s): value}."""
+        with self._lock:
+            self._series_callbacks.append(fn)
+
+    def value(self, **labels) -> Optional[float]:
+        return self._values.get(self._key(labels))
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+            callbacks = list(self._callbacks.items())
+            series_callbacks = list(self._series_callbacks)
+        for key, fn in callbacks:
+            try:
+                value = fn()
+            except Exception:
+                value = None
+            if value is not None:
+                values[key] = value
+        for fn in series_callbacks:
+            try:
+                series = fn()
+            except Exception:
+                continue
+            for key, value in series.items():
+                values[key if isinstance(key, tuple) else (str(key),)] = value
+        return [f"{self.name}{_labels(self.label_names, key)} {_number(v)}" for key, v in values.items()]
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+        self._series: Dict[LabelKey, list] = {}   # key -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, seconds: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series[i] += 1
+                    break
+            else:
+                series[len(self.buckets)] += 1
+            series[-1] += seconds
+
+    def time_task(self, **labels):
+        """Observe how long the current asyncio task runs from now until it finishes."""
+        started = time.perf_counter()
+        asyncio.current_task().add_done_callback(
+            lambda _t: self.observe(time.perf_counter() - started, **labels))
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(series)) for key, series in self._series.items()]
+        lines = []
+        for key, series in items:
+            lines.extend(_histogram_lines(self.name, self.label_names, key, self.buckets,
+                                          series[:-1], series[-1]))
+        return lines
+
+
+def _histogram_lines(name: str, label_names, key, buckets, counts, total) -> List[str]:
+    lines, cumulative = [], 0
+    for bound, n in zip((*buckets, float('inf')), counts):
+        cumulative += n
+        le = 'le="%s"' % _number(bound)
+        lines.append(f"{name}_bucket{_labels(label_names, key, le)} {cumulative}")
+    lines.append(f"{name}_sum{_labels(label_names, key)} {_number(float(total))}")
+    lines.append(f"{name}_count{_labels(label_names, key)} {cumulative}")
+    return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], List[str]]] = []
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help_text: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self._add(Counter(name, help_text, labels))
+
+    def gauge(self, name: str, help_text: str, labels: Tuple[str, ...] = ()) -> Gauge:
+        return self._add(Gauge(name, help_text, labels))
+
+    def histogram(self, name: str, help_text: str, labels: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help_text, labels, buckets))
+
+    def add_collector(self, fn: Callable[[], List[str]]):
+        """fn returns ready-made exposition lines (HELP/TYPE included)."""
+        self._collectors.append(fn)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            lines.extend(collector())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+# Bot activity
+reviews = registry.counter('rep_reviews_total', 'Reviews submitted')
+thread_closes = registry.counter('rep_thread_closes_total', 'Threads closed, by how they were closed', ('path',))
+tos_outcomes = registry.counter('rep_tos_outcomes_total', 'Answers to TOS prompts', ('outcome',))
+member_syncs = registry.counter('rep_member_syncs_total', 'Guild member syncs run', ('mode',))
+events_dropped = registry.counter(
+    'rep_events_dropped_total', 'Audit events dropped because the write queue was full')
+interaction_seconds = registry.histogram(
+    'discord_interaction_seconds', 'Time to handle a slash command, button or modal', ('kind', 'name'))
+
+# Discord REST API
+discord_rest_seconds = registry.histogram(
+    'discord_rest_seconds', 'Discord REST calls by route, including rate limit waits', ('method', 'route'))
+discord_rate_limits = registry.counter(
+    'discord_rate_limits_total', 'HTTP 429 responses from the Discord API', ('scope',))
+
+# Dashboard
+http_request_seconds = registry.histogram(
+    'http_request_seconds', 'Dashboard request latency', ('method', 'endpoint'))
+
+# State
+tos_pending = registry.gauge('rep_tos_pending', 'Threads waiting on a TOS answer')
+threads = registry.gauge('rep_threads', 'Stored threads by lifecycle state', ('state',))
+cache_entries = registry.gauge('rep_cache_entries', 'Entries held by in-memory caches and queues', ('cache',))
+event_loop_lag = registry.gauge('event_loop_lag_seconds', 'How late the event loop ran a scheduled wakeup')
+event_loop_stalls = registry.counter(
+    'event_loop_stalls_total', 'Times the event loop was blocked past the watchdog threshold')
+event_loop_stall_seconds = registry.histogram(
+    'event_loop_stall_seconds', 'How long each event loop stall lasted',
+    buckets=(0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0))
+
+
+def _db_query_lines() -> List[str]:
+    name = 'rep_db_query_seconds'
+    lines = [f"# HELP {name} Database query time by db function", f"# TYPE {name} histogram"]
+    buckets = tuple(bound / 1000 for bound in BUCKETS_MS)
+    for query, counts, total_ms in query_stats.histogram_items():
+        lines.extend(_histogram_lines(name, ('query',), (query,), buckets, counts, total_ms / 1000))
+    return lines
+
+
+def _thread_states() -> Dict[str, int]:
+    from utils.storage import get_storage
+    return get_storage().count_threads_by_state()
+
+
+registry.add_collector(_db_query_lines)
+threads.track_all(_thread_states)
+
+
+def install_flask_metrics(app):
+    """Time every request by endpoint and serve the registry at /metrics."""
+    from flask import Response, g, request
+
+    @app.before_request
+    def _start_request_timer():
+        g._metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _observe_request(response):
+        started = g.pop('_metrics_started', None)
+        if started is not None:
+            http_request_seconds.observe(time.perf_counter() - started, method=request.method,
+                                         endpoint=request.endpoint or 'unmatched')
+        return response
+
+    def metrics_endpoint():
+        return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+    app.add_url_rule('/metrics', 'metrics', metrics_endpoint)
+
+
+def instrument_discord_http(bot):
+    """Time the bot's REST calls per route template (e.g. /channels/{channel_id}/messages)."""
+    request = bot.http.request
+
+    async def timed_request(route, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await request(route, **kwargs)
+        finally:
+            discord_rest_seconds.observe(time.perf_counter() - started, method=route.method, route=route.path)
+
+    bot.http.request = timed_request
+
+
+def discord_http_trace():
+    """aiohttp trace config that counts 429s, including the ones discord.py retries itself."""
+    import aiohttp
+
+    async def on_request_end(session, context, params):
+        if params.response.status == 429:
+            discord_rate_limits.inc(scope=params.response.headers.get('X-RateLimit-Scope', 'unknown'))
+
+    trace = aiohttp.TraceConfig()
+    trace.on_request_end.append(on_request_end)
+    return trace
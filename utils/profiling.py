@@ -0,0 +1,275 @@
+"""
+Opt-in sampling profiler for slash commands, component interactions and
+dashboard routes.
+
+Profiling is off by default. An admin turns it on at runtime with
+`/profiling` or the dashboard switch (`/api/profiling`, which needs an admin
+dashboard login). While it is on, a
+`sample_rate` fraction of interactions and requests are sampled. Each
+sampled one is registered as a scope:
+- an interaction by its asyncio task,
+- a Flask request by its worker thread.
+
+A sampler thread reads `sys._current_frames()` every `interval_ms` while any
+scope is active. It keeps only the stacks that belong to one:
+- for a task, the frames from the task's root coroutine down, and only while
+  that task is the one running on the loop,
+- for a request, the whole thread.
+
+Other tasks sharing the loop don't leak into a profile, and nothing runs
+while no sampled scope is active.
+
+Samples are aggregated per scope label (e.g. `command:reviews`,
+`component:leave_review`, `route:user_profile`). They are written as
+collapsed stacks (`frame;frame;frame count`) to
+`data/profiles/<session>/<label>.collapsed`, ready for flamegraph.pl or
+speedscope. The files are rewritten every `flush_interval` seconds and when
+profiling is turned off.
+
+Defaults come from the optional `profiling` section of config.yaml, read
+each time profiling is turned on.
+"""
+import asyncio
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+import yaml
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIG_PATH = os.path.join(ROOT_DIR, 'data', 'config.yaml')
+
+DEFAULT_SETTINGS = {
+    'sample_rate': 0.1,             # fraction of interactions and requests profiled
+    'kinds': ['command', 'component', 'modal', 'route'],
+    'interval_ms': 5,               # time between stack samples of an active scope
+    'max_depth': 64,                # frames kept per stack (innermost)
+    'flush_interval': 60,           # seconds between profile file rewrites
+    'output_dir': 'data/profiles',  # relative to the project root
+}
+
+log = logging.getLogger(__name__)
+
+
+def get_settings() -> dict:
+    try:
+        with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+            config = yaml.safe_load(f) or {}
+    except FileNotFoundError:
+        config = {}
+    return {**DEFAULT_SETTINGS, **(config.get('profiling') or {})}
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    path = os.path.abspath(code.co_filename)
+    if path.startswith(ROOT_DIR + os.sep):
+        path = os.path.relpath(path, ROOT_DIR)
+    else:
+        # Libraries: keep the package-relative part (discord/http.py, sqlite3/__init__.py)
+        path = os.sep.join(path.split(os.sep)[-2:])
+    return f"{code.co_name} ({path.replace(os.sep, '/')}:{code.co_firstlineno})"
+
+
+class _Scope:
+    __slots__ = ('label', 'thread_id', 'root')
+
+    def __init__(self, label: str, thread_id: int, root=None):
+        self.label = label
+        self.thread_id = thread_id
+        self.root = root    # root coroutine frame of a task; None samples the whole thread
+
+
+class SamplingProfiler:
+    """Samples the stacks of registered task and request scopes from a helper thread."""
+
+    def __init__(self):
+        self.settings = dict(DEFAULT_SETTINGS)
+        self.enabled = False
+        self.sample_rate = self.settings['sample_rate']
+        self.session: Optional[str] = None
+        self._lock = threading.Lock()
+        self._scopes: Dict[int, _Scope] = {}
+        self._stacks: Dict[str, Counter] = {}
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._flushed_at = 0.0
+        self.stats = {'scopes': 0, 'samples': 0}
+
+    def enable(self, sample_rate: Optional[float] = None) -> dict:
+        """Start a profiling session (or change the rate of the running one)."""
+        with self._lock:
+            if not self.enabled:
+                self.settings = get_settings()
+                self.sample_rate = self.settings['sample_rate']
+                self.enabled = True
+                self.session = time.strftime('%Y%m%d-%H%M%S')
+                self._stacks = {}
+                self.stats = {'scopes': 0, 'samples': 0}
+                self._flushed_at = time.monotonic()
+        if sample_rate is not None:
+            self.sample_rate = min(max(float(sample_rate), 0.0), 1.0)
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='profiler', daemon=True)
+            self._thread.start()
+        log.info("Profiling enabled at %.0f%% sampling (session %s)", self.sample_rate * 100, self.session)
+        return self.snapshot()
+
+    def disable(self) -> dict:
+        """Stop sampling and write the session's profiles."""
+        with self._lock:
+            was_enabled, self.enabled = self.enabled, False
+            self._scopes.clear()
+        self._wake.set()
+        if was_enabled:
+            self.flush()
+            log.info("Profiling disabled; profiles written to %s", self._session_dir())
+        return self.snapshot()
+
+    def _should_sample(self, kind: str) -> bool:
+        return self.enabled and kind in self.settings['kinds'] and random.random() < self.sample_rate
+
+    def sample_task(self, kind: str, name: str):
+        """Maybe profile the current asyncio task until it finishes."""
+        if not self._should_sample(kind):
+            return
+        task = asyncio.current_task()
+        root = getattr(task.get_coro(), 'cr_frame', None) if task else None
+        if root is None:
+            return
+        self._begin(id(task), _Scope(f"{kind}:{name}", threading.get_ident(), root))
+        task.add_done_callback(lambda t: self._end(id(t)))
+
+    def begin_thread(self, kind: str, name: str) -> bool:
+        """Maybe profile the current thread until end_thread(); returns whether it is sampled."""
+        if not self._should_sample(kind):
+            return False
+        self._begin(threading.get_ident(), _Scope(f"{kind}:{name}", threading.get_ident()))
+        return True
+
+    def end_thread(self):
+        self._end(threading.get_ident())
+
+    def _begin(self, key: int, scope: _Scope):
+        with self._lock:
+            self._scopes[key] = scope
+            self.stats['scopes'] += 1
+        self._wake.set()
+
+    def _end(self, key: int):
+        with self._lock:
+            self._scopes.pop(key, None)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                scopes = list(self._scopes.values())
+                enabled = self.enabled
+            if not enabled:
+                return
+            if not scopes:
+                self._wake.clear()
+                self._wake.wait(1.0)
+            else:
+                self._sample(scopes)
+                time.sleep(self.settings['interval_ms'] / 1000)
+            if time.monotonic() - self._flushed_at >= self.settings['flush_interval']:
+                self.flush()
+
+    def _sample(self, scopes):
+        frames = sys._current_frames()
+        max_depth = self.settings['max_depth']
+        for scope in scopes:
+            frame = frames.get(scope.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(frame)
+                if frame is scope.root:
+                    break
+                frame = frame.f_back
+            if scope.root is not None and (not stack or stack[-1] is not scope.root):
+                continue    # another task is running on the loop right now
+            collapsed = ';'.join(_frame_name(f) for f in reversed(stack[:max_depth]))
+            with self._lock:
+                self._stacks.setdefault(scope.label, Counter())[collapsed] += 1
+                self.stats['samples'] += 1
+        del frames
+
+    def _session_dir(self) -> str:
+        return os.path.join(ROOT_DIR, self.settings['output_dir'], self.session or 'idle')
+
+    def flush(self):
+        """Rewrite the session's collapsed-stack files with everything sampled so far."""
+        self._flushed_at = time.monotonic()
+        with self._lock:
+            stacks = {label: dict(counts) for label, counts in self._stacks.items()}
+        if not stacks:
+            return
+        directory = self._session_dir()
+        os.makedirs(directory, exist_ok=True)
+        for label, counts in stacks.items():
+            path = os.path.join(directory, re.sub(r'[^\w.-]+', '_', label) + '.collapsed')
+            try:
+                with open(path, 'w', encoding='utf-8') as f:
+                    for stack, count in sorted(counts.items(), key=lambda kv: kv[1], reverse=True):
+                        f.write(f"{stack} {count}\n")
+            except OSError:
+                log.exception("Failed to write profile %s", path)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            labels = {label: sum(counts.values()) for label, counts in sorted(self._stacks.items())}
+            return {
+                'enabled': self.enabled,
+                'sample_rate': self.sample_rate,
+                'session': self.session,
+                'output_dir': os.path.relpath(self._session_dir(), ROOT_DIR) if self.session else None,
+                'active_scopes': len(self._scopes),
+                **self.stats,
+                'samples_by_label': labels,
+            }
+
+
+profiler = SamplingProfiler()
+
+
+def install_flask_profiling(app):
+    """
+    Profile a sampled fraction of requests by endpoint and add the
+    /api/profiling switch (admin sessions only).
+    """
+    from flask import g, jsonify, request
+
+    from utils.access import admin_required
+
+    @app.before_request
+    def _begin_profile():
+        if profiler.enabled and request.endpoint not in (None, 'static', 'profiling'):
+            g._profiled = profiler.begin_thread('route', request.endpoint)
+
+    @app.teardown_request
+    def _end_profile(exc):
+        if g.pop('_profiled', False):
+            profiler.end_thread()
+
+    @admin_required
+    def profiling_endpoint():
+        if request.method == 'POST':
+            data = request.get_json(silent=True) or {}
+            if not data.get('enabled'):
+                return jsonify(profiler.disable())
+            sample_rate = data.get('sample_rate')
+            if sample_rate is not None:
+                if isinstance(sample_rate, bool) or not isinstance(sample_rate, (int, float)) \
+                        or not 0 < sample_rate <= 1:
+                    return jsonify({'status': 'error', 'message': 'sample_rate must be a number in (0, 1]'}), 400
+            return jsonify(profiler.enable(sample_rate))
+        return jsonify(profiler.snapshot())
+
+    app.add_url_rule('/api/profiling', 'profiling', profiling_endpoint, methods=['GET', 'POST'])
@@ -0,0 +1,236 @@
+"""
+Compact record types returned by the database layer.
+
+Each record is a slotted dataclass built straight from a cursor tuple through
+its `from_row` row factory, so large listings don't allocate a dict (and a set
+of repeated string keys) per row. Records support both attribute and
+`record['key']` access, which keeps Jinja templates working, and Flask's
+`jsonify` serializes them like any other dataclass.
+"""
+import json
+from dataclasses import dataclass, fields
+from typing import Any, Optional
+
+
+def _parse_json_list(value: Optional[str]) -> list:
+    if not value:
+        return []
+    try:
+        return json.loads(value)
+    except (json.JSONDecodeError, TypeError):
+        return []
+
+
+def _slotted(cls):
+    """
+    `@dataclass(slots=True)`, which needs Python 3.10: build the dataclass,
+    then recreate it with `__slots__` set to its fields.
+    """
+    cls = dataclass(cls)
+    names = tuple(f.name for f in fields(cls))
+    namespace = {k: v for k, v in cls.__dict__.items() if k not in names + ('__dict__', '__weakref__')}
+    namespace['__slots__'] = names
+    return type(cls)(cls.__name__, cls.__bases__, namespace)
+
+
+class _Record:
+    __slots__ = ()
+
+    @classmethod
+    def from_row(cls, cursor, row):
+        """sqlite3 row factory: build the record from a tuple in field order."""
+        return cls(*row)
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+
+    def keys(self):
+        return self.__slots__
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+@_slotted
+class User(_Record):
+    user_id: int
+    username: str
+    display_name: Optional[str]
+    avatar_url: Optional[str]
+    banner_url: Optional[str]
+    accent_color: Optional[int]
+    public_flags: Optional[int]
+    joined_at: Optional[str]
+    left_at: Optional[str]
+    is_in_server: bool
+    roles: Optional[str]
+    badges: Optional[str]
+
+    # Column order expected by from_row
+    COLUMNS = ("user_id, username, display_name, avatar_url, banner_url, accent_color, "
+               "public_flags, joined_at, left_at, is_in_server, roles, badges")
+
+    @classmethod
+    def from_row(cls, cursor, row):
+        record = cls(*row)
+        record.is_in_server = bool(record.is_in_server)
+        return record
+
+
+@_slotted
+class UserActivity(_Record):
+    user_id: int
+    username: str
+    display_name: Optional[str]
+    avatar_url: Optional[str]
+    banner_url: Optional[str]
+    accent_color: Optional[int]
+    public_flags: Optional[int]
+    is_in_server: bool
+    left_at: Optional[str]
+    roles: list
+    badges: list
+    avg_rating: float
+    total_reviews: int
+    reviews_given: int
+
+    @classmethod
+    def from_row(cls, cursor, row):
+        record = cls(*row)
+        record.is_in_server = bool(record.is_in_server)
+        record.roles = _parse_json_list(record.roles)
+        record.badges = _parse_json_list(record.badges)
+        record.avg_rating = float(record.avg_rating or 0)
+        return record
+
+
+@_slotted
+class Review(_Record):
+    id: int
+    giver_id: int
+    receiver_id: int
+    thread_id: int
+    rating: int
+    notes: Optional[str]
+    created_at: Optional[str]
+
+    COLUMNS = "id, giver_id, receiver_id, thread_id, rating, notes, created_at"
+
+
+@_slotted
+class Thread(_Record):
+    thread_id: int
+    channel_id: int
+    guild_id: int
+    name: str
+    owner_id: int
+    created_at: Optional[str]
+    archived: bool
+    locked: bool
+    jump_url: str
+    auto_close_scheduled: Optional[str]
+    auto_close_cancelled: bool
+    state: str
+    review_count: int
+    state_changed_at: Optional[str]
+    opened_at: Optional[str]
+    reviewed_at: Optional[str]
+    closed_at: Optional[str]
+
+    COLUMNS = ("thread_id, channel_id, guild_id, name, owner_id, created_at, archived, locked, "
+               "jump_url, auto_close_scheduled, auto_close_cancelled, "
+               "state, review_count, state_changed_at, opened_at, reviewed_at, closed_at")
+
+    # Lifecycle states (threads.state), in order
+    TOS_PENDING = 'tos_pending'
+    OPEN = 'open'
+    REVIEWED = 'reviewed'
+    CLOSE_SCHEDULED = 'close_scheduled'
+    CLOSED = 'closed'
+    ACTIVE_STATES = (TOS_PENDING, OPEN, REVIEWED, CLOSE_SCHEDULED)
+
+    @classmethod
+    def from_row(cls, cursor, row):
+        record = cls(*row)
+        record.archived = bool(record.archived)
+        record.locked = bool(record.locked)
+        record.auto_close_cancelled = bool(record.auto_close_cancelled)
+        return record
+
+
+@_slotted
+class TOSGate(_Record):
+    """A thread waiting on its owner to accept the TOS prompt."""
+    thread_id: int
+    channel_id: int
+    op_id: int
+    message_id: Optional[int]
+    prompted_at: float    # unix time; the OP's later messages are deleted
+    expires_at: float     # unix time the thread is closed if still pending
+
+    COLUMNS = "thread_id, channel_id, op_id, message_id, prompted_at, expires_at"
+
+
+@_slotted
+class Event(_Record):
+    """One entry in the append-only audit trail."""
+    id: int
+    type: str
+    thread_id: Optional[int]
+    actor_id: Optional[int]
+    payload: dict
+    created_at: float     # unix time
+
+    COLUMNS = "id, type, thread_id, actor_id, payload, created_at"
+
+    @classmethod
+    def from_row(cls, cursor, row):
+        record = cls(*row)
+        try:
+            record.payload = json.loads(record.payload) if record.payload else {}
+        except (json.JSONDecodeError, TypeError):
+            record.payload = {}
+        return record
+
+
+@_slotted
+class OutboxMessage(_Record):
+    """A queued log channel or notification message."""
+    id: int
+    channel_id: int
+    priority: int
+    content: Optional[str]
+    embed: Optional[dict]    # discord.Embed.to_dict()
+    attempts: int
+    next_attempt_at: float   # unix time
+    created_at: float
+
+    COLUMNS = "id, channel_id, priority, content, embed, attempts, next_attempt_at, created_at"
+
+    @classmethod
+    def from_row(cls, cursor, row):
+        record = cls(*row)
+        try:
+            record.embed = json.loads(record.embed) if record.embed else None
+        except (json.JSONDecodeError, TypeError):
+            record.embed = None
+        return record
+
+
+@_slotted
+class RecentReview(_Record):
+    """A review joined with the giver's and receiver's profile, for the homepage feed."""
+    rating: int
+    created_at: Optional[str]
+    giver_name: Optional[str]
+    giver_display: Optional[str]
+    giver_avatar: Optional[str]
+    receiver_name: Optional[str]
+    receiver_display: Optional[str]
+    receiver_avatar: Optional[str]
@@ -0,0 +1,194 @@
+"""
+Read-only snapshot replica of rep.db for the web dashboards.
+
+When enabled, the bot (see cogs/replica.py) watches `PRAGMA data_version` and
+publishes a consistent copy of the database with the sqlite3 backup API
+whenever it changes. Each snapshot is written to its own versioned file and
+then made current by atomically replacing a small pointer file. Published
+snapshot files are never modified, so the dashboards can open them with
+`mode=ro&immutable=1`, which skips all locking. Their long listing and search
+queries never hold a lock on the live database that a review commit would
+have to wait for.
+
+Dashboards call `connect_reader()` for read-only queries. It falls back to the
+live database when replica mode is off or no snapshot has been published yet.
+"""
+import json
+import os
+import sqlite3
+import time
+from typing import Optional
+
+import yaml
+
+from utils import db
+from utils.instrumentation import InstrumentedConnection
+
+CONFIG_PATH = os.path.join(db.ROOT_DIR, 'data', 'config.yaml')
+POINTER_NAME = 'CURRENT'
+SNAPSHOT_PREFIX = 'rep-'
+USERS_SNAPSHOT_PREFIX = 'users-'
+
+DEFAULT_SETTINGS = {
+    'enabled': False,
+    'directory': 'data/replica',
+    'check_interval_seconds': 5,    # how often the bot polls data_version
+    'min_interval_seconds': 30,     # never publish more often than this
+    'keep_snapshots': 3,            # older snapshots are deleted
+}
+
+_settings: Optional[dict] = None
+
+
+def get_settings() -> dict:
+    """
+    Replica settings, loaded once from the `replica` section of config.yaml.
+    """
+    global _settings
+    if _settings is None:
+        try:
+            with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+                config = yaml.safe_load(f) or {}
+        except FileNotFoundError:
+            config = {}
+        _settings = {**DEFAULT_SETTINGS, **(config.get("replica") or {})}
+    return _settings
+
+
+def replica_dir() -> str:
+    path = get_settings()['directory']
+    return path if os.path.isabs(path) else os.path.join(db.ROOT_DIR, path)
+
+
+def current_snapshot(directory: Optional[str] = None) -> Optional[dict]:
+    """
+    Read the pointer file. Returns {'file', 'published_at', 'data_version'} or None.
+    """
+    directory = directory or replica_dir()
+    try:
+        with open(os.path.join(directory, POINTER_NAME), 'r', encoding='utf-8') as f:
+            pointer = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if not os.path.exists(os.path.join(directory, pointer.get('file', ''))):
+        return None
+    return pointer
+
+
+def snapshot_age(directory: Optional[str] = None) -> Optional[float]:
+    """
+    Seconds since the current snapshot was taken, or None if there isn't one.
+    """
+    pointer = current_snapshot(directory)
+    if not pointer:
+        return None
+    return max(0.0, time.time() - pointer['published_at'])
+
+
+def status() -> dict:
+    """
+    Replica state for the dashboard status endpoints.
+    """
+    settings = get_settings()
+    pointer = current_snapshot() if settings['enabled'] else None
+    return {
+        'enabled': settings['enabled'],
+        'snapshot': pointer['file'] if pointer else None,
+        'published_at': pointer['published_at'] if pointer else None,
+        'age_seconds': round(time.time() - pointer['published_at'], 3) if pointer else None,
+        'serving': 'snapshot' if pointer else 'live',
+    }
+
+
+def connect_reader() -> sqlite3.Connection:
+    """
+    Open a connection for read-only dashboard queries.
+
+    Uses the current snapshot when replica mode is enabled, otherwise the live
+    database.
+    """
+    if get_settings()['enabled']:
+        directory = replica_dir()
+        pointer = current_snapshot(directory)
+        if pointer:
+            path = os.path.join(directory, pointer['file'])
+            conn = sqlite3.connect(f"file:{path}?mode=ro&immutable=1", uri=True, factory=InstrumentedConnection)
+            if pointer.get('users_file'):
+                users_path = os.path.join(directory, pointer['users_file'])
+                conn.execute(f"ATTACH DATABASE ? AS {db.USERS_SCHEMA}", (f"file:{users_path}?mode=ro&immutable=1",))
+            return conn
+    return db.connect()
+
+
+def _write_pointer(directory: str, pointer: dict):
+    tmp_path = os.path.join(directory, POINTER_NAME + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(pointer, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(directory, POINTER_NAME))
+
+
+def _prune(directory: str, prefix: str, keep: int, current: str):
+    snapshots = sorted(
+        name for name in os.listdir(directory)
+        if name.startswith(prefix) and name.endswith('.db')
+    )
+    for name in snapshots[:-keep] if keep > 0 else snapshots:
+        if name == current:
+            continue
+        try:
+            os.remove(os.path.join(directory, name))
+        except OSError:
+            # Still open by a dashboard on Windows; retry on the next publish
+            pass
+
+
+def _backup_to(source: sqlite3.Connection, schema: str, path: str):
+    tmp_path = path + '.tmp'
+    target = sqlite3.connect(tmp_path)
+    try:
+        # One step is one read transaction: a consistent WAL snapshot that
+        # never blocks bot writes. A stepped copy restarts on every commit
+        # made between steps, so a busy bot could keep it from finishing.
+        source.backup(target, pages=-1, name=schema)
+        # A snapshot must be a single self-contained file to open as immutable
+        target.execute("PRAGMA journal_mode=DELETE")
+        target.commit()
+    finally:
+        target.close()
+    os.replace(tmp_path, path)
+
+
+def publish_snapshot(data_version: Optional[int] = None, directory: Optional[str] = None) -> dict:
+    """
+    Copy the live database into a new snapshot file and make it current.
+
+    The backup copies all pages in one read transaction; under WAL the bot
+    keeps committing while it runs. Blocking, so call it from a worker
+    thread. Returns the new pointer.
+    """
+    settings = get_settings()
+    directory = directory or replica_dir()
+    os.makedirs(directory, exist_ok=True)
+
+    published_at = time.time()
+    stamp = f"{int(published_at * 1000):015d}"
+    name = f"{SNAPSHOT_PREFIX}{stamp}.db"
+
+    source = db.connect()
+    try:
+        _backup_to(source, 'main', os.path.join(directory, name))
+        users_name = None
+        if db.USERS_DB_PATH:
+            users_name = f"{USERS_SNAPSHOT_PREFIX}{stamp}.db"
+            _backup_to(source, db.USERS_SCHEMA, os.path.join(directory, users_name))
+    finally:
+        source.close()
+
+    pointer = {'file': name, 'users_file': users_name, 'published_at': published_at, 'data_version': data_version}
+    _write_pointer(directory, pointer)
+    _prune(directory, SNAPSHOT_PREFIX, settings['keep_snapshots'], name)
+    if users_name:
+        _prune(directory, USERS_SNAPSHOT_PREFIX, settings['keep_snapshots'], users_name)
+    return pointer
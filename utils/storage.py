@@ -0,0 +1,237 @@
+"""
+Storage backends for reviews, users, threads and stats.
+
+Cogs and dashboards call `get_storage()` and only use the `Storage` protocol
+below, so the engine behind it can be swapped:
+
+- `SQLiteStorage` (default) wraps utils/db.py. Dashboard-only reads go
+  through the replica reader when replica mode is enabled.
+- `MemoryStorage` (utils/memory_storage.py) keeps everything in dicts and
+  lists, with no disk I/O. It is meant for tests and benchmarks; its data is
+  lost when the process exits.
+
+The engine is chosen by `storage.backend` in config.yaml, or by calling
+`set_storage()` before the bot or dashboard starts.
+"""
+import logging
+import os
+import sqlite3
+from typing import Callable, Dict, List, Optional, Protocol, Tuple
+
+import yaml
+
+from utils import db, replica
+from utils.records import Event, OutboxMessage, RecentReview, Review, Thread, TOSGate, User, UserActivity
+
+CONFIG_PATH = os.path.join(db.ROOT_DIR, 'data', 'config.yaml')
+
+log = logging.getLogger(__name__)
+
+DEFAULT_SETTINGS = {
+    'backend': 'sqlite',    # sqlite or memory
+}
+
+_settings: Optional[dict] = None
+_storage: Optional["Storage"] = None
+
+
+class Storage(Protocol):
+    """Operations the bot and dashboards need from a storage engine."""
+
+    def init(self) -> None: ...
+
+    # Reviews
+    def add_review(self, giver_id: int, receiver_id: int, thread_id: int, rating: int,
+                   notes: Optional[str] = None) -> bool: ...
+    def get_user_reviews(self, user_id: int, full_history: bool = False) -> Tuple[float, int, List[Review]]: ...
+    def get_top_rated_users(self, limit: int = 10) -> List[Tuple[int, float, int]]: ...
+    def has_user_reviewed(self, giver_id: int, receiver_id: int, thread_id: int) -> bool: ...
+    def is_first_review_in_thread(self, thread_id: int) -> bool: ...
+    def count_reviews_by_others(self, thread_id: int, user_id: int) -> int: ...
+    def get_recent_reviews(self, limit: int = 6) -> List[RecentReview]: ...
+
+    # Users
+    def upsert_user(self, user_id: int, username: str, display_name: str = None, avatar_url: str = None,
+                    banner_url: str = None, accent_color: int = None, public_flags: int = None,
+                    joined_at: str = None, is_in_server: bool = True, roles: str = None,
+                    badges: str = None) -> None: ...
+    def mark_user_left(self, user_id: int) -> None: ...
+    def get_all_users(self) -> List[User]: ...
+    def get_user(self, user_id: int) -> Optional[User]: ...
+    def get_users_missing_profile(self, limit: int = 50) -> List[User]: ...
+    def update_user_profile(self, user_id: int, banner_url: str = None, accent_color: int = None,
+                            public_flags: int = None, badges: str = None) -> None: ...
+
+    # Threads
+    def upsert_thread(self, thread_id: int, channel_id: int, guild_id: int, name: str,
+                      owner_id: int, jump_url: str, archived: bool = False, locked: bool = False) -> None: ...
+    def upsert_threads(self, threads: List[tuple]) -> None: ...
+    def get_thread_info(self, thread_id: int) -> Optional[Thread]: ...
+    def schedule_thread_auto_close(self, thread_id: int, close_timestamp: float) -> None: ...
+    def cancel_thread_auto_close(self, thread_id: int) -> None: ...
+    def get_threads_to_auto_close(self) -> List[Thread]: ...
+    def get_active_thread_ids(self) -> List[int]: ...
+    def count_threads_by_state(self) -> Dict[str, int]: ...
+    def set_thread_state(self, thread_id: int, state: str) -> None: ...
+    def get_thread_review_count(self, thread_id: int) -> int: ...
+
+    # TOS gates
+    def add_tos_gate(self, thread_id: int, channel_id: int, op_id: int, message_id: Optional[int],
+                     prompted_at: float, expires_at: float) -> None: ...
+    def get_tos_gates(self) -> List[TOSGate]: ...
+    def delete_tos_gates(self, thread_ids: List[int]) -> None: ...
+
+    # Review panels
+    def get_review_panel(self, thread_id: int) -> Optional[int]: ...
+    def set_review_panel(self, thread_id: int, message_id: int) -> None: ...
+
+    # Log channel embeds
+    def get_log_message(self, log_key: str) -> Optional[Tuple[int, int]]: ...
+    def set_log_message(self, log_key: str, channel_id: int, message_id: int) -> None: ...
+    def get_log_events(self, log_key: str) -> List[Tuple[str, str]]: ...
+    def add_log_events(self, events: List[tuple]) -> None: ...
+
+    # Audit events
+    def append_events(self, events: List[tuple]) -> None: ...
+    def get_events(self, thread_id: Optional[int] = None, event_type: Optional[str] = None,
+                   before_id: Optional[int] = None, limit: int = 50) -> List[Event]: ...
+
+    # Outbox
+    def add_outbox_messages(self, messages: List[tuple]) -> None: ...
+    def get_due_outbox_messages(self, now: float, limit: int = 50) -> List[OutboxMessage]: ...
+    def get_outbox_depth(self) -> Tuple[int, Optional[float]]: ...
+    def delete_outbox_messages(self, ids: List[int]) -> None: ...
+    def retry_outbox_message(self, message_id: int, next_attempt_at: float) -> None: ...
+
+    # Stats and dashboard listings
+    def get_profile_stats(self, user_id: int, full_history: bool = False) -> dict: ...
+    def list_user_activity(self, search: Optional[str] = None, limit: Optional[int] = None,
+                           offset: int = 0) -> List[UserActivity]: ...
+    def count_users(self, search: Optional[str] = None) -> int: ...
+    def get_site_stats(self) -> dict: ...
+
+
+class SQLiteStorage:
+    """
+    The SQLite engine in utils/db.py. `reader` opens the connection used for
+    dashboard-only reads; it defaults to the primary database.
+    """
+
+    def __init__(self, reader: Optional[Callable[[], sqlite3.Connection]] = None):
+        self._reader = reader or db.connect
+
+    def _read(self, func, *args, **kwargs):
+        conn = self._reader()
+        try:
+            return func(*args, conn=conn, **kwargs)
+        finally:
+            conn.close()
+
+    def init(self) -> None:
+        db.init_db()
+
+    # Writes and bot-side reads always use the primary database
+    add_review = staticmethod(db.add_review)
+    get_user_reviews = staticmethod(db.get_user_reviews)
+    get_top_rated_users = staticmethod(db.get_top_rated_users)
+    has_user_reviewed = staticmethod(db.has_user_reviewed)
+    is_first_review_in_thread = staticmethod(db.is_first_review_in_thread)
+    count_reviews_by_others = staticmethod(db.count_reviews_by_others)
+    upsert_user = staticmethod(db.upsert_user)
+    mark_user_left = staticmethod(db.mark_user_left)
+    get_all_users = staticmethod(db.get_all_users)
+    get_users_missing_profile = staticmethod(db.get_users_missing_profile)
+    update_user_profile = staticmethod(db.update_user_profile)
+    upsert_thread = staticmethod(db.upsert_thread)
+    upsert_threads = staticmethod(db.upsert_threads)
+    get_thread_info = staticmethod(db.get_thread_info)
+    schedule_thread_auto_close = staticmethod(db.schedule_thread_auto_close)
+    cancel_thread_auto_close = staticmethod(db.cancel_thread_auto_close)
+    get_threads_to_auto_close = staticmethod(db.get_threads_to_auto_close)
+    get_active_thread_ids = staticmethod(db.get_active_thread_ids)
+    set_thread_state = staticmethod(db.set_thread_state)
+    get_thread_review_count = staticmethod(db.get_thread_review_count)
+    add_tos_gate = staticmethod(db.add_tos_gate)
+    get_tos_gates = staticmethod(db.get_tos_gates)
+    delete_tos_gates = staticmethod(db.delete_tos_gates)
+    get_review_panel = staticmethod(db.get_review_panel)
+    set_review_panel = staticmethod(db.set_review_panel)
+    get_log_message = staticmethod(db.get_log_message)
+    set_log_message = staticmethod(db.set_log_message)
+    get_log_events = staticmethod(db.get_log_events)
+    add_log_events = staticmethod(db.add_log_events)
+    append_events = staticmethod(db.append_events)
+    add_outbox_messages = staticmethod(db.add_outbox_messages)
+    get_due_outbox_messages = staticmethod(db.get_due_outbox_messages)
+    get_outbox_depth = staticmethod(db.get_outbox_depth)
+    delete_outbox_messages = staticmethod(db.delete_outbox_messages)
+    retry_outbox_message = staticmethod(db.retry_outbox_message)
+
+    def get_recent_reviews(self, limit: int = 6) -> List[RecentReview]:
+        return self._read(db.get_recent_reviews, limit)
+
+    def get_user(self, user_id: int) -> Optional[User]:
+        return self._read(db.get_user, user_id)
+
+    def get_profile_stats(self, user_id: int, full_history: bool = False) -> dict:
+        return self._read(db.get_profile_stats, user_id, full_history)
+
+    def list_user_activity(self, search: Optional[str] = None, limit: Optional[int] = None,
+                           offset: int = 0) -> List[UserActivity]:
+        return self._read(db.list_user_activity, search, limit, offset)
+
+    def count_users(self, search: Optional[str] = None) -> int:
+        return self._read(db.count_users, search)
+
+    def get_site_stats(self) -> dict:
+        return self._read(db.get_site_stats)
+
+    def count_threads_by_state(self) -> Dict[str, int]:
+        return self._read(db.count_threads_by_state)
+
+    def get_events(self, thread_id: Optional[int] = None, event_type: Optional[str] = None,
+                   before_id: Optional[int] = None, limit: int = 50) -> List[Event]:
+        return self._read(db.get_events, thread_id, event_type, before_id, limit)
+
+
+def get_settings() -> dict:
+    """
+    Storage settings, loaded once from the `storage` section of config.yaml.
+    """
+    global _settings
+    if _settings is None:
+        try:
+            with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+                config = yaml.safe_load(f) or {}
+        except FileNotFoundError:
+            config = {}
+        _settings = {**DEFAULT_SETTINGS, **(config.get("storage") or {})}
+    return _settings
+
+
+def get_storage() -> Storage:
+    """
+    The storage engine shared by the bot and dashboards in this process.
+    """
+    global _storage
+    if _storage is None:
+        backend = get_settings()['backend']
+        if backend == 'memory':
+            from utils.memory_storage import MemoryStorage
+            _storage = MemoryStorage()
+            log.warning("Using the in-memory storage engine; data is not persisted")
+        elif backend == 'sqlite':
+            _storage = SQLiteStorage(reader=replica.connect_reader)
+        else:
+            raise ValueError(f"Unknown storage backend: {backend!r} (expected 'sqlite' or 'memory')")
+    return _storage
+
+
+def set_storage(storage: Optional[Storage]) -> Optional[Storage]:
+    """
+    Replace the shared storage engine (None goes back to the configured one).
+    Returns the previous engine.
+    """
+    global _storage
+    previous, _storage = _storage, storage
+    return previous
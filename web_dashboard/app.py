@@ -1,5 +1,4 @@
 from flask import Flask, render_template, request, jsonify, session, redirect, url_for
-import sqlite3
 import os
 import sys
 import asyncio
@@ -14,6 +13,7 @@ import requests
 import hmac
 import hashlib
 import json
+import logging
 from urllib.parse import urlencode
 import secrets
 
@@ -22,10 +22,21 @@ load_dotenv()
 
 # Add parent directory to path to import utils
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from utils import db
+from utils import metrics, replica
+from utils.access import admin_required
+from utils.instrumentation import install_flask_hooks, named_query, query_stats
+from utils.metrics import install_flask_metrics
+from utils.profiling import install_flask_profiling
+from utils.log import setup_logging
+from utils.storage import get_storage
+
+log = logging.getLogger(__name__)
 
 app = Flask(__name__)
 app.secret_key = os.getenv('FLASK_SECRET_KEY', secrets.token_hex(16))
+install_flask_hooks(app)
+install_flask_metrics(app)
+install_flask_profiling(app)
 
 # Configuration - Support both running from root and web_dashboard directory
 if os.path.exists('data/config.yaml'):
@@ -85,16 +96,16 @@ def exchange_code_for_token(code):
     
     try:
         response = requests.post(f'{DISCORD_API_BASE_URL}/oauth2/token', data=data, headers=headers)
-        print(f"DEBUG: Token exchange response status: {response.status_code}")
+        log.debug("Token exchange response status: %s", response.status_code)
         
         if response.status_code == 200:
             token_data = response.json()
-            print(f"DEBUG: Token response keys: {list(token_data.keys())}")
+            log.debug("Token response keys: %s", list(token_data.keys()))
             return token_data
         else:
-            print(f"DEBUG: Token exchange error response: {response.text}")
-    except Exception as e:
-        print(f"Error exchanging code for token: {e}")
+            log.warning("Token exchange failed (%s): %s", response.status_code, response.text)
+    except Exception:
+        log.exception("Error exchanging code for token")
     
     return None
 
@@ -105,18 +116,17 @@ def get_discord_user_info(access_token):
     }
     
     try:
-        print(f"DEBUG: Making request to Discord API with token: {access_token[:20]}...")  # Only show first 20 chars
         response = requests.get(f'{DISCORD_API_BASE_URL}/users/@me', headers=headers)
-        print(f"DEBUG: Discord API response status: {response.status_code}")
+        log.debug("Discord API response status: %s", response.status_code)
         
         if response.status_code == 200:
             user_data = response.json()
-            print(f"DEBUG: Discord user data: {user_data}")
+            log.debug("Discord user data: %s", user_data)
             return user_data
         else:
-            print(f"DEBUG: Discord API error response: {response.text}")
-    except Exception as e:
-        print(f"Error getting Discord user info: {e}")
+            log.warning("Discord API user lookup failed (%s): %s", response.status_code, response.text)
+    except Exception:
+        log.exception("Error getting Discord user info")
     
     return None
 
@@ -132,8 +142,8 @@ def is_user_in_guild(access_token, user_id):
     try:
         response = requests.get(f'{DISCORD_API_BASE_URL}/users/@me/guilds/{GUILD_ID}/member', headers=headers)
         return response.status_code == 200
-    except Exception as e:
-        print(f"Error checking guild membership: {e}")
+    except Exception:
+        log.exception("Error checking guild membership")
         return False
 
 def sync_members_via_api():
@@ -147,7 +157,7 @@ def sync_members_via_api():
     }
     
     try:
-        print("🔄 Fetching Discord server members via API...")
+        log.info("Fetching Discord server members via API")
         
         # Get guild info
         guild_response = requests.get(f'https://discord.com/api/v10/guilds/{GUILD_ID}', headers=headers)
@@ -178,7 +188,7 @@ def sync_members_via_api():
             display_name = member_data.get('nick') or user.get('global_name') or user['username']
             
             # Update user in database
-            db.upsert_user(
+            get_storage().upsert_user(
                 user_id=int(user['id']),
                 username=user['username'],
                 display_name=display_name,
@@ -189,14 +199,15 @@ def sync_members_via_api():
             synced_count += 1
         
         # Mark users who left the server
-        all_db_users = db.get_all_users()
+        all_db_users = get_storage().get_all_users()
         left_count = 0
         for user in all_db_users:
             if user['is_in_server'] and user['user_id'] not in current_member_ids:
-                db.mark_user_left(user['user_id'])
+                get_storage().mark_user_left(user['user_id'])
                 left_count += 1
         
-        print(f"✅ Synced {synced_count} members, marked {left_count} as left")
+        log.info("Synced %d members, marked %d as left", synced_count, left_count)
+        metrics.member_syncs.inc(mode='api')
         return {
             'success': True, 
             'synced': synced_count, 
@@ -206,368 +217,60 @@ def sync_members_via_api():
         }
         
     except requests.exceptions.RequestException as e:
-        print(f"❌ API request error: {e}")
+        log.error("Member sync API request failed: %s", e)
         return {'success': False, 'error': str(e)}
     except Exception as e:
-        print(f"❌ Sync error: {e}")
+        log.exception("Member sync failed")
         return {'success': False, 'error': str(e)}
 
-def get_user_stats(user_id):
+@named_query
+def get_user_stats(user_id, full_history=False):
     """Get comprehensive user statistics"""
-    db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), db.DB_PATH)
-    conn = sqlite3.connect(db_path)
-    c = conn.cursor()
-    
-    # Get review stats
-    c.execute("""
-        SELECT AVG(rating), COUNT(*) 
-        FROM reviews 
-        WHERE receiver_id = ?
-    """, (user_id,))
-    result = c.fetchone()
-    avg_rating = result[0] if result[0] else 0.0
-    total_reviews = result[1]
-    
-    # Get reviews given by this user
-    c.execute("""
-        SELECT COUNT(*) 
-        FROM reviews 
-        WHERE giver_id = ?
-    """, (user_id,))
-    reviews_given = c.fetchone()[0]
-    
-    # Get active threads (not archived)
-    c.execute("""
-        SELECT DISTINCT thread_id 
-        FROM reviews 
-        WHERE receiver_id = ?
-    """, (user_id,))
-    thread_ids = [row[0] for row in c.fetchall()]
-    
-    # Get latest reviews received
-    c.execute("""
-        SELECT giver_id, rating, notes, created_at, thread_id
-        FROM reviews 
-        WHERE receiver_id = ? 
-        ORDER BY created_at DESC 
-        LIMIT 10
-    """, (user_id,))
-    
-    latest_reviews = []
-    for row in c.fetchall():
-        latest_reviews.append({
-            'giver_id': row[0],
-            'rating': row[1],
-            'notes': row[2],
-            'created_at': row[3],
-            'thread_id': row[4]
-        })
-    
-    # Get latest reviews given
-    c.execute("""
-        SELECT receiver_id, rating, notes, created_at, thread_id
-        FROM reviews 
-        WHERE giver_id = ? 
-        ORDER BY created_at DESC 
-        LIMIT 10
-    """, (user_id,))
-    
-    reviews_given_data = []
-    for row in c.fetchall():
-        reviews_given_data.append({
-            'receiver_id': row[0],
-            'rating': row[1],
-            'notes': row[2],
-            'created_at': row[3],
-            'thread_id': row[4]
-        })
-    
-    conn.close()
-    
-    return {
-        'avg_rating': avg_rating,
-        'total_reviews': total_reviews,
-        'reviews_given': reviews_given,
-        'thread_ids': thread_ids,
-        'latest_reviews': latest_reviews,
-        'reviews_given_data': reviews_given_data
-    }
+    # Full history also includes reviews moved to the archive database
+    return get_storage().get_profile_stats(user_id, full_history=full_history)
 
+@named_query
 def get_all_users_with_activity():
     """Get all users from the database with their review stats"""
-    db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), db.DB_PATH)
-    conn = sqlite3.connect(db_path)
-    c = conn.cursor()
-    
-    # Get all users from the users table with their stats
-    c.execute("""
-        SELECT 
-            u.user_id,
-            u.username,
-            u.display_name,
-            u.avatar_url,
-            u.is_in_server,
-            u.left_at,
-            u.roles,
-            u.badges,
-            COALESCE(AVG(r_received.rating), 0) as avg_rating,
-            COALESCE(COUNT(r_received.id), 0) as total_reviews,
-            COALESCE(COUNT(r_given.id), 0) as reviews_given
-        FROM users u
-        LEFT JOIN reviews r_received ON u.user_id = r_received.receiver_id
-        LEFT JOIN reviews r_given ON u.user_id = r_given.giver_id
-        GROUP BY u.user_id, u.username, u.display_name, u.avatar_url, u.is_in_server, u.left_at, u.roles, u.badges
-        ORDER BY u.is_in_server DESC, COALESCE(AVG(r_received.rating), 0) DESC, u.username ASC
-    """)
-    
-    users_data = []
-    for row in c.fetchall():
-        # Parse JSON fields safely
-        roles = []
-        badges = []
-        try:
-            if row[6]:  # roles
-                roles = json.loads(row[6])
-        except (json.JSONDecodeError, TypeError):
-            roles = []
-            
-        try:
-            if row[7]:  # badges
-                badges = json.loads(row[7])
-        except (json.JSONDecodeError, TypeError):
-            badges = []
-        
-        users_data.append({
-            'user_id': row[0],
-            'username': row[1],
-            'display_name': row[2],
-            'avatar_url': row[3],
-            'is_in_server': bool(row[4]),
-            'left_at': row[5],
-            'roles': roles,
-            'badges': badges,
-            'avg_rating': float(row[8]),
-            'total_reviews': row[9],
-            'reviews_given': row[10]
-        })
-    
-    conn.close()
-    return users_data
+    return get_storage().list_user_activity()
 
-def get_all_users_with_activity_paginated(page=1, per_page=25):
-    """Get paginated users from the database with their review stats"""
-    db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), db.DB_PATH)
-    conn = sqlite3.connect(db_path)
-    c = conn.cursor()
-    
-    # First, get total count for pagination
-    c.execute("""
-        SELECT COUNT(DISTINCT u.user_id)
-        FROM users u
-    """)
-    total = c.fetchone()[0]
+def _paginate(search, page, per_page):
+    """One page of users (optionally filtered by search) with pagination info"""
+    store = get_storage()
+    total = store.count_users(search)
     
     # Calculate pagination values
     offset = (page - 1) * per_page
     pages = (total + per_page - 1) // per_page  # Ceiling division
     has_prev = page > 1
     has_next = page < pages
-    prev_num = page - 1 if has_prev else None
-    next_num = page + 1 if has_next else None
-    
-    # Get paginated users with their stats
-    c.execute("""
-        SELECT 
-            u.user_id,
-            u.username,
-            u.display_name,
-            u.avatar_url,
-            u.is_in_server,
-            u.left_at,
-            u.roles,
-            u.badges,
-            COALESCE(AVG(r_received.rating), 0) as avg_rating,
-            COALESCE(COUNT(r_received.id), 0) as total_reviews,
-            COALESCE(COUNT(r_given.id), 0) as reviews_given
-        FROM users u
-        LEFT JOIN reviews r_received ON u.user_id = r_received.receiver_id
-        LEFT JOIN reviews r_given ON u.user_id = r_given.giver_id
-        GROUP BY u.user_id, u.username, u.display_name, u.avatar_url, u.is_in_server, u.left_at, u.roles, u.badges
-        ORDER BY u.is_in_server DESC, COALESCE(AVG(r_received.rating), 0) DESC, u.username ASC
-        LIMIT ? OFFSET ?
-    """, (per_page, offset))
-    
-    users_data = []
-    for row in c.fetchall():
-        # Parse JSON fields safely
-        roles = []
-        badges = []
-        try:
-            if row[6]:  # roles
-                roles = json.loads(row[6])
-        except (json.JSONDecodeError, TypeError):
-            roles = []
-            
-        try:
-            if row[7]:  # badges
-                badges = json.loads(row[7])
-        except (json.JSONDecodeError, TypeError):
-            badges = []
-        
-        users_data.append({
-            'user_id': row[0],
-            'username': row[1],
-            'display_name': row[2],
-            'avatar_url': row[3],
-            'is_in_server': bool(row[4]),
-            'left_at': row[5],
-            'roles': roles,
-            'badges': badges,
-            'avg_rating': float(row[8]),
-            'total_reviews': row[9],
-            'reviews_given': row[10]
-        })
-    
-    conn.close()
     
     return {
-        'users': users_data,
+        'users': store.list_user_activity(search, limit=per_page, offset=offset),
         'total': total,
         'pages': pages,
         'page': page,
         'per_page': per_page,
         'has_prev': has_prev,
         'has_next': has_next,
-        'prev_num': prev_num,
-        'next_num': next_num
+        'prev_num': page - 1 if has_prev else None,
+        'next_num': page + 1 if has_next else None
     }
 
+@named_query
+def get_all_users_with_activity_paginated(page=1, per_page=25):
+    """Get paginated users from the database with their review stats"""
+    return _paginate(None, page, per_page)
+
+@named_query
 def search_users_with_pagination(search_query, page=1, per_page=25):
     """Search users with pagination support"""
-    db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), db.DB_PATH)
-    conn = sqlite3.connect(db_path)
-    c = conn.cursor()
-    
-    # Prepare search term for SQL LIKE query
-    search_term = f"%{search_query.lower()}%"
-    
-    # First, get total count for pagination
-    c.execute("""
-        SELECT COUNT(DISTINCT u.user_id)
-        FROM users u
-        WHERE LOWER(u.username) LIKE ? 
-           OR LOWER(u.display_name) LIKE ?
-           OR CAST(u.user_id AS TEXT) LIKE ?
-    """, (search_term, search_term, search_term))
-    total = c.fetchone()[0]
-    
-    # Calculate pagination values
-    offset = (page - 1) * per_page
-    pages = (total + per_page - 1) // per_page  # Ceiling division
-    has_prev = page > 1
-    has_next = page < pages
-    prev_num = page - 1 if has_prev else None
-    next_num = page + 1 if has_next else None
-    
-    # Get paginated search results with their stats
-    c.execute("""
-        SELECT 
-            u.user_id,
-            u.username,
-            u.display_name,
-            u.avatar_url,
-            u.is_in_server,
-            u.left_at,
-            u.roles,
-            u.badges,
-            COALESCE(AVG(r_received.rating), 0) as avg_rating,
-            COALESCE(COUNT(r_received.id), 0) as total_reviews,
-            COALESCE(COUNT(r_given.id), 0) as reviews_given
-        FROM users u
-        LEFT JOIN reviews r_received ON u.user_id = r_received.receiver_id
-        LEFT JOIN reviews r_given ON u.user_id = r_given.giver_id
-        WHERE LOWER(u.username) LIKE ? 
-           OR LOWER(u.display_name) LIKE ?
-           OR CAST(u.user_id AS TEXT) LIKE ?
-        GROUP BY u.user_id, u.username, u.display_name, u.avatar_url, u.is_in_server, u.left_at, u.roles, u.badges
-        ORDER BY u.is_in_server DESC, COALESCE(AVG(r_received.rating), 0) DESC, u.username ASC
-        LIMIT ? OFFSET ?
-    """, (search_term, search_term, search_term, per_page, offset))
-    
-    users_data = []
-    for row in c.fetchall():
-        # Parse JSON fields safely
-        roles = []
-        badges = []
-        try:
-            if row[6]:  # roles
-                roles = json.loads(row[6])
-        except (json.JSONDecodeError, TypeError):
-            roles = []
-            
-        try:
-            if row[7]:  # badges
-                badges = json.loads(row[7])
-        except (json.JSONDecodeError, TypeError):
-            badges = []
-        
-        users_data.append({
-            'user_id': row[0],
-            'username': row[1],
-            'display_name': row[2],
-            'avatar_url': row[3],
-            'is_in_server': bool(row[4]),
-            'left_at': row[5],
-            'roles': roles,
-            'badges': badges,
-            'avg_rating': float(row[8]),
-            'total_reviews': row[9],
-            'reviews_given': row[10]
-        })
-    
-    conn.close()
-    
-    return {
-        'users': users_data,
-        'total': total,
-        'pages': pages,
-        'page': page,
-        'per_page': per_page,
-        'has_prev': has_prev,
-        'has_next': has_next,
-        'prev_num': prev_num,
-        'next_num': next_num
-    }
+    return _paginate(search_query, page, per_page)
 
+@named_query
 def get_homepage_stats():
     """Get overall statistics for the homepage"""
-    db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), db.DB_PATH)
-    conn = sqlite3.connect(db_path)
-    c = conn.cursor()
-    
-    # Get total reviews and average rating
-    c.execute("SELECT COUNT(*), AVG(rating) FROM reviews")
-    total_reviews, avg_rating = c.fetchone()
-    total_reviews = total_reviews or 0
-    avg_rating = avg_rating or 0.0
-    
-    # Get active users (users who have given or received reviews)
-    c.execute("""
-        SELECT COUNT(DISTINCT user_id) FROM (
-            SELECT giver_id as user_id FROM reviews
-            UNION
-            SELECT receiver_id as user_id FROM reviews
-        )
-    """)
-    active_users = c.fetchone()[0] or 0
-    
-    conn.close()
-    
-    return {
-        'total_reviews': total_reviews,
-        'avg_rating': avg_rating,
-        'active_users': active_users
-    }
+    return get_storage().get_site_stats()
 
 def get_guild_info():
     """Get Discord guild information via API and Widget API"""
@@ -595,7 +298,7 @@ def get_guild_info():
                     'description': guild_data.get('description')
                 }
         except Exception as e:
-            print(f"Failed to fetch guild info from Bot API: {e}")
+            log.warning("Failed to fetch guild info from Bot API: %s", e)
     
     # Fallback to Discord Widget API for public information
     if not guild_info and GUILD_ID:
@@ -617,7 +320,7 @@ def get_guild_info():
                     'widget_available': True
                 }
         except Exception as e:
-            print(f"Failed to fetch widget info: {e}")
+            log.warning("Failed to fetch widget info: %s", e)
     
     return guild_info
 
@@ -640,45 +343,23 @@ def get_user_presence_from_widget(user_id):
             # If not in online members but we have their data, they're probably offline
             return 'offline'
     except Exception as e:
-        print(f"Failed to check user presence: {e}")
+        log.warning("Failed to check user presence: %s", e)
     
     return None
 
+@named_query
 def get_recent_reviews(limit=6):
     """Get recent reviews for homepage"""
-    db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), db.DB_PATH)
-    conn = sqlite3.connect(db_path)
-    c = conn.cursor()
-    
-    c.execute("""
-        SELECT 
-            r.rating,
-            r.created_at,
-            giver.username as giver_name,
-            giver.display_name as giver_display,
-            giver.avatar_url as giver_avatar,
-            receiver.username as receiver_name,
-            receiver.display_name as receiver_display,
-            receiver.avatar_url as receiver_avatar
-        FROM reviews r
-        LEFT JOIN users giver ON r.giver_id = giver.user_id
-        LEFT JOIN users receiver ON r.receiver_id = receiver.user_id
-        ORDER BY r.created_at DESC
-        LIMIT ?
-    """, (limit,))
-    
     recent_reviews = []
-    for row in c.fetchall():
+    for review in get_storage().get_recent_reviews(limit):
         recent_reviews.append({
-            'rating': row[0],
-            'created_at': row[1],
-            'giver_name': row[2] or f'User {row[0]}',
-            'giver_avatar': row[4],
-            'receiver_name': row[5] or f'User {row[0]}',
-            'receiver_avatar': row[7]
+            'rating': review.rating,
+            'created_at': review.created_at,
+            'giver_name': review.giver_name or f'User {review.rating}',
+            'giver_avatar': review.giver_avatar,
+            'receiver_name': review.receiver_name or f'User {review.rating}',
+            'receiver_avatar': review.receiver_avatar
         })
-    
-    conn.close()
     return recent_reviews
 
 # Authentication Routes
@@ -714,7 +395,7 @@ def discord_callback():
         if not user_info:
             return "Failed to get user information", 400
         
-        print(f"DEBUG: User info from Discord: {user_info}")  # Debug log
+        log.debug("User info from Discord: %s", user_info)
         
         user_id = user_info.get('id')
         if not user_id:
@@ -724,7 +405,7 @@ def discord_callback():
         try:
             int(user_id)  # Test if it's a valid integer
         except (ValueError, TypeError):
-            print(f"ERROR: Invalid user_id received: {user_id}")
+            log.error("Invalid user_id received: %s", user_id)
             return f"Invalid user ID format: {user_id}", 400
         
         user_id = str(user_id)  # Ensure it's a string
@@ -752,15 +433,15 @@ def discord_callback():
             if user_info.get('avatar'):
                 avatar_url = f"https://cdn.discordapp.com/avatars/{user_id}/{user_info['avatar']}.png"
             
-            db.upsert_user(
+            get_storage().upsert_user(
                 user_id=int(user_id),
                 username=user_info.get('username', 'Unknown'),
                 display_name=user_info.get('global_name') or user_info.get('username', 'Unknown'),
                 avatar_url=avatar_url,
                 is_in_server=True
             )
-        except Exception as e:
-            print(f"Error syncing user to database: {e}")
+        except Exception:
+            log.exception("Error syncing user to database")
         
         # Redirect to their profile or originally requested page
         next_page = session.get('next_page')
@@ -771,7 +452,7 @@ def discord_callback():
         return redirect(url_for('user_profile', user_id=int(user_id)))
         
     except Exception as e:
-        print(f"OAuth callback error: {e}")
+        log.exception("OAuth callback error")
         return render_template('error.html',
                              error_title="Authentication Error", 
                              error_message=f"An error occurred during authentication: {str(e)}")
@@ -837,10 +518,12 @@ def users():
 @app.route('/user/<int:user_id>')
 def user_profile(user_id):
     """User profile page"""
-    stats = get_user_stats(user_id)
+    full_history = request.args.get('history') == 'full'
+    stats = get_user_stats(user_id, full_history=full_history)
     return render_template('user_profile.html', 
                          user_id=user_id, 
                          stats=stats,
+                         full_history=full_history,
                          discord_login_url=get_discord_login_url(),
                          current_user=session.get('user'))
 
@@ -857,34 +540,26 @@ def my_profile():
 @app.route('/api/discord_user/<int:user_id>')
 def get_discord_user_info(user_id):
     """API endpoint to get Discord user information"""
-    db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), db.DB_PATH)
-    conn = sqlite3.connect(db_path)
-    c = conn.cursor()
-    c.execute("""
-        SELECT username, display_name, avatar_url, banner_url, accent_color, is_in_server, roles, badges
-        FROM users WHERE user_id = ?
-    """, (user_id,))
-    result = c.fetchone()
-    conn.close()
+    user = get_storage().get_user(user_id)
     
-    if result:
+    if user:
         # Parse JSON fields safely
         roles = []
         badges = []
         try:
-            if result[6]:  # roles
-                roles = json.loads(result[6])
+            if user.roles:
+                roles = json.loads(user.roles)
         except (json.JSONDecodeError, TypeError):
             roles = []
             
         try:
-            if result[7]:  # badges
-                badges = json.loads(result[7])
+            if user.badges:
+                badges = json.loads(user.badges)
         except (json.JSONDecodeError, TypeError):
             badges = []
         
         # Try to get real-time status from Discord widget
-        presence = get_user_presence_from_widget(user_id) if result[5] else None
+        presence = get_user_presence_from_widget(user_id) if user.is_in_server else None
         
         if presence == 'online':
             status = 'Online'
@@ -894,18 +569,18 @@ def get_discord_user_info(user_id):
             status = 'Do Not Disturb'
         elif presence == 'offline':
             status = 'Offline'
-        elif result[5]:  # is_in_server but no presence data
+        elif user.is_in_server:  # in the server but no presence data
             status = 'Member'
         else:
             status = 'Left Server'
         
         return jsonify({
             'id': user_id,
-            'username': result[0] or 'Unknown',
-            'display_name': result[1] or result[0] or 'Unknown',
-            'avatar_url': result[2] or f'https://cdn.discordapp.com/embed/avatars/{int(user_id) % 5}.png',
-            'banner_url': result[3],
-            'accent_color': result[4],
+            'username': user.username or 'Unknown',
+            'display_name': user.display_name or user.username or 'Unknown',
+            'avatar_url': user.avatar_url or f'https://cdn.discordapp.com/embed/avatars/{int(user_id) % 5}.png',
+            'banner_url': user.banner_url,
+            'accent_color': user.accent_color,
             'status': status,
             'roles': roles,
             'badges': badges
@@ -927,19 +602,21 @@ def get_discord_user_info(user_id):
 @app.route('/api/thread_info/<int:thread_id>')
 def get_thread_info_api(thread_id):
     """API endpoint to get Discord thread information"""
-    thread_info = db.get_thread_info(thread_id)
+    thread_info = get_storage().get_thread_info(thread_id)
     
     if thread_info:
         return jsonify({
-            'id': thread_info['thread_id'],
-            'name': thread_info['name'],
-            'url': thread_info['jump_url'],
-            'created_at': thread_info['created_at'],
-            'archived': thread_info['archived'],
-            'locked': thread_info['locked'],
-            'owner_id': thread_info['owner_id'],
-            'channel_id': thread_info['channel_id'],
-            'guild_id': thread_info['guild_id']
+            'id': thread_info.thread_id,
+            'name': thread_info.name,
+            'url': thread_info.jump_url,
+            'created_at': thread_info.created_at,
+            'archived': thread_info.archived,
+            'locked': thread_info.locked,
+            'state': thread_info.state,
+            'review_count': thread_info.review_count,
+            'owner_id': thread_info.owner_id,
+            'channel_id': thread_info.channel_id,
+            'guild_id': thread_info.guild_id
         })
     else:
         # Fallback for threads not in database yet
@@ -998,6 +675,37 @@ def search_users():
             'message': str(e)
         }), 500
 
+@app.route('/api/query_stats')
+@admin_required
+def get_query_stats():
+    """API endpoint exposing DB query latencies, slow queries and N+1 warnings"""
+    if request.args.get('dump'):
+        return jsonify({'status': 'success', 'path': query_stats.dump_json()})
+    if request.args.get('reset'):
+        query_stats.reset()
+    return jsonify(query_stats.snapshot())
+
+@app.route('/api/replica_status')
+def get_replica_status():
+    """API endpoint reporting whether reads come from a snapshot and how old it is"""
+    return jsonify(replica.status())
+
+@app.route('/api/events')
+@admin_required
+def get_events():
+    """API endpoint with the audit event timeline, newest first. Pass `next_cursor` back as `before` for the next page"""
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 200)
+    events = get_storage().get_events(
+        thread_id=request.args.get('thread_id', type=int),
+        event_type=request.args.get('type') or None,
+        before_id=request.args.get('before', type=int),
+        limit=limit
+    )
+    return jsonify({
+        'events': events,
+        'next_cursor': events[-1].id if len(events) == limit else None
+    })
+
 @app.route('/api/sync_members', methods=['POST'])
 def sync_members():
     """API endpoint to manually sync Discord members"""
@@ -1058,18 +766,16 @@ def inject_config():
     return {'config': load_config()}
 
 if __name__ == '__main__':
-    print("Starting Discord Review Dashboard...")
-    print("Dashboard will be available at http://localhost:5000")
+    setup_logging("dashboard")
+    log.info("Starting Discord Review Dashboard at http://localhost:5000")
     
     # Initialize database
-    db.init_db()
+    get_storage().init()
     
     # Check Discord configuration
     if DISCORD_TOKEN and GUILD_ID:
-        print("Discord integration configured (using REST API)")
-        print("   Use the 'Sync' button to fetch server members")
+        log.info("Discord integration configured (using REST API); use the 'Sync' button to fetch server members")
     else:
-        print("Discord integration disabled (missing token or guild ID)")
-        print("   Add DISCORD_TOKEN and GUILD_ID to .env file to enable")
+        log.info("Discord integration disabled (missing token or guild ID); add DISCORD_TOKEN and GUILD_ID to .env to enable")
     
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -8,6 +8,7 @@ import os
 import sys
 import asyncio
 from app import app
+from utils.log import setup_logging
 
 def main():
     print("=" * 60)
@@ -65,7 +66,8 @@ def main():
         print("All checks passed! Starting server...")
         print()
         
-        # Start Flask app
+        # Start Flask app; request and error logs go through utils/log.py
+        setup_logging("dashboard")
         app.run(
             debug=True,
             host='0.0.0.0',
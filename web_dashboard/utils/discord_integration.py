@@ -6,11 +6,14 @@ This module provides functions to fetch user and thread information from Discord
 import discord
 from discord.ext import commands
 import asyncio
+import logging
 import os
 import sys
 import yaml
 from typing import Optional, Dict, Any
 
+log = logging.getLogger(__name__)
+
 # Add parent directory to path to import config
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
@@ -34,14 +37,14 @@ class DiscordDataFetcher:
         
         @self.bot.event
         async def on_ready():
-            print(f"Discord API connected as {self.bot.user}")
+            log.info("Discord API connected as %s", self.bot.user)
     
     async def start_bot(self):
         """Start the Discord bot connection"""
         try:
             await self.bot.start(self.token)
-        except Exception as e:
-            print(f"Error starting Discord bot: {e}")
+        except Exception:
+            log.exception("Error starting Discord bot")
             return False
         return True
     
@@ -102,7 +105,7 @@ class DiscordDataFetcher:
             return user_data
             
         except Exception as e:
-            print(f"Error fetching user {user_id}: {e}")
+            log.warning("Error fetching user %s: %s", user_id, e)
             return None
     
     async def get_thread_info(self, thread_id: int) -> Optional[Dict[str, Any]]:
@@ -159,7 +162,7 @@ class DiscordDataFetcher:
             return thread_data
             
         except Exception as e:
-            print(f"Error fetching thread {thread_id}: {e}")
+            log.warning("Error fetching thread %s: %s", thread_id, e)
             return None
     
     async def get_guild_info(self) -> Optional[Dict[str, Any]]:
@@ -188,7 +191,7 @@ class DiscordDataFetcher:
             return guild_data
             
         except Exception as e:
-            print(f"Error fetching guild {self.guild_id}: {e}")
+            log.warning("Error fetching guild %s: %s", self.guild_id, e)
             return None
 
 # Global Discord fetcher instance
@@ -215,8 +218,8 @@ async def initialize_discord_integration(token: str, guild_id: int) -> bool:
         _discord_fetcher = DiscordDataFetcher(token, guild_id)
         # Note: Bot connection would be handled separately in a background task
         return True
-    except Exception as e:
-        print(f"Error initializing Discord integration: {e}")
+    except Exception:
+        log.exception("Error initializing Discord integration")
         return False
 
 def load_config():
@@ -226,7 +229,7 @@ def load_config():
         with open(config_path, 'r', encoding='utf-8') as f:
             return yaml.safe_load(f)
     except Exception as e:
-        print(f"Error loading config: {e}")
+        log.warning("Error loading config: %s", e)
         return {}
 
 # Utility functions for template usage